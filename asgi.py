@@ -0,0 +1,11 @@
+import os
+
+from dotenv import load_dotenv
+
+from core.asgi import create_asgi_app
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Create the ASGI application instance (served with `hypercorn asgi:app`)
+app = create_asgi_app(os.getenv("FLASK_ENV"))
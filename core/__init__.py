@@ -1,14 +1,24 @@
 import yaml
+from apscheduler.events import EVENT_JOB_SUBMITTED
 from flask import Flask
 from opentelemetry.instrumentation.flask import FlaskInstrumentor
 from opentelemetry.instrumentation.requests import RequestsInstrumentor
 from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
 from prometheus_flask_exporter import PrometheusMetrics
 
+from .catalog_snapshot import catalog_snapshot
+from .category_registry import category_registry
+from .category_tree import category_tree
 from .config import app_config
+from .db_pool import build_engine_options, instrument_engine
 from .extensions import bcrypt, cors, db, email_manager, jwt_manager, scheduler
 from .instrumentation import build_instrumentation
+from .json_provider import OrjsonProvider
+from .leader_election import scheduler_leader
+from .rankings import listing_rankings
+from .replicas import replica_router
 from .utils import init_db
+from .view_counter import view_counter
 
 
 def create_app(config_name):
@@ -32,6 +42,7 @@ def create_app(config_name):
 
     # Create Flask app and set up Prometheus metrics
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
     metrics = PrometheusMetrics.for_app_factory()
 
     # Set up additional instrumentation for production
@@ -50,18 +61,52 @@ def create_app(config_name):
     bcrypt.init_app(app)
     jwt_manager.init_app(app)
     email_manager.init_app(app)
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", build_engine_options(app.config))
     db.init_app(app)
+    with app.app_context():
+        instrument_engine(db.engine, app.config)
+    replica_router.init_app(app)
     scheduler.init_app(app)
+    scheduler_leader.init_app(app)
+    view_counter.init_app(app)
+    listing_rankings.init_app(app)
+    category_registry.init_app(app)
+    category_tree.init_app(app)
+    catalog_snapshot.init_app(app)
 
     # Import scheduler jobs
+    from .scheduler_jobs import archive_orders as archive_orders
     from .scheduler_jobs import (
         cleanup_delete_requests as cleanup_delete_requests,
     )
     from .scheduler_jobs import (
         cleanup_tokens_blocklist as cleanup_tokens_blocklist,
     )
+    from .scheduler_jobs import (
+        flush_listing_views as flush_listing_views,
+    )
+    from .scheduler_jobs import (
+        manage_tokens_blocklist_partitions as manage_tokens_blocklist_partitions,
+    )
+    from .scheduler_jobs import (
+        recompute_listing_facets as recompute_listing_facets,
+    )
+    from .scheduler_jobs import (
+        recompute_listing_rankings as recompute_listing_rankings,
+    )
+    from .scheduler_jobs import record_job_lag
+    from .scheduler_jobs import (
+        send_order_notifications as send_order_notifications,
+    )
+    from .scheduler_jobs import (
+        write_catalog_snapshot as write_catalog_snapshot,
+    )
+
+    scheduler.add_listener(record_job_lag, EVENT_JOB_SUBMITTED)
 
-    # Start the scheduler
+    # Start the scheduler (jobs only run in the elected leader process, except
+    # flush_listing_views which flushes each process's own buffer, and
+    # write_catalog_snapshot which elects its own writer on each node)
     scheduler.start()
 
     # Initialize database with data from YAML file
@@ -144,6 +189,8 @@ def create_app(config_name):
 # Key components:
 # - OpenTelemetry instrumentation for tracing (in production)
 # - Prometheus metrics for monitoring
+# - orjson-backed JSON provider (see json_provider.py)
+# - Tuned and instrumented database connection pool (see db_pool.py)
 # - Various Flask extensions (CORS, JWT, email, scheduler, etc.)
 # - Database initialization with data from a YAML file
 # - Multiple blueprints for different areas of the application (public views,
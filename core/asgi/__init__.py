@@ -0,0 +1,62 @@
+from quart import Quart
+
+from ..config import app_config
+from ..json_provider import OrjsonProvider
+from .db import async_db
+from .errors import register_error_handlers
+from .view_counter import init_view_counter
+
+
+def create_asgi_app(config_name):
+    """
+    Create and configure the async (ASGI) application.
+
+    The ASGI application serves the async variants of the I/O-bound public
+    listing and cart endpoints. It shares the configuration and the models of
+    the Flask application, but not its extensions: it does not initialize the
+    database or start the scheduler, which stay with the Flask application.
+
+    Args:
+        config_name (str): The name of the configuration to use (e.g., 'development', 'production').
+
+    Returns:
+        Quart: The configured Quart application instance.
+    """
+    app = Quart(__name__)
+    app.json = OrjsonProvider(app)
+    app.config.from_object(app_config[config_name])
+
+    init_view_counter(app)
+    async_db.init_app(app)
+    register_error_handlers(app)
+
+    from .listings import async_listings_bp
+
+    app.register_blueprint(async_listings_bp)
+
+    from .cart import async_cart_bp
+
+    app.register_blueprint(async_cart_bp)
+
+    return app
+
+
+# This package provides the async (ASGI) serving mode of the application.
+
+# The Flask application handles each request on a worker thread that stays
+# blocked while waiting on PostgreSQL. The ASGI application runs the routes
+# as coroutines on an event loop and talks to PostgreSQL through asyncpg, so a
+# single worker keeps many requests in flight while they wait on the database.
+
+# Usage (see asgi.py):
+#   $ hypercorn -w 4 -b 0.0.0.0:8000 asgi:app
+
+# The two applications can be deployed side by side: the reverse proxy sends
+# the routes listed below to the ASGI deployment and everything else to the
+# Flask one. Tokens issued by the Flask application are accepted by both.
+# - GET /categories
+# - POST /products
+# - GET /products/<product_ulid>/<listing_ulid>
+# - GET, POST, DELETE /cart
+
+# tools/bench_asgi.py compares both deployments at the same worker count.
@@ -0,0 +1,177 @@
+from marshmallow import ValidationError
+from quart import Blueprint, request
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from core.blueprints.customer.cart.routes import cart_summary
+from core.models import CartEntry, Listing, Product, ProductCategory, Seller
+from core.validators.customer.customer_cart import (
+    AsyncRemoveFromCartSchema,
+    UpsertCartSchema,
+)
+
+from .db import async_db
+from .errors import bad_request, handle_exception, not_found
+from .utils import get_jwt_identity, required_user_type, success_response
+
+async_cart_bp = Blueprint("async_customer_cart", __name__)
+
+validation_upsert_cart = UpsertCartSchema()
+validation_remove_from_cart = AsyncRemoveFromCartSchema()
+
+
+@async_cart_bp.route("/cart", methods=["GET"])
+@required_user_type(["customer"])
+async def get_cart():
+    """
+    Retrieve the current user's cart contents.
+
+    Returns:
+        A JSON response containing the cart summary.
+    """
+    cart_id = get_jwt_identity()
+
+    query = (
+        select(
+            Product.name.label("product_name"),
+            Product.id.label("product_id"),
+            ProductCategory.title.label("product_category"),
+            Product.image_src.label("product_img"),
+            Listing.product_state,
+            Listing.price.label("price_per_unit"),
+            Listing.id.label("listing_id"),
+            CartEntry.quantity,
+            Seller.company_name,
+        )
+        .select_from(CartEntry)
+        .join(Listing, CartEntry.listing_id == Listing.id)
+        .join(Seller, Listing.seller_id == Seller.id)
+        .join(Product, Listing.product_id == Product.id)
+        .join(ProductCategory, Product.category_id == ProductCategory.id)
+        .where(CartEntry.cart_id == cart_id)
+    )
+
+    try:
+        async with async_db.session() as session:
+            cart_entries = (await session.execute(query)).all()
+    except SQLAlchemyError as sql_err:
+        return handle_exception(str(sql_err))
+
+    return success_response(data=cart_summary(cart_entries), status_code=200)
+
+
+@async_cart_bp.route("/cart", methods=["POST"])
+@required_user_type(["customer"])
+async def upsert_cart_entry():
+    """
+    Add or update an item in the user's cart.
+
+    If the quantity is set to 0, the item is removed from the cart.
+
+    Returns:
+        A JSON response indicating success or failure of the operation.
+    """
+    cart_id = get_jwt_identity()
+
+    try:
+        validated_data = validation_upsert_cart.load(await request.get_json())
+    except ValidationError as err:
+        return bad_request(err.messages)
+
+    listing_id = validated_data.get("listing_id")
+    quantity = validated_data.get("quantity")
+
+    try:
+        async with async_db.session() as session, session.begin():
+            available = await session.scalar(
+                select(Listing.quantity).filter_by(id=listing_id)
+            )
+            if available is None:
+                return not_found("Listing not found")
+
+            if available < quantity:
+                return bad_request(
+                    f"The selected quantity {quantity} is "
+                    f"bigger than the available quantity ({available})"
+                )
+
+            cart_entry = await session.scalar(
+                select(CartEntry).filter_by(cart_id=cart_id, listing_id=listing_id)
+            )
+
+            if quantity == 0:
+                if cart_entry:
+                    await session.delete(cart_entry)
+                    return success_response(
+                        message="Cart entry removed successfully",
+                        status_code=200,
+                    )
+                else:
+                    return success_response(
+                        message="No action needed, cart entry doesn't exist",
+                        status_code=200,
+                    )
+
+            if cart_entry:
+                cart_entry.quantity = quantity
+            else:
+                cart_entry = CartEntry(
+                    cart_id=cart_id, listing_id=listing_id, quantity=quantity
+                )
+                session.add(cart_entry)
+                await session.flush()
+
+            return success_response(data={"id": cart_entry.id}, status_code=200)
+    except SQLAlchemyError as sql_err:
+        return handle_exception(str(sql_err))
+
+
+@async_cart_bp.route("/cart", methods=["DELETE"])
+@required_user_type(["customer"])
+async def remove_cart_item():
+    """
+    Remove one or more items from the user's cart.
+
+    Returns:
+        A JSON response indicating success or failure of the operation.
+    """
+    customer_id = get_jwt_identity()
+
+    try:
+        validated_data = validation_remove_from_cart.load(await request.get_json())
+    except ValidationError as err:
+        return bad_request(err.messages)
+
+    cart_item_ids = validated_data.get("cart_item_ids")
+
+    try:
+        async with async_db.session() as session, session.begin():
+            existing = await session.scalar(
+                select(func.count(CartEntry.id)).where(CartEntry.id.in_(cart_item_ids))
+            )
+            if existing < len(set(cart_item_ids)):
+                return bad_request(
+                    {
+                        "cart_item_ids": [
+                            "Invalid cart_item_id: CartEntry does not exist."
+                        ]
+                    }
+                )
+
+            await session.execute(
+                delete(CartEntry).where(
+                    CartEntry.id.in_(cart_item_ids), CartEntry.cart_id == customer_id
+                )
+            )
+    except SQLAlchemyError as e:
+        return handle_exception(str(e))
+
+    return success_response(status_code=200)
+
+
+# This module defines the async (ASGI) variants of the customer cart endpoints
+# in core/blueprints/customer/cart/routes.py, with the same URLs and response
+# format (the cart summary is built by the shared cart_summary function).
+
+# Writes run in a single transaction (session.begin()), committed when the
+# block exits; removing items is a single DELETE statement.
@@ -0,0 +1,106 @@
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from ..db_pool import instrument_engine
+
+ASYNC_DRIVER = "postgresql+asyncpg"
+
+
+def build_async_engine_options(config):
+    """
+    Build the async engine options from the application configuration.
+
+    Uses the same DB_* pool settings as the sync engine (see core/db_pool.py),
+    translated to the asyncpg driver.
+
+    Args:
+        config (dict): The application configuration.
+
+    Returns:
+        dict: Keyword arguments for create_async_engine.
+    """
+    options = {
+        "pool_size": config["DB_POOL_SIZE"],
+        "max_overflow": config["DB_MAX_OVERFLOW"],
+        "pool_timeout": config["DB_POOL_TIMEOUT"],
+        "pool_recycle": config["DB_POOL_RECYCLE"],
+        "pool_pre_ping": config["DB_POOL_PRE_PING"],
+    }
+
+    if config["DB_PGBOUNCER_TRANSACTION_MODE"]:
+        # asyncpg prepares every statement; prepared statements do not survive
+        # a transaction-pooling proxy handing the connection to another client
+        options["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+        }
+    else:
+        options["connect_args"] = {
+            "server_settings": {
+                "statement_timeout": str(config["DB_STATEMENT_TIMEOUT_MS"])
+            }
+        }
+
+    return options
+
+
+class AsyncDatabase:
+    """
+    Async SQLAlchemy engine and session factory for the ASGI application.
+
+    The engine talks to the database configured in DB_URI through asyncpg and
+    is created once per worker process, on its event loop.
+    """
+
+    def __init__(self, app=None):
+        self.engine = None
+        self.session = None
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Create the engine when the app starts serving and dispose it on shutdown.
+
+        Args:
+            app (Quart): The Quart application instance.
+        """
+
+        @app.before_serving
+        async def create_engine():
+            url = make_url(app.config["SQLALCHEMY_DATABASE_URI"]).set(
+                drivername=ASYNC_DRIVER
+            )
+            self.engine = create_async_engine(
+                url,
+                echo=app.config.get("SQLALCHEMY_ECHO", False),
+                **build_async_engine_options(app.config),
+            )
+            instrument_engine(
+                self.engine.sync_engine, app.config, metrics_label="async"
+            )
+            self.session = async_sessionmaker(self.engine, expire_on_commit=False)
+
+        @app.after_serving
+        async def dispose_engine():
+            await self.engine.dispose()
+
+
+async_db = AsyncDatabase()
+
+
+# This module provides the database access of the async (ASGI) serving mode.
+
+# The models in core/models.py are shared with the sync application; only the
+# engine and the session differ:
+#   async with async_db.session() as session:
+#       rows = (await session.execute(select(...))).all()
+
+# Notes:
+# - Relationships must be loaded eagerly (joinedload/selectinload) or through
+#   session.run_sync(...): implicit lazy loading is not available with asyncio.
+# - The pool is sized with the same DB_* settings as the sync engine and is
+#   exported under the "async" label of the db_pool_* metrics.
+# - Reads always go to the primary; read replica routing (core/replicas.py)
+#   is only available in the sync application.
@@ -0,0 +1,103 @@
+from quart import jsonify
+
+
+def bad_request(error):
+    """
+    Build a 400 Bad Request response.
+
+    Args:
+        error: The error object containing details about the bad request.
+
+    Returns:
+        tuple: A JSON response with error details and a 400 status code.
+    """
+    return jsonify({"error": "bad request", "message": str(error)}), 400
+
+
+def unauthorized(error):
+    """
+    Build a 401 Unauthorized response.
+
+    Args:
+        error: The error object containing details about the unauthorized access.
+
+    Returns:
+        tuple: A JSON response with error details and a 401 status code.
+    """
+    return jsonify({"error": "unauthorized", "message": str(error)}), 401
+
+
+def forbidden(error):
+    """
+    Build a 403 Forbidden response.
+
+    Args:
+        error: The error object containing details about the forbidden access.
+
+    Returns:
+        tuple: A JSON response with error details and a 403 status code.
+    """
+    return jsonify({"error": "forbidden", "message": str(error)}), 403
+
+
+def not_found(error):
+    """
+    Build a 404 Not Found response.
+
+    Args:
+        error: The error object containing details about the resource not found.
+
+    Returns:
+        tuple: A JSON response with error details and a 404 status code.
+    """
+    return jsonify({"error": "not found", "message": str(error)}), 404
+
+
+def internal_server_error(error=None):
+    """
+    Build a 500 Internal Server Error response with a generic message.
+
+    Returns:
+        tuple: A JSON response with a generic error message and a 500 status code.
+    """
+    return (
+        jsonify(
+            {
+                "error": "internal server error",
+                "message": "an unexpected error occurred",
+            }
+        ),
+        500,
+    )
+
+
+def handle_exception(error):
+    """
+    Build a 500 response for an unhandled exception.
+
+    Args:
+        error: The exception object.
+
+    Returns:
+        tuple: A JSON response with error details and a 500 status code.
+    """
+    return jsonify({"error": "server error", "message": str(error)}), 500
+
+
+def register_error_handlers(app):
+    """
+    Register the JSON error handlers on the Quart application.
+
+    Args:
+        app (Quart): The Quart application instance.
+    """
+    app.register_error_handler(400, bad_request)
+    app.register_error_handler(401, unauthorized)
+    app.register_error_handler(403, forbidden)
+    app.register_error_handler(404, not_found)
+    app.register_error_handler(500, internal_server_error)
+    app.register_error_handler(Exception, handle_exception)
+
+
+# This module mirrors core/blueprints/errors/handlers.py for the async (ASGI)
+# application, so that both serving modes return the same JSON error format.
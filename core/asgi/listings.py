@@ -0,0 +1,185 @@
+from marshmallow import ValidationError
+from quart import Blueprint, current_app, request
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload
+
+from core.models import Listing, Product, ProductCategory
+from core.projections import latest_listing_reviews, listing_rating_summaries
+from core.review_previews import build_reviews_previews
+from core.serializers import category_serializer
+from core.validators.public_views.public_products import AsyncProductsFilterSchema
+from core.view_counter import view_counter
+
+from .db import async_db
+from .errors import bad_request, handle_exception, not_found
+from .utils import success_response
+
+async_listings_bp = Blueprint("async_listings", __name__)
+
+validate_products_filters = AsyncProductsFilterSchema()
+
+
+@async_listings_bp.route("/categories", methods=["GET"])
+async def get_categories():
+    """
+    Retrieve all product categories.
+
+    Returns:
+        JSON response containing all product categories.
+    """
+    try:
+        async with async_db.session() as session:
+            categories = (await session.scalars(select(ProductCategory))).all()
+    except SQLAlchemyError as e:
+        return handle_exception(str(e))
+
+    return success_response(
+        message="Product categories:",
+        data=category_serializer.dump_many(categories),
+    )
+
+
+@async_listings_bp.route("/products", methods=["POST"])
+async def get_products():
+    """
+    Retrieve products based on specified filters.
+
+    The products are sorted by id, as by the sync route.
+
+    Returns:
+        JSON response containing the filtered products.
+    """
+    try:
+        query_params = validate_products_filters.load(await request.get_json())
+    except ValidationError as verr:
+        return bad_request(verr.messages)
+
+    limit = query_params.get("limit")
+    offset = query_params.get("offset")
+    category = query_params.get("category")
+
+    try:
+        async with async_db.session() as session:
+            if category:
+                category_id = await session.scalar(
+                    select(ProductCategory.id).filter_by(title=category)
+                )
+                if category_id is None:
+                    return bad_request({"category": [f"Invalid category: {category}"]})
+
+            query = (
+                select(
+                    Product.id,
+                    Product.name,
+                    Product.description,
+                    Product.image_src,
+                    ProductCategory.title.label("category"),
+                    func.min(Listing.price).label("min_price"),
+                )
+                .join(ProductCategory, Product.category_id == ProductCategory.id)
+                .outerjoin(Listing, Listing.product_id == Product.id)
+                .group_by(Product.id, ProductCategory.title)
+                .order_by(Product.id)
+            )
+
+            if category:
+                query = query.where(ProductCategory.id == category_id)
+
+            products = (await session.execute(query.limit(limit).offset(offset))).all()
+    except SQLAlchemyError as e:
+        return handle_exception(str(e))
+
+    return success_response(
+        data=[p._asdict() for p in products],
+        status_code=200,
+    )
+
+
+@async_listings_bp.route(
+    "/products/<string:product_ulid>/<string:listing_ulid>", methods=["GET"]
+)
+async def get_listing(product_ulid, listing_ulid):
+    """
+    Retrieve details for a specific listing of a product.
+
+    Args:
+        product_ulid (str): The unique identifier of the product.
+        listing_ulid (str): The unique identifier of the listing.
+
+    Returns:
+        JSON response containing the listing details, including product information and reviews.
+    """
+    try:
+        async with async_db.session() as session:
+            listing = await session.scalar(
+                select(Listing)
+                .options(joinedload(Listing.seller))
+                .filter_by(id=listing_ulid, product_id=product_ulid)
+            )
+
+            if not listing:
+                return not_found("Listing not found")
+
+            product = await session.scalar(
+                select(Product)
+                .options(joinedload(Product.category))
+                .filter_by(id=product_ulid)
+            )
+
+            if not product:
+                return not_found("Product not found")
+
+            reviews = (
+                await session.execute(
+                    latest_listing_reviews(
+                        [listing.id],
+                        current_app.config["LISTING_REVIEWS_PREVIEW_SIZE"],
+                    )
+                )
+            ).all()
+            summaries = (
+                await session.execute(listing_rating_summaries([listing.id]))
+            ).all()
+    except SQLAlchemyError as e:
+        return handle_exception(str(e))
+
+    view_counter.record(listing.id)
+
+    listing_data = {
+        "id": listing.id,
+        "price": float(listing.price),
+        "quantity": listing.quantity,
+        "is_available": listing.is_available,
+        "product_state": listing.product_state.value,
+        "purchase_count": listing.purchase_count,
+        "view_count": listing.view_count,
+        "seller": {"name": listing.seller.name},
+        "product": {
+            "id": product.id,
+            "name": product.name,
+            "description": product.description,
+            "image_src": product.image_src,
+            "category": product.category.title,
+        },
+        # The reviews route is served by the sync deployment
+        **build_reviews_previews(
+            [listing.id],
+            reviews,
+            summaries,
+            lambda listing_id: f"/listings/{listing_id}/reviews",
+        )[listing.id],
+    }
+
+    return success_response(data=listing_data, status_code=200)
+
+
+# This module defines the async (ASGI) variants of the public listing endpoints
+# in core/blueprints/public_views/listings/routes.py.
+
+# The endpoints keep the same URLs and response format as the sync routes, so
+# a reverse proxy can send them to either deployment.
+
+# All the data needed by a response is loaded eagerly (joinedload, and the
+# rows of the reviews preview) while the session is open; the response is
+# built after the connection has been returned to the pool.
@@ -0,0 +1,114 @@
+from functools import wraps
+from typing import Any, List, Optional
+
+import jwt
+from quart import current_app, g, jsonify, request
+from sqlalchemy import select
+
+from ..models import TokenBlocklist
+from .db import async_db
+from .errors import unauthorized
+
+
+def decode_access_token() -> Optional[dict]:
+    """
+    Decode and verify the access token sent in the Authorization header.
+
+    Tokens are issued by the sync application (flask_jwt_extended), so they are
+    verified with the same key and algorithm.
+
+    Returns:
+        Optional[dict]: The token claims, or None if the token is missing or invalid.
+    """
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme != "Bearer" or not token:
+        return None
+
+    config = current_app.config
+    try:
+        claims = jwt.decode(
+            token,
+            config.get("JWT_SECRET_KEY") or config["SECRET_KEY"],
+            algorithms=[config.get("JWT_ALGORITHM", "HS256")],
+        )
+    except jwt.PyJWTError:
+        return None
+
+    if claims.get("type") != "access":
+        return None
+    return claims
+
+
+def get_jwt_identity() -> Optional[str]:
+    """Return the identity of the token verified by @required_user_type."""
+    return g.get("jwt_identity")
+
+
+def required_user_type(types: List[str]):
+    """
+    Decorator to restrict access to specific user types.
+
+    Args:
+        types (List[str]): List of allowed user types.
+
+    Returns:
+        function: Decorated coroutine that checks the token and user type before execution.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            claims = decode_access_token()
+            if claims is None:
+                return unauthorized("missing or invalid access token")
+
+            async with async_db.session() as session:
+                revoked = await session.scalar(
+                    select(TokenBlocklist.id).filter_by(jti=claims["jti"]).limit(1)
+                )
+            if revoked is not None:
+                return unauthorized("token has been revoked")
+
+            if claims.get("user_type") not in types:
+                return unauthorized("user not authorized")
+
+            g.jwt_identity = claims["sub"]
+            return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def success_response(
+    message: Optional[str] = None, data: Any = None, status_code: int = 200
+):
+    """
+    Generate a standardized success response.
+
+    Args:
+        message (Optional[str]): Optional success message.
+        data (Any): Optional data to include in the response.
+        status_code (int): HTTP status code, defaults to 200.
+
+    Returns:
+        tuple: JSON response and status code.
+    """
+    response = {}
+    if message is not None:
+        response["message"] = message
+    if data is not None:
+        response["data"] = data
+
+    if not response:
+        return "ok", status_code
+    else:
+        return jsonify(response), status_code
+
+
+# This module contains the helpers shared by the async (ASGI) routes.
+
+# - decode_access_token / required_user_type: the async counterpart of the
+#   flask_jwt_extended checks used by the sync application (signature, expiry,
+#   token type, revocation through tokens_blocklist and user type)
+# - success_response: same response format as core/blueprints/utils.py
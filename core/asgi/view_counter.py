@@ -0,0 +1,55 @@
+import asyncio
+
+from ..view_counter import view_counter
+from .db import async_db
+
+
+def init_view_counter(app):
+    """
+    Flush the buffered listing views from a background task on the event loop.
+
+    The ASGI application has no scheduler: a task started when the app starts
+    serving flushes the views every VIEW_COUNTER_FLUSH_INTERVAL seconds, and
+    the remaining views are flushed on shutdown. Must be called before
+    async_db.init_app, so that the final flush runs before the engine is
+    disposed.
+
+    Args:
+        app (Quart): The Quart application instance.
+    """
+    view_counter.init_app(app, flush_at_exit=False)
+    interval = app.config["VIEW_COUNTER_FLUSH_INTERVAL"]
+
+    async def flush_periodically():
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await view_counter.flush_async(async_db.session)
+            except Exception:
+                app.logger.exception("view counter: flush failed")
+
+    @app.before_serving
+    async def start_flushing():
+        app.extensions["view_counter_task"] = asyncio.create_task(flush_periodically())
+
+    @app.after_serving
+    async def stop_flushing():
+        task = app.extensions.pop("view_counter_task")
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+        try:
+            await view_counter.flush_async(async_db.session)
+        except Exception:
+            app.logger.exception("view counter: final flush failed")
+
+
+# This module runs the listing view counter (core/view_counter.py) in the ASGI
+# serving mode.
+
+# The views recorded by the async GET /products/<product_ulid>/<listing_ulid>
+# route go to the same per-process buffer as in the Flask application and are
+# written with the same batched UPDATE, through the asyncpg engine.
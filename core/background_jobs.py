@@ -0,0 +1,83 @@
+from datetime import UTC, datetime
+
+from .extensions import db, scheduler
+from .models import JobStatus
+
+
+def start_background_job(job, func, *args):
+    """
+    Run a background job in a one-off scheduler job of this process.
+
+    Args:
+        job (BackgroundJobMixin): The row tracking the job, already committed.
+        func (callable): The job, called with the id of the row and args.
+        *args: The other arguments of func.
+    """
+    scheduler.add_job(
+        id=f"{job.__tablename__}_{job.id}",
+        func=func,
+        args=[job.id, *args],
+        replace_existing=True,
+    )
+
+
+def run_background_job(model, job_id: str, work):
+    """
+    Run the work of a background job, and record its outcome.
+
+    Must be called within an application context. The work commits its
+    progress with save_progress; what it leaves uncommitted is committed
+    with the "done" status. On an exception, the uncommitted changes are
+    rolled back and the job is marked as failed, leaving the progress
+    already committed in place.
+
+    Args:
+        model (type): The model tracking the job (a BackgroundJobMixin).
+        job_id (str): The id of the job.
+        work (callable): Does the work, called with the job row.
+
+    Returns:
+        BackgroundJobMixin: The job, with its final status.
+    """
+    job = db.session.get(model, job_id)
+    try:
+        work(job)
+        job.status = JobStatus.DONE
+        job.updated_at = job.finished_at = datetime.now(UTC)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        scheduler.app.logger.exception(f"{model.__tablename__} {job_id} failed")
+        job.status = JobStatus.FAILED
+        job.error = str(e)
+        job.updated_at = job.finished_at = datetime.now(UTC)
+        db.session.commit()
+    return job
+
+
+def save_progress(job):
+    """
+    Commit the progress of a running job.
+
+    Args:
+        job (BackgroundJobMixin): The job, whose updated_at is set.
+    """
+    job.updated_at = datetime.now(UTC)
+    db.session.commit()
+
+
+# This module runs the background jobs started by a request (a large category
+# deletion, a listing import), whose progress is tracked in a table.
+
+# The route creates the row of the job (a model with BackgroundJobMixin),
+# starts the job with start_background_job and answers 202 with its id; a
+# status route returns the row. The job runs in a one-off scheduler job of
+# the process handling the request:
+#   def run_my_job(job_id):
+#       with scheduler.app.app_context():
+#           job = run_background_job(MyJob, job_id, do_the_work)
+#           if job.status is JobStatus.DONE:
+#               ...
+
+# The jobs are not persisted by the scheduler: a job interrupted by a restart
+# stays "running", and updated_at tells how long ago it last made progress.
@@ -12,18 +12,19 @@ class CRUDMixin(object):
     """
 
     @classmethod
-    def create(cls, **kwargs):
+    def create(cls, commit=True, **kwargs):
         """
         Create a new record and save it to the database.
 
         Args:
+            commit (bool): Whether to commit the changes immediately.
             **kwargs: Arbitrary keyword arguments corresponding to model fields.
 
         Returns:
             The newly created and saved record instance.
         """
         record = cls(**kwargs)
-        return record.save()
+        return record.save(commit=commit)
 
     def update(self, commit=True, **kwargs):
         """
@@ -1,12 +1,35 @@
-from flask import Blueprint, request
+from flask import Blueprint, current_app, request
 from marshmallow import ValidationError
+from sqlalchemy import func, select
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
 from core import db
 from core.blueprints.errors.handlers import bad_request, handle_exception, not_found
-from core.blueprints.utils import required_user_type, success_response
-from core.models import Product, ProductCategory
-from core.validators.admin.admin_products import AddProductSchema, CategorySchema
+from core.blueprints.utils import (
+    required_user_type,
+    success_response,
+    use_read_replica,
+)
+from core.category_deletion import (
+    invalidate_category_caches,
+    remove_category,
+    start_category_deletion,
+)
+from core.category_registry import category_registry
+from core.category_tree import add_category_counts, category_tree
+from core.exports import export_response
+from core.models import CategoryDeletion, Product, ProductCategory
+from core.projections import product_details
+from core.serializers import (
+    category_deletion_serializer,
+    category_serializer,
+    product_serializer,
+)
+from core.validators.admin.admin_products import (
+    AddProductSchema,
+    CategorySchema,
+    ProductsExportSchema,
+)
 from core.validators.public_views.public_products import ProductsFilterSchema
 
 admin_products_bp = Blueprint("admin_products", __name__)
@@ -15,6 +38,7 @@ validate_add_product = AddProductSchema()
 validate_add_category = CategorySchema()
 validate_remove_category = CategorySchema()
 validate_product_filters = ProductsFilterSchema()
+validate_products_export = ProductsExportSchema()
 
 
 @admin_products_bp.route("/admin/products", methods=["PUT"])
@@ -39,14 +63,19 @@ def create_product():
         image_src = validated_data.get("image_src")
         category = validated_data.get("category").title()
 
-        c = ProductCategory.query.filter_by(title=category).first()
+        category_id = category_registry.get(category)
 
-        if not c:
+        if not category_id:
             return bad_request(error="Category not found")
 
-        _p = Product.create(
-            name=name, description=description, image_src=image_src, category_id=c.id
-        )
+        _p = Product(
+            name=name,
+            description=description,
+            image_src=image_src,
+            category_id=category_id,
+        ).save(commit=False)
+        add_category_counts(category_id, products=1)
+        db.session.commit()
 
         return success_response(data={"id": _p.id}, status_code=201)
     except SQLAlchemyError as sql_err:
@@ -83,16 +112,14 @@ def get_products():
         query = Product.query
 
         if category:
-            query = query.join(ProductCategory).filter(
-                ProductCategory.title == category
-            )
+            query = query.filter(Product.category_id == category_registry.get(category))
 
         total_count = query.count()
         ps = query.limit(limit).offset(offset).all()
 
         return success_response(
             data={
-                "products": [p.to_dict() for p in ps],
+                "products": product_serializer.dump_many(ps),
                 "pagination": {
                     "total_count": total_count,
                     "limit": limit,
@@ -109,6 +136,39 @@ def get_products():
         return handle_exception(error=str(e))
 
 
+@admin_products_bp.route("/admin/products/export", methods=["GET"])
+@required_user_type(["admin"])
+@use_read_replica
+def export_products():
+    """
+    Export all the products, optionally of a single category.
+
+    The products are streamed as NDJSON or CSV (?format=), sorted by id, with
+    the title of their category.
+
+    Returns:
+        A streamed response with one line per product.
+    """
+    try:
+        data = validate_products_export.load(request.args)
+    except ValidationError as verr:
+        return bad_request(error=verr.messages)
+
+    query = (
+        product_details.select()
+        .select_from(Product)
+        .join(ProductCategory, Product.category_id == ProductCategory.id)
+        .order_by(Product.id)
+    )
+    if data["category"]:
+        category_id = category_registry.get(data["category"])
+        if not category_id:
+            return bad_request(error="Category not found")
+        query = query.where(Product.category_id == category_id)
+
+    return export_response(query, data["format"], "products")
+
+
 @admin_products_bp.route("/admin/products/<string:product_ulid>", methods=["GET"])
 @required_user_type(["admin"])
 def get_product(product_ulid):
@@ -128,7 +188,7 @@ def get_product(product_ulid):
         if not p:
             return not_found(error="Product not found")
 
-        return success_response(data=p.to_dict(), status_code=200)
+        return success_response(data=product_serializer.dump(p), status_code=200)
     except SQLAlchemyError as sql_err:
         db.session.rollback()
         return handle_exception(error=sql_err)
@@ -158,7 +218,7 @@ def get_categories():
 
         cs = query.all()
 
-        return success_response(data=[c.to_dict() for c in cs], status_code=200)
+        return success_response(data=category_serializer.dump_many(cs), status_code=200)
     except SQLAlchemyError as sql_err:
         db.session.rollback()
         return handle_exception(error=str(sql_err))
@@ -173,7 +233,8 @@ def create_category():
     """
     Create a new product category.
 
-    This endpoint allows an admin to create a new product category.
+    This endpoint allows an admin to create a new product category, optionally as a
+    subcategory of an existing one.
 
     Returns:
         A JSON response with the new category's ID on success, or an error message on failure.
@@ -184,12 +245,28 @@ def create_category():
         return bad_request(error=verr.messages)
 
     title = validated_data.get("title").title()
+    parent_title = validated_data.get("parent_title")
+
+    parent = None
+    if parent_title:
+        parent_id = category_registry.get(parent_title.title())
+        parent = db.session.get(ProductCategory, parent_id) if parent_id else None
+        if not parent:
+            return bad_request(error="Parent category not found")
 
     try:
-        _pc = ProductCategory.create(title=title)
+        _pc = ProductCategory.create(
+            title=title,
+            parent_id=parent.id if parent else None,
+            path=parent.subtree_path if parent else "",
+        )
     except IntegrityError as int_e:
+        db.session.rollback()
         return bad_request(error=str(int_e))
 
+    category_registry.invalidate()
+    category_tree.invalidate()
+
     return success_response(data={"id": _pc.id}, status_code=201)
 
 
@@ -200,7 +277,11 @@ def delete_category():
     Delete a product category.
 
     This endpoint allows an admin to delete a product category. If the category contains products,
-    they will be reassigned to a generic category.
+    they will be reassigned to a generic category. Its subcategories are attached to its parent.
+
+    A category with more than CATEGORY_DELETE_SYNC_LIMIT products is deleted in the background:
+    the response (202) then contains the deletion, whose progress is returned by
+    GET /admin/category/deletions/<id>.
 
     Returns:
         A JSON response indicating success or an error message on failure.
@@ -218,21 +299,27 @@ def delete_category():
         if not pc:
             return success_response(message="Category already removed", status_code=200)
 
+        if pc.title == "Generic":
+            return bad_request(error="The generic category cannot be removed")
+
         # Ensure a generic category exists
         generic_category = ProductCategory.query.filter_by(title="Generic").first()
         if not generic_category:
             generic_category = ProductCategory.create(title="Generic")
 
-        # Reassign products to the generic category
-        products = Product.query.filter_by(category_id=pc.id).all()
-        for product in products:
-            product.category_id = generic_category.id
-            db.session.add(product)
+        total_products = db.session.scalar(
+            select(func.count()).where(Product.category_id == pc.id)
+        )
 
-        # Commit the changes and delete the category
-        with db.session.begin():
-            db.session.commit()
-            pc.delete()
+        if total_products > current_app.config["CATEGORY_DELETE_SYNC_LIMIT"]:
+            deletion = start_category_deletion(pc, generic_category, total_products)
+            return success_response(
+                data=category_deletion_serializer.dump(deletion), status_code=202
+            )
+
+        # Reassign products to the generic category and delete the category
+        remove_category(pc, generic_category)
+        invalidate_category_caches()
 
         return success_response(status_code=200)
     except SQLAlchemyError as sql_err:
@@ -243,11 +330,33 @@ def delete_category():
         return handle_exception(error=str(e))
 
 
+@admin_products_bp.route(
+    "/admin/category/deletions/<string:deletion_ulid>", methods=["GET"]
+)
+@required_user_type(["admin"])
+def get_category_deletion(deletion_ulid):
+    """
+    Retrieve the progress of a category deletion running in the background.
+
+    Args:
+        deletion_ulid (str): The ULID of the deletion, returned by DELETE /admin/category.
+
+    Returns:
+        A JSON response with the status of the deletion and the number of products moved so far.
+    """
+    deletion = db.session.get(CategoryDeletion, deletion_ulid)
+    if not deletion:
+        return not_found(error="Category deletion not found")
+
+    return success_response(data=category_deletion_serializer.dump(deletion))
+
+
 # This module defines the admin product management endpoints.
 # It includes functionality for creating, retrieving, and managing products and categories.
 # Key features:
 # - CRUD operations for products and categories
 # - Pagination and filtering for product and category retrieval
+# - Streamed export of all the products, in NDJSON or CSV (see core/exports.py)
 # - Error handling for database operations and validation errors
 # - Automatic reassignment of products to a generic category when deleting a category
 # Note: All endpoints require admin privileges, enforced by the @required_user_type decorator.
@@ -4,11 +4,19 @@ from flask import Blueprint, request
 from marshmallow import ValidationError
 from sqlalchemy.exc import SQLAlchemyError
 
-from core.blueprints.errors.handlers import handle_exception, not_found
-from core.blueprints.utils import required_user_type, success_response
+from core.blueprints.errors.handlers import bad_request, handle_exception, not_found
+from core.blueprints.utils import (
+    required_user_type,
+    success_response,
+    use_read_replica,
+)
+from core.exports import export_response
 from core.models import DeleteRequest, User, UserType
+from core.projections import exported_user
+from core.serializers import user_serializer
 from core.validators.admin.admin_users import (
     AdminDeleteUserSchema,
+    AdminUsersExportSchema,
     AdminUsersFiltersSchema,
 )
 
@@ -16,6 +24,7 @@ admin_users_bp = Blueprint("admin_users", __name__)
 
 validation_delete_user = AdminDeleteUserSchema()
 validation_users_filters = AdminUsersFiltersSchema()
+validation_users_export = AdminUsersExportSchema()
 
 
 @admin_users_bp.route("/admin/users", methods=["GET"])
@@ -56,7 +65,7 @@ def get_users():
 
         return success_response(
             data={
-                "users": [u.to_dict(rules=("-password",)) for u in users],
+                "users": user_serializer.dump_many(users),
                 "pagination": {
                     "total_count": total_count,
                     "limit": limit,
@@ -72,6 +81,31 @@ def get_users():
         return handle_exception(error=str(e))
 
 
+@admin_users_bp.route("/admin/users/export", methods=["GET"])
+@required_user_type(["admin"])
+@use_read_replica
+def export_users():
+    """
+    Export all the users, optionally of a single type.
+
+    The users are streamed as NDJSON or CSV (?format=), sorted by id, without
+    their profile image and password hash.
+
+    Returns:
+        A streamed response with one line per user.
+    """
+    try:
+        data = validation_users_export.load(request.args)
+    except ValidationError as err:
+        return bad_request(error=err.messages)
+
+    query = exported_user.select().select_from(User).order_by(User.id)
+    if data["user_type"] is not None:
+        query = query.where(User.user_type == data["user_type"])
+
+    return export_response(query, data["format"], "users")
+
+
 @admin_users_bp.route("/admin/users/<string:user_ulid>", methods=["GET"])
 @required_user_type(["admin"])
 def get_user(user_ulid):
@@ -90,9 +124,7 @@ def get_user(user_ulid):
         user = User.query.get(user_ulid)
         if not user:
             return not_found(error="User not found")
-        return success_response(
-            data=user.to_dict(rules=("-password",)), status_code=200
-        )
+        return success_response(data=user_serializer.dump(user), status_code=200)
     except SQLAlchemyError as sql_err:
         return handle_exception(error=str(sql_err))
     except Exception as e:
@@ -155,6 +187,7 @@ def delete_user(user_ulid):
 
 # Key features:
 # - Pagination and sorting for user list retrieval
+# - Streamed export of all the users, in NDJSON or CSV (see core/exports.py)
 # - Detailed error handling for database operations and validation errors
 # - User deletion process with a 30-day delay
 # - Prevention of admin user deletion
@@ -4,7 +4,7 @@ from flask import Blueprint, current_app, request
 from flask_jwt_extended import get_jwt_identity
 from marshmallow import ValidationError
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, selectinload
 
 from core import db
 from core.blueprints.errors.handlers import bad_request, handle_exception
@@ -13,8 +13,11 @@ from core.blueprints.utils import (
     send_order_cancellation_email,
     send_order_confirmation_email,
     success_response,
+    use_read_replica,
 )
 from core.models import (
+    ArchivedOrder,
+    ArchivedOrderEntry,
     Cart,
     CartEntry,
     CustomerAddress,
@@ -23,6 +26,8 @@ from core.models import (
     OrderEntry,
     OrderStatus,
 )
+from core.rankings import listing_rankings
+from core.seller_rollups import record_order_placed, record_order_status_change
 from core.validators.customer.customer_orders import (
     OrderCreationSchema,
     OrderSummaryFilterSchema,
@@ -90,20 +95,26 @@ def create_order():
             address_state=data.get("address_state"),
             address_country=data.get("address_country"),
             address_postal_code=data.get("address_postal_code"),
+            commit=False,
         )
+        # The id of the order is generated by the database
+        db.session.flush()
 
         # Create OrderEntry for the cart entry
         _oe = OrderEntry.create(
             order_id=new_order.id,
             listing_id=cart_with_entry.cart_entry.listing_id,
             quantity=cart_with_entry.cart_entry.quantity,
+            unit_price=cart_with_entry.cart_entry.listing.price,
+            commit=False,
         )
 
         # Update the listing quantity
         listing = cart_with_entry.cart_entry.listing
+        purchased = (listing.id, cart_with_entry.cart_entry.quantity)
         listing.quantity -= cart_with_entry.cart_entry.quantity
         listing.purchase_count += cart_with_entry.cart_entry.quantity
-        listing.update()
+        listing.update(commit=False)
 
         # Delete the cart entry
         db.session.delete(cart_with_entry.cart_entry)
@@ -116,12 +127,16 @@ def create_order():
             state=data.get("address_state"),
             country=data.get("address_country"),
             postal_code=data.get("address_postal_code"),
+            commit=False,
         )
 
+        record_order_placed(new_order, [_oe])
+        db.session.commit()
+        listing_rankings.record_purchase(*purchased)
+
         if config_name != "development":
             send_order_confirmation_email(customer_id, new_order.id)
 
-        db.session.commit()
         return success_response(data={"id": new_order.id}, status_code=201)
     except SQLAlchemyError as sql_err:
         db.session.rollback()
@@ -133,6 +148,7 @@ def create_order():
 
 @customer_orders_bp.route("/orders/<order_ulid>", methods=["GET"])
 @required_user_type(["customer"])
+@use_read_replica
 def get_order_details(order_ulid):
     """
     Retrieve details of a specific order for the authenticated customer.
@@ -148,6 +164,12 @@ def get_order_details(order_ulid):
     try:
         order = Order.query.filter_by(id=order_ulid, customer_id=customer_id).first()
 
+        # Old delivered and cancelled orders are moved to the archive
+        if not order:
+            order = ArchivedOrder.query.filter_by(
+                id=order_ulid, customer_id=customer_id
+            ).first()
+
         if not order:
             return bad_request(error="Order not found")
 
@@ -190,11 +212,14 @@ def get_order_details(order_ulid):
 
 @customer_orders_bp.route("/orders/summary", methods=["GET"])
 @required_user_type(["customer"])
+@use_read_replica
 def get_orders_summary():
     """
     Retrieve a summary of orders for the authenticated customer.
 
     This function supports filtering, sorting, and pagination of orders.
+    Delivered and cancelled orders older than ORDERS_ARCHIVE_AFTER_DAYS are
+    listed with archived=true.
 
     Returns:
         A JSON response with the list of orders and pagination information.
@@ -206,19 +231,26 @@ def get_orders_summary():
     except ValidationError as err:
         return bad_request(error=err.messages)
 
+    if filters["archived"]:
+        order_model, entry_model = ArchivedOrder, ArchivedOrderEntry
+    else:
+        order_model, entry_model = Order, OrderEntry
+
     try:
-        query = Order.query.filter_by(customer_id=customer_id).options(
-            joinedload(Order.order_entries)
-            .joinedload(OrderEntry.listing)
+        # Entries are loaded by a second query, so the page of orders is
+        # limited directly on the (customer_id, purchased_at) index
+        query = order_model.query.filter_by(customer_id=customer_id).options(
+            selectinload(order_model.order_entries)
+            .joinedload(entry_model.listing)
             .joinedload(Listing.product)
         )
 
         if filters.get("status"):
             query = query.filter(
-                Order.order_status == OrderStatus(filters["status"].lower())
+                order_model.order_status == OrderStatus(filters["status"].lower())
             )
 
-        order_column = getattr(Order, filters["order_by"])
+        order_column = getattr(order_model, filters["order_by"])
         if filters["order_direction"] == "desc":
             query = query.order_by(order_column.desc())
         else:
@@ -294,15 +326,20 @@ def delete_order(order_ulid):
         if order.order_status != OrderStatus.PENDING:
             return bad_request(error="Only pending orders can be cancelled")
 
-        order.update(order_status=OrderStatus.CANCELLED)
+        previous_status = order.order_status
+        order.update(order_status=OrderStatus.CANCELLED, commit=False)
 
         for entry in order.order_entries:
             listing = entry.listing
             listing.update(
                 quantity=listing.quantity + entry.quantity,
                 purchase_count=listing.purchase_count - entry.quantity,
+                commit=False,
             )
 
+        record_order_status_change(order, order.order_entries, previous_status)
+        db.session.commit()
+
         if config_name != "development":
             send_order_cancellation_email(customer_id, order.id)
 
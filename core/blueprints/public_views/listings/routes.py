@@ -1,8 +1,7 @@
-from flask import Blueprint, request
+from flask import Blueprint, current_app, request, url_for
 from marshmallow import ValidationError
-from sqlalchemy import func
+from sqlalchemy import func, select, tuple_
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import joinedload
 
 from core import db
 from core.blueprints.errors.handlers import (
@@ -11,9 +10,12 @@ from core.blueprints.errors.handlers import (
     internal_server_error,
     not_found,
 )
-from core.blueprints.utils import success_response
+from core.blueprints.utils import success_response, use_read_replica
+from core.catalog_snapshot import catalog_snapshot
+from core.category_registry import category_registry
+from core.category_tree import category_tree
+from core.facets import active_filters, facet_counts, search_listings
 from core.models import (
-    Customer,
     Listing,
     ListingReview,
     Product,
@@ -21,35 +23,114 @@ from core.models import (
     ProductState,
     Seller,
 )
-from core.validators.customer.customer_review import ReviewFilterSchema
+from core.projections import (
+    customer_user,
+    latest_listing_reviews,
+    listing_offer,
+    listing_rating_summaries,
+    listing_review,
+    product_details,
+    review_rating_value,
+    seller_listing,
+    seller_user,
+)
+from core.rankings import listing_rankings
+from core.review_previews import build_reviews_previews
+from core.serializers import category_serializer
+from core.validators.customer.customer_review import (
+    ReviewFilterSchema,
+    encode_review_cursor,
+)
 from core.validators.public_views.public_products import (
+    ListingSearchSchema,
     ListingsFilterSchema,
     ProductsFilterSchema,
+    RankingFilterSchema,
 )
+from core.view_counter import view_counter
 
 listings_bp = Blueprint("listings", __name__)
 
 validate_products_filters = ProductsFilterSchema()
 validate_review_filters = ReviewFilterSchema()
 validate_listings_filters = ListingsFilterSchema()
+validate_ranking_filters = RankingFilterSchema()
+validate_search_filters = ListingSearchSchema()
+
+
+def listing_reviews_preview(listing_ids):
+    """
+    Generate the reviews preview of each listing shown on a product page.
+
+    The preview holds the latest LISTING_REVIEWS_PREVIEW_SIZE reviews (see
+    core/review_previews.py).
+
+    Args:
+        listing_ids: The ids of the listings.
+
+    Returns:
+        dict: The preview of each listing, by listing id.
+    """
+    per_listing = current_app.config["LISTING_REVIEWS_PREVIEW_SIZE"]
+
+    reviews = summaries = []
+    if listing_ids:
+        reviews = db.session.execute(
+            latest_listing_reviews(listing_ids, per_listing)
+        ).all()
+        summaries = db.session.execute(listing_rating_summaries(listing_ids)).all()
+
+    return build_reviews_previews(
+        listing_ids,
+        reviews,
+        summaries,
+        lambda listing_id: url_for(
+            "listings.get_listings_reviews", listing_ulid=listing_id
+        ),
+    )
 
 
 @listings_bp.route("/categories", methods=["GET"])
+@use_read_replica
 def get_categories():
     """
     Retrieve all product categories.
 
+    The categories are served from the catalog snapshot when it is available.
+
     Returns:
         JSON response containing all product categories.
     """
-    product_categories = ProductCategory.query.all()
+    categories = catalog_snapshot.categories()
+    if categories is None:
+        categories = category_serializer.dump_many(ProductCategory.query.all())
 
     return success_response(
-        message="Product categories:", data=[c.to_dict() for c in product_categories]
+        message="Product categories:",
+        data=categories,
     )
 
 
+@listings_bp.route("/categories/tree", methods=["GET"])
+@use_read_replica
+def get_category_tree():
+    """
+    Retrieve the product categories as a tree.
+
+    Each category includes the number of products and listings in it
+    (product_count, listing_count) and in its whole subtree (total_product_count,
+    total_listing_count). The tree is cached and may lag behind by up to
+    CATEGORY_TREE_TTL seconds.
+
+    Returns:
+        JSON response containing the root categories, each with its
+        subcategories in "children".
+    """
+    return success_response(data=category_tree.get())
+
+
 @listings_bp.route("/listings/<string:listing_ulid>/reviews", methods=["POST"])
+@use_read_replica
 def get_listings_reviews(listing_ulid):
     """
     Retrieve reviews for a specific listing.
@@ -67,13 +148,28 @@ def get_listings_reviews(listing_ulid):
         limit = query_params.get("limit")
         offset = query_params.get("offset")
 
+        cursor = query_params.get("cursor")
+
         query = ListingReview.query.filter_by(listing_id=listing_ulid)
+        total_reviews = query.count()
 
-        # Apply ordering based on the order_by parameter
-        if order_by == "newest":
-            query = query.order_by(ListingReview.modified_at.desc())
+        # Apply ordering based on the order_by (or cursor) parameter
+        if cursor:
+            created_at, review_id = cursor
+            query = query.filter(
+                tuple_(ListingReview.created_at, ListingReview.id)
+                < tuple_(created_at, review_id)
+            ).order_by(ListingReview.created_at.desc(), ListingReview.id.desc())
+            offset = 0
+        elif order_by == "newest":
+            # The order of the cursor, so that the next pages can use it
+            query = query.order_by(
+                ListingReview.created_at.desc(), ListingReview.id.desc()
+            )
         elif order_by == "oldest":
-            query = query.order_by(ListingReview.modified_at.asc())
+            query = query.order_by(
+                ListingReview.created_at.asc(), ListingReview.id.asc()
+            )
         elif order_by == "highest":
             query = query.order_by(ListingReview.rating.desc())
         elif order_by == "lowest":
@@ -83,22 +179,28 @@ def get_listings_reviews(listing_ulid):
 
         review_list = [
             {
+                "id": review.id,
                 "title": review.title,
                 "description": review.description,
                 "rating": review.rating,
+                "created_at": review.created_at,
                 "modified_at": review.modified_at,
             }
             for review in reviews
         ]
 
-        total_reviews = query.count()
-
         response = {
             "total_reviews": total_reviews,
             "limit": limit,
             "offset": offset,
             "reviews": review_list,
         }
+        if cursor or order_by == "newest":
+            response["next_cursor"] = (
+                encode_review_cursor(reviews[-1].created_at, reviews[-1].id)
+                if len(reviews) == limit
+                else None
+            )
 
         return success_response(message="Reviews", data=response)
     except ValidationError as verr:
@@ -114,10 +216,14 @@ def get_listings_reviews(listing_ulid):
 
 
 @listings_bp.route("/products", methods=["POST"])
+@use_read_replica
 def get_products():
     """
     Retrieve products based on specified filters.
 
+    The products are sorted by id, and served from the catalog snapshot when it
+    is available (see core/catalog_snapshot.py).
+
     Returns:
         JSON response containing the filtered products.
     """
@@ -142,18 +248,23 @@ def get_products():
         return bad_request(verr.messages)
 
     try:
+        category_id = category_registry.get(category) if category else None
+
+        products = catalog_snapshot.products(category_id, limit=limit, offset=offset)
+        if products is not None:
+            return success_response(data=products, status_code=200)
+
         query = (
             db.session.query(
                 Product, func.coalesce(func.min(Listing.price), None).label("min_price")
             )
             .outerjoin(Listing)
             .group_by(Product.id)
+            .order_by(Product.id)
         )
 
         if category:
-            query = query.join(ProductCategory).filter(
-                ProductCategory.title == category
-            )
+            query = query.filter(Product.category_id == category_id)
 
         products = query.limit(limit).offset(offset).all()
 
@@ -165,12 +276,13 @@ def get_products():
     except SQLAlchemyError as e:
         db.session.rollback()
         return handle_exception(error=str(e))
-    except Exception as e:
+    except Exception:
         db.session.rollback()
-        return internal_server_error(error=str(e))
+        return internal_server_error()
 
 
 @listings_bp.route("/products/<string:product_ulid>", methods=["POST"])
+@use_read_replica
 def get_product_listings_and_reviews(product_ulid):
     """
     Retrieve listings and reviews for a specific product.
@@ -195,18 +307,21 @@ def get_product_listings_and_reviews(product_ulid):
         view_count_order_by = data.get("view_count_order_by")
         purchase_count_order_by = data.get("purchase_count_order_by")
 
-        product = Product.query.filter_by(id=product_ulid).first()
+        product = db.session.execute(
+            product_details.select()
+            .select_from(Product)
+            .join(ProductCategory, Product.category_id == ProductCategory.id)
+            .where(Product.id == product_ulid)
+        ).first()
 
         if not product:
             return not_found(error="Product not found")
 
         query = (
-            Listing.query.join(Product)
-            .options(
-                joinedload(Listing.review).joinedload(ListingReview.customer),
-                joinedload(Listing.seller),
-            )
-            .filter(Product.id == product_ulid)
+            listing_offer.select()
+            .select_from(Listing)
+            .join(seller_user, Listing.seller_id == seller_user.id)
+            .where(Listing.product_id == product_ulid)
         )
 
         # Apply ordering based on the provided parameters
@@ -225,14 +340,22 @@ def get_product_listings_and_reviews(product_ulid):
                 )
 
         if product_state:
-            query = query.filter(Listing.product_state == ProductState(product_state))
-        if review_order_by:
-            if review_order_by == "asc":
-                query = query.join(Listing.review).order_by(ListingReview.rating.asc())
-            elif review_order_by == "desc":
-                query = query.join(Listing.review).order_by(ListingReview.rating.desc())
+            query = query.where(Listing.product_state == ProductState(product_state))
+        if review_order_by in ("asc", "desc"):
+            average_rating = (
+                select(func.avg(review_rating_value))
+                .where(ListingReview.listing_id == Listing.id)
+                .scalar_subquery()
+            )
+            query = query.order_by(
+                average_rating.asc().nulls_last()
+                if review_order_by == "asc"
+                else average_rating.desc().nulls_last()
+            )
+
+        listings = db.session.execute(query.limit(limit).offset(offset)).all()
 
-        listings = query.limit(limit).offset(offset).all()
+        reviews = listing_reviews_preview([listing.id for listing in listings])
 
         product_data = {
             "id": product.id,
@@ -240,7 +363,7 @@ def get_product_listings_and_reviews(product_ulid):
             "description": product.description,
             "image_src": product.image_src,
             "category": {
-                "name": product.category.title,
+                "name": product.category,
             },
             "listings": [
                 {
@@ -249,25 +372,11 @@ def get_product_listings_and_reviews(product_ulid):
                     "quantity": listing.quantity,
                     "is_available": listing.is_available,
                     "product_state": listing.product_state.value,
-                    "seller": {"id": listing.seller.id, "name": listing.seller.name},
-                    "reviews": [
-                        {
-                            "title": review.title,
-                            "description": review.description,
-                            "rating": review.rating.value,
-                            "created_at": review.created_at.isoformat(),
-                            "customer": {
-                                "id": review.customer.id,
-                                "name": review.customer.name,
-                            },
-                        }
-                        for review in listing.review
-                    ],
+                    "seller": {"id": listing.seller_id, "name": listing.seller_name},
+                    **reviews[listing.id],
                 }
                 for listing in listings
-            ]
-            if listings
-            else [],
+            ],
         }
 
         return success_response(data=product_data, status_code=200)
@@ -283,6 +392,7 @@ def get_product_listings_and_reviews(product_ulid):
 @listings_bp.route(
     "/products/<string:product_ulid>/<string:listing_ulid>", methods=["GET"]
 )
+@use_read_replica
 def get_listing(product_ulid, listing_ulid):
     """
     Retrieve details for a specific listing of a product.
@@ -295,26 +405,27 @@ def get_listing(product_ulid, listing_ulid):
         JSON response containing the listing details, including product information and reviews.
     """
     try:
-        listing = (
-            Listing.query.options(
-                joinedload(Listing.seller),
-                joinedload(Listing.review).joinedload(ListingReview.customer),
-            )
-            .filter_by(id=listing_ulid, product_id=product_ulid)
-            .first()
-        )
+        listing = db.session.execute(
+            listing_offer.select()
+            .select_from(Listing)
+            .join(seller_user, Listing.seller_id == seller_user.id)
+            .where(Listing.id == listing_ulid, Listing.product_id == product_ulid)
+        ).first()
 
         if not listing:
-            return not_found(message="Listing not found")
+            return not_found("Listing not found")
 
-        product = (
-            Product.query.options(joinedload(Product.category))
-            .filter_by(id=product_ulid)
-            .first()
-        )
+        product = db.session.execute(
+            product_details.select()
+            .select_from(Product)
+            .join(ProductCategory, Product.category_id == ProductCategory.id)
+            .where(Product.id == product_ulid)
+        ).first()
 
         if not product:
-            return not_found(message="Product not found")
+            return not_found("Product not found")
+
+        view_counter.record(listing.id)
 
         listing_data = {
             "id": listing.id,
@@ -324,25 +435,15 @@ def get_listing(product_ulid, listing_ulid):
             "product_state": listing.product_state.value,
             "purchase_count": listing.purchase_count,
             "view_count": listing.view_count,
-            "seller": {"name": listing.seller.name},
+            "seller": {"name": listing.seller_name},
             "product": {
                 "id": product.id,
                 "name": product.name,
                 "description": product.description,
                 "image_src": product.image_src,
-                "category": product.category.title,
+                "category": product.category,
             },
-            "reviews": [
-                {
-                    "id": review.id,
-                    "title": review.title,
-                    "description": review.description,
-                    "rating": review.rating.value,
-                    "created_at": review.created_at.isoformat(),
-                    "customer": {"name": review.customer.name},
-                }
-                for review in listing.review
-            ],
+            **listing_reviews_preview([listing.id])[listing.id],
         }
 
         return success_response(data=listing_data, status_code=200)
@@ -353,7 +454,113 @@ def get_listing(product_ulid, listing_ulid):
         return handle_exception(str(e))
 
 
+@listings_bp.route("/listings/ranking", methods=["POST"])
+@use_read_replica
+def get_ranked_listings():
+    """
+    Retrieve the popular or trending listings, overall or of a category.
+
+    The rankings are precomputed by a scheduled job and served from memory
+    (see core/rankings.py).
+
+    Returns:
+        JSON response containing the ranked listings, best first.
+    """
+    try:
+        query_params = validate_ranking_filters.load(request.get_json())
+    except ValidationError as verr:
+        return bad_request(verr.messages)
+
+    try:
+        listings = listing_rankings.top(
+            query_params.get("ranking"),
+            category=query_params.get("category"),
+            limit=query_params.get("limit"),
+        )
+    except SQLAlchemyError as sql_err:
+        return handle_exception(str(sql_err))
+
+    return success_response(
+        data={
+            "ranking": query_params.get("ranking"),
+            "computed_at": listing_rankings.computed_at,
+            "listings": listings,
+        },
+        status_code=200,
+    )
+
+
+@listings_bp.route("/listings/search", methods=["POST"])
+@use_read_replica
+def search_listings_with_facets():
+    """
+    Search the listings by category, product state, price range, minimum
+    seller rating and availability.
+
+    The response includes, for every facet, the number of listings of each of
+    its values given the other filters (see core/facets.py). The counts are
+    recomputed every FACETS_RECOMPUTE_INTERVAL seconds.
+
+    Returns:
+        JSON response containing the matching listings sorted by price, their
+        total number and the facets.
+    """
+    try:
+        query_params = validate_search_filters.load(request.get_json())
+    except ValidationError as verr:
+        return bad_request(verr.messages)
+
+    category = query_params.get("category")
+    active = active_filters(
+        query_params, category_registry.get(category) if category else None
+    )
+
+    try:
+        listings = search_listings(
+            active,
+            order_by=query_params.get("price_order_by"),
+            limit=query_params.get("limit"),
+            offset=query_params.get("offset"),
+        )
+        total, facets = facet_counts(active)
+    except SQLAlchemyError as sql_err:
+        db.session.rollback()
+        return handle_exception(error=str(sql_err))
+
+    return success_response(
+        data={
+            "total": total,
+            "listings": [
+                {
+                    "id": listing.id,
+                    "price": float(listing.price),
+                    "quantity": listing.quantity,
+                    "is_available": listing.is_available,
+                    "product_state": listing.product_state.value,
+                    "seller": {
+                        "id": listing.seller_id,
+                        "company_name": listing.seller_company_name,
+                        "rating": float(listing.seller_rating)
+                        if listing.seller_rating is not None
+                        else None,
+                    },
+                    "product": {
+                        "id": listing.product_id,
+                        "name": listing.product_name,
+                        "image_src": listing.product_image_src,
+                        "category": listing.product_category,
+                    },
+                }
+                for listing in listings
+            ],
+            "facets": facets,
+        },
+        status_code=200,
+    )
+
+
 @listings_bp.route("/products/<string:seller_ulid>", methods=["GET"])
+@use_read_replica
 def get_seller_listings(seller_ulid):
     """
     Retrieve all listings for a specific seller.
@@ -365,16 +572,20 @@ def get_seller_listings(seller_ulid):
         JSON response containing all listings for the specified seller.
     """
     try:
-        seller = Seller.query.filter_by(id=seller_ulid).first()
+        seller_name = db.session.scalar(
+            select(Seller.name).where(Seller.id == seller_ulid)
+        )
 
-        if not seller:
-            return not_found(message="Seller not found")
+        if seller_name is None:
+            return not_found("Seller not found")
 
-        listings = (
-            Listing.query.filter_by(seller_id=seller_ulid)
-            .options(joinedload(Listing.product))
-            .all()
-        )
+        listings = db.session.execute(
+            seller_listing.select()
+            .select_from(Listing)
+            .join(Product, Listing.product_id == Product.id)
+            .join(ProductCategory, Product.category_id == ProductCategory.id)
+            .where(Listing.seller_id == seller_ulid)
+        ).all()
 
         response = [
             {
@@ -385,13 +596,13 @@ def get_seller_listings(seller_ulid):
                 "product_state": listing.product_state.value,
                 "purchase_count": listing.purchase_count,
                 "view_count": listing.view_count,
-                "seller": {"name": listing.seller.name},
+                "seller": {"name": seller_name},
                 "product": {
-                    "id": listing.product.id,
-                    "name": listing.product.name,
-                    "description": listing.product.description,
-                    "image_src": listing.product.image_src,
-                    "category": listing.product.category.title,
+                    "id": listing.product_id,
+                    "name": listing.product_name,
+                    "description": listing.product_description,
+                    "image_src": listing.product_image_src,
+                    "category": listing.product_category,
                 },
             }
             for listing in listings
@@ -408,6 +619,7 @@ def get_seller_listings(seller_ulid):
 
 
 @listings_bp.route("/products/<string:seller_ulid>/reviews", methods=["GET"])
+@use_read_replica
 def get_seller_reviews(seller_ulid):
     """
     Retrieve all reviews for a specific seller's listings.
@@ -419,20 +631,20 @@ def get_seller_reviews(seller_ulid):
         JSON response containing all reviews for the specified seller's listings.
     """
     try:
-        seller = Seller.query.filter_by(id=seller_ulid).first()
+        seller_exists = db.session.scalar(
+            select(Seller.id).where(Seller.id == seller_ulid)
+        )
 
-        if not seller:
-            return not_found(message="Seller not found")
+        if seller_exists is None:
+            return not_found("Seller not found")
 
-        reviews = (
-            ListingReview.query.join(Listing)
-            .join(Customer)
-            .filter(Listing.seller_id == seller_ulid)
-            .options(
-                joinedload(ListingReview.customer), joinedload(ListingReview.listing)
-            )
-            .all()
-        )
+        reviews = db.session.execute(
+            listing_review.select()
+            .select_from(ListingReview)
+            .join(Listing, ListingReview.listing_id == Listing.id)
+            .join(customer_user, ListingReview.customer_id == customer_user.id)
+            .where(Listing.seller_id == seller_ulid)
+        ).all()
 
         response = [
             {
@@ -442,8 +654,8 @@ def get_seller_reviews(seller_ulid):
                 "rating": review.rating.value,
                 "created_at": review.created_at.isoformat(),
                 "modified_at": review.modified_at.isoformat(),
-                "customer": {"name": review.customer.name},
-                "listing": {"id": review.listing.id},
+                "customer": {"name": review.customer_name},
+                "listing": {"id": review.listing_id},
             }
             for review in reviews
         ]
@@ -468,8 +680,13 @@ def get_seller_reviews(seller_ulid):
 # - Retrieve product listings and reviews
 # - Get details for specific listings
 # - Fetch listings and reviews for specific sellers
+# - Serve the precomputed popular and trending listings from memory
 
 # Note: This module uses SQLAlchemy for database operations and Marshmallow for request validation.
+# The product page and seller routes select only the columns they return through the
+# projections defined in core/projections.py.
+# Product pages embed only the latest reviews of each listing, with a rating summary and
+# a cursor to page through the rest with the listing reviews endpoint.
 
 # Error handling:
 # - ValidationErrors are caught and returned as bad requests
@@ -1,4 +1,4 @@
-from flask import Blueprint, request
+from flask import Blueprint, current_app, request
 from flask_jwt_extended import get_jwt_identity
 from marshmallow import ValidationError
 from sqlalchemy import case, func
@@ -6,21 +6,39 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from core import db
 from core.blueprints.errors.handlers import bad_request, handle_exception, not_found
-from core.blueprints.utils import required_user_type, success_response
+from core.blueprints.utils import (
+    required_user_type,
+    success_response,
+    use_read_replica,
+)
+from core.catalog_snapshot import touch_product
+from core.category_tree import add_category_counts
+from core.exports import export_response
+from core.listing_import import read_import_rows, start_listing_import
 from core.models import (
     Listing,
+    ListingImport,
     ListingReview,
     Product,
     ProductCategory,
     ProductState,
     ReviewRate,
 )
-from core.validators.seller.seller_listing import AddListingSchema, EditListingSchema
+from core.projections import seller_listing
+from core.serializers import listing_import_serializer, listing_serializer
+from core.validators.seller.seller_listing import (
+    AddListingSchema,
+    EditListingSchema,
+    ListingsExportSchema,
+    ListingsImportSchema,
+)
 
 seller_listings_bp = Blueprint("seller_listings", __name__)
 
 validate_add_listing = AddListingSchema()
 validate_edited_listing = EditListingSchema()
+validate_listings_export = ListingsExportSchema()
+validate_listings_import = ListingsImportSchema()
 
 
 def listings_summary(entries):
@@ -61,6 +79,7 @@ def listings_summary(entries):
 
 @seller_listings_bp.route("/seller/listings", methods=["GET"])
 @required_user_type(["seller"])
+@use_read_replica
 def listings():
     """
     Retrieve all listings for the authenticated seller.
@@ -131,6 +150,116 @@ def listings():
         )
 
 
+@seller_listings_bp.route("/seller/listings/export", methods=["GET"])
+@required_user_type(["seller"])
+@use_read_replica
+def export_listings():
+    """
+    Export all the listings of the authenticated seller.
+
+    The listings are streamed as NDJSON or CSV (?format=), sorted by id, with
+    their product and its category.
+
+    Returns:
+        A streamed response with one line per listing.
+    """
+    try:
+        data = validate_listings_export.load(request.args)
+    except ValidationError as verr:
+        return bad_request(error=verr.messages)
+
+    query = (
+        seller_listing.select()
+        .select_from(Listing)
+        .join(Product, Listing.product_id == Product.id)
+        .join(ProductCategory, Product.category_id == ProductCategory.id)
+        .where(Listing.seller_id == get_jwt_identity())
+        .order_by(Listing.id)
+    )
+    return export_response(query, data["format"], "listings")
+
+
+@seller_listings_bp.route("/seller/listings/import", methods=["POST"])
+@required_user_type(["seller"])
+def import_listings():
+    """
+    Import listings in bulk for the authenticated seller.
+
+    The file is sent as the request body, or as the "file" field of a
+    multipart form, in NDJSON or CSV (?format=). Its rows are imported in
+    the background.
+
+    Returns:
+        JSON response (202) containing the import, whose progress is returned
+        by GET /seller/listings/imports/<id>.
+    """
+    try:
+        data = validate_listings_import.load(request.args)
+    except ValidationError as verr:
+        return bad_request(error=verr.messages)
+
+    max_rows = current_app.config["LISTING_IMPORT_MAX_ROWS"]
+    upload = request.files.get("file")
+    try:
+        rows = read_import_rows(
+            upload.stream if upload else request.stream, data["format"], max_rows + 1
+        )
+    except ValueError as e:
+        return bad_request(error=f"Invalid file: {e}")
+
+    if not rows:
+        return bad_request(error="The file has no rows")
+    if len(rows) > max_rows:
+        return bad_request(error=f"Too many rows: at most {max_rows} per file")
+
+    try:
+        listing_import = start_listing_import(get_jwt_identity(), rows)
+
+        return success_response(
+            data=listing_import_serializer.dump(listing_import),
+            status_code=202,
+        )
+    except SQLAlchemyError as sql_err:
+        db.session.rollback()
+        return handle_exception(
+            error=str(sql_err),
+        )
+    except Exception as e:
+        db.session.rollback()
+        return handle_exception(
+            error=str(e),
+        )
+
+
+@seller_listings_bp.route("/seller/listings/imports/<string:ulid>", methods=["GET"])
+@required_user_type(["seller"])
+def get_listing_import(ulid):
+    """
+    Get the progress of a listing import of the authenticated seller.
+
+    Args:
+        ulid (str): The ID of the import.
+
+    Returns:
+        JSON response containing the import, with the errors of the rejected rows.
+    """
+    try:
+        listing_import = ListingImport.query.filter_by(
+            id=ulid, seller_id=get_jwt_identity()
+        ).first()
+        if not listing_import:
+            return not_found(error="Import not found")
+
+        return success_response(
+            data=listing_import_serializer.dump(listing_import),
+            status_code=200,
+        )
+    except SQLAlchemyError as sql_err:
+        return handle_exception(
+            error=str(sql_err),
+        )
+
+
 @seller_listings_bp.route("/seller/listings", methods=["POST"])
 @required_user_type(["seller"])
 def create_listing():
@@ -159,14 +288,17 @@ def create_listing():
         if not product:
             return not_found(error="Product not found")
 
-        listing = Listing.create(
+        listing = Listing(
             quantity=quantity,
             is_available=is_available,
             price=price,
             product_state=ProductState(product_state),
             seller_id=seller_id,
             product_id=product_id,
-        )
+        ).save(commit=False)
+        add_category_counts(product.category_id, listings=1)
+        touch_product(product_id)
+        db.session.commit()
 
         return success_response(
             data={"id": listing.id},
@@ -187,6 +319,7 @@ def create_listing():
 
 @seller_listings_bp.route("/seller/listings/<string:ulid>", methods=["GET"])
 @required_user_type(["seller"])
+@use_read_replica
 def get_listing(ulid):
     """
     Retrieve a specific listing for the authenticated seller.
@@ -206,7 +339,7 @@ def get_listing(ulid):
             return not_found(error="Listing not found")
 
         return success_response(
-            data=listing.to_dict(),
+            data=listing_serializer.dump(listing),
             status_code=200,
         )
 
@@ -242,7 +375,10 @@ def delete_listing(ulid):
         if not listing:
             return not_found(error="Listing not found")
 
-        listing.delete()
+        listing.delete(commit=False)
+        add_category_counts(listing.product.category_id, listings=-1)
+        touch_product(listing.product_id)
+        db.session.commit()
 
         return success_response(
             status_code=200,
@@ -285,6 +421,9 @@ def edit_listing(ulid):
         if not listing:
             return not_found(error="Listing not found.")
 
+        if price != listing.price:
+            touch_product(listing.product_id)
+
         _listing = listing.update(
             quantity=quantity,
             is_available=is_available,
@@ -308,7 +447,10 @@ def edit_listing(ulid):
 
 # Key features:
 # - Retrieve all listings for a seller
+# - Export all listings of a seller, streamed in NDJSON or CSV (see core/exports.py)
 # - Create a new listing
+# - Import listings in bulk from a CSV or NDJSON file, in the background (see
+#   core/listing_import.py)
 # - Get details of a specific listing
 # - Delete a listing
 # - Edit a listing
@@ -327,4 +469,4 @@ def edit_listing(ulid):
 # Future improvements could include:
 # - Implementing pagination for the listings retrieval
 # - Adding more advanced filtering options for listings
-# - Implementing bulk operations (e.g., bulk create, update, or delete)
+# - Implementing bulk delete
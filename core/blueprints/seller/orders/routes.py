@@ -1,6 +1,9 @@
+from datetime import UTC, datetime, timedelta
+
 from flask import Blueprint, current_app, request
 from flask_jwt_extended import get_jwt_identity
 from marshmallow import ValidationError
+from sqlalchemy import exists, func, select, update
 from sqlalchemy.exc import SQLAlchemyError
 
 from core import db
@@ -9,10 +12,28 @@ from core.blueprints.utils import (
     required_user_type,
     send_order_cancellation_email,
     success_response,
+    use_read_replica,
+)
+from core.models import (
+    Customer,
+    Listing,
+    Order,
+    OrderEntry,
+    OrderStatus,
+    Product,
+    SellerDailySales,
+    SellerListingSales,
+    SellerOrderStatusCount,
+)
+from core.notifications import ORDER_CANCELLED, enqueue_order_notifications
+from core.seller_rollups import (
+    record_order_status_change,
+    record_orders_status_change,
 )
-from core.models import Customer, Listing, Order, OrderEntry, OrderStatus, Product
 from core.validators.seller.seller_orders import (
+    BulkUpdateOrderStatusSchema,
     OrderFilterSchema,
+    SellerAnalyticsSchema,
     UpdateOrderStatusSchema,
 )
 
@@ -20,6 +41,16 @@ seller_orders_bp = Blueprint("seller_orders", __name__)
 
 validate_order_filters = OrderFilterSchema()
 validate_update_status = UpdateOrderStatusSchema()
+validate_analytics_filters = SellerAnalyticsSchema()
+validate_bulk_update_status = BulkUpdateOrderStatusSchema()
+
+# Statuses an order can be moved to, by current status
+STATUS_TRANSITIONS = {
+    OrderStatus.PENDING: [OrderStatus.SHIPPED, OrderStatus.CANCELLED],
+    OrderStatus.SHIPPED: [OrderStatus.DELIVERED],
+    OrderStatus.DELIVERED: [],  # Final state, no further transitions
+    OrderStatus.CANCELLED: [],
+}
 
 
 @seller_orders_bp.route("/seller/orders", methods=["GET"])
@@ -219,18 +250,14 @@ def update_order_status(order_ulid):
             if config_name != "development":
                 send_order_cancellation_email(order.customer_id, order.id)
         else:
-            valid_transitions = {
-                OrderStatus.PENDING: [OrderStatus.SHIPPED],
-                OrderStatus.SHIPPED: [OrderStatus.DELIVERED],
-                OrderStatus.DELIVERED: [],  # Final state, no further transitions
-            }
-
-            if new_status not in valid_transitions[order.order_status]:
+            if new_status not in STATUS_TRANSITIONS[order.order_status]:
                 return bad_request(
                     error=f"Invalid status transition from {order.order_status.value} to {new_status.value}"
                 )
 
+        previous_status = order.order_status
         order.order_status = new_status
+        record_order_status_change(order, order.order_entries, previous_status)
         db.session.commit()
 
         return success_response(
@@ -247,12 +274,242 @@ def update_order_status(order_ulid):
         return handle_exception(error=str(e))
 
 
+@seller_orders_bp.route("/seller/orders/status", methods=["POST"])
+@required_user_type(["seller"])
+def bulk_update_order_status():
+    """
+    Move a batch of orders of the authenticated seller to a new status.
+
+    Each status can only be reached from a single one (see
+    STATUS_TRANSITIONS), so the whole batch is validated and updated by one
+    UPDATE that only matches the seller's orders in that status. For
+    cancellations, the entries of all the cancelled orders are restocked by
+    one UPDATE and the customer emails are queued in bulk. Orders that cannot
+    be moved are reported and left unchanged.
+
+    Returns:
+        JSON response listing the updated orders and the rejected ones.
+    """
+    seller_id = get_jwt_identity()
+    config_name = current_app.config["NAME"]
+
+    try:
+        validated_data = validate_bulk_update_status.load(request.get_json())
+    except ValidationError as err:
+        return bad_request(error=err.messages)
+
+    order_ids = validated_data["order_ids"]
+    new_status = OrderStatus(validated_data["status"])
+    previous_statuses = [
+        status
+        for status, targets in STATUS_TRANSITIONS.items()
+        if new_status in targets
+    ]
+
+    if not previous_statuses:
+        return bad_request(error=f"Orders cannot be moved to {new_status.value}")
+    (previous_status,) = previous_statuses
+
+    sold_by_seller = exists().where(
+        OrderEntry.order_id == Order.id,
+        OrderEntry.listing_id == Listing.id,
+        Listing.seller_id == seller_id,
+    )
+
+    try:
+        updated = db.session.execute(
+            update(Order)
+            .where(
+                Order.id.in_(order_ids),
+                Order.order_status == previous_status,
+                sold_by_seller,
+            )
+            .values(order_status=new_status)
+            .returning(Order.id, Order.customer_id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        updated_ids = [order.id for order in updated]
+        rejected_ids = sorted(set(order_ids) - set(updated_ids), key=order_ids.index)
+
+        if new_status == OrderStatus.CANCELLED and updated_ids:
+            # Restore inventory for cancelled orders
+            restock = (
+                select(
+                    OrderEntry.listing_id,
+                    func.sum(OrderEntry.quantity).label("quantity"),
+                )
+                .where(OrderEntry.order_id.in_(updated_ids))
+                .group_by(OrderEntry.listing_id)
+                .subquery()
+            )
+            db.session.execute(
+                update(Listing)
+                .where(Listing.id == restock.c.listing_id)
+                .values(
+                    quantity=Listing.quantity + restock.c.quantity,
+                    purchase_count=Listing.purchase_count - restock.c.quantity,
+                )
+                .execution_options(synchronize_session=False)
+            )
+
+            if config_name != "development":
+                enqueue_order_notifications(
+                    ORDER_CANCELLED,
+                    [(order.id, order.customer_id) for order in updated],
+                )
+
+        record_orders_status_change(updated_ids, previous_status, new_status)
+
+        current_statuses = {}
+        if rejected_ids:
+            current_statuses = dict(
+                db.session.execute(
+                    select(Order.id, Order.order_status).where(
+                        Order.id.in_(rejected_ids), sold_by_seller
+                    )
+                ).all()
+            )
+
+        db.session.commit()
+    except SQLAlchemyError as sql_err:
+        db.session.rollback()
+        return handle_exception(error=str(sql_err))
+    except Exception as e:
+        db.session.rollback()
+        return handle_exception(error=str(e))
+
+    rejected = [
+        {
+            "order_id": order_id,
+            "error": (
+                f"Invalid status transition from {current_statuses[order_id].value} "
+                f"to {new_status.value}"
+                if order_id in current_statuses
+                else "Order not found or does not belong to this seller"
+            ),
+        }
+        for order_id in rejected_ids
+    ]
+
+    return success_response(
+        data={
+            "new_status": new_status.value,
+            "updated": updated_ids,
+            "rejected": rejected,
+        },
+        message="Order statuses updated",
+        status_code=200,
+    )
+
+
+@seller_orders_bp.route("/seller/analytics", methods=["GET"])
+@required_user_type(["seller"])
+@use_read_replica
+def get_analytics():
+    """
+    Retrieve the sales analytics of the authenticated seller.
+
+    The figures are read from the rollup tables maintained as orders are
+    placed and change status (see core/seller_rollups.py), not computed
+    from the orders.
+
+    Returns:
+        JSON response containing the revenue per day over the last `days`
+        days, the best selling listings and the number of orders per status.
+    """
+    seller_id = get_jwt_identity()
+
+    try:
+        filters = validate_analytics_filters.load(request.args)
+    except ValidationError as err:
+        return bad_request(error=err.messages)
+
+    first_day = datetime.now(UTC).date() - timedelta(days=filters["days"] - 1)
+
+    try:
+        daily_sales = db.session.execute(
+            select(
+                SellerDailySales.day,
+                SellerDailySales.orders,
+                SellerDailySales.units,
+                SellerDailySales.revenue,
+            )
+            .where(
+                SellerDailySales.seller_id == seller_id,
+                SellerDailySales.day >= first_day,
+            )
+            .order_by(SellerDailySales.day)
+        ).all()
+
+        listing_sales = db.session.execute(
+            select(
+                SellerListingSales.listing_id,
+                Product.name.label("product_name"),
+                SellerListingSales.units,
+                SellerListingSales.revenue,
+            )
+            .join(Listing, SellerListingSales.listing_id == Listing.id)
+            .join(Product, Listing.product_id == Product.id)
+            .where(SellerListingSales.seller_id == seller_id)
+            .order_by(SellerListingSales.units.desc(), SellerListingSales.listing_id)
+            .limit(filters["top_listings"])
+        ).all()
+
+        status_counts = db.session.execute(
+            select(
+                SellerOrderStatusCount.order_status, SellerOrderStatusCount.orders
+            ).where(SellerOrderStatusCount.seller_id == seller_id)
+        ).all()
+    except SQLAlchemyError as sql_err:
+        db.session.rollback()
+        return handle_exception(error=str(sql_err))
+
+    revenue_per_day = [
+        {
+            "day": sales.day.isoformat(),
+            "orders": sales.orders,
+            "units": sales.units,
+            "revenue": float(sales.revenue),
+        }
+        for sales in daily_sales
+    ]
+
+    status_breakdown = {status.value: 0 for status in OrderStatus}
+    for count in status_counts:
+        status_breakdown[count.order_status.value] = count.orders
+
+    return success_response(
+        data={
+            "period": {"from": first_day.isoformat(), "days": filters["days"]},
+            "totals": {
+                "orders": sum(sales["orders"] for sales in revenue_per_day),
+                "units": sum(sales["units"] for sales in revenue_per_day),
+                "revenue": float(sum(sales.revenue for sales in daily_sales)),
+            },
+            "revenue_per_day": revenue_per_day,
+            "units_per_listing": [
+                {
+                    "listing_id": sales.listing_id,
+                    "product_name": sales.product_name,
+                    "units": sales.units,
+                    "revenue": float(sales.revenue),
+                }
+                for sales in listing_sales
+            ],
+            "status_breakdown": status_breakdown,
+        },
+        status_code=200,
+    )
+
+
 # This module defines the routes for handling seller order operations.
 
 # Key features:
 # - Retrieve orders for a seller with filtering and pagination
 # - Get details of a specific order
-# - Update the status of an order
+# - Update the status of an order, or of a batch of orders in a few set-based statements
+# - Sales analytics (revenue per day, units per listing, orders per status) read from
+#   the rollups in core/seller_rollups.py, which order changes keep up to date
 
 # Security considerations:
 # - All routes are protected by the @required_user_type decorator, ensuring only sellers can access them
@@ -267,5 +524,4 @@ def update_order_status(order_ulid):
 
 # Future improvements could include:
 # - Implementing more advanced filtering options for orders
-# - Adding support for bulk order status updates
 # - Implementing a notification system for status changes (e.g., email notifications to customers)
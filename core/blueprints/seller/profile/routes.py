@@ -12,6 +12,7 @@ from core.blueprints.errors.handlers import (
 )
 from core.blueprints.utils import required_user_type, success_response
 from core.models import DeleteRequest, Seller, User
+from core.serializers import seller_profile_serializer
 from core.validators.user_profile import DeleteProfileSchema, EditSellerProfileSchema
 
 seller_profile_bp = Blueprint("seller_profile", __name__)
@@ -35,17 +36,7 @@ def get_profile():
         seller = Seller.query.filter_by(id=seller_id).first()
 
         return success_response(
-            data=seller.to_dict(
-                only=(
-                    "email",
-                    "name",
-                    "surname",
-                    "birth_date",
-                    "phone_number",
-                    "profile_img",
-                    "company_name",
-                )
-            ),
+            data=seller_profile_serializer.dump(seller),
             status_code=200,
         )
 
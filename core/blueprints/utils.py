@@ -2,7 +2,7 @@ import re
 from functools import wraps
 from typing import Any, List, Optional
 
-from flask import current_app, jsonify, render_template, url_for
+from flask import current_app, g, jsonify, render_template, url_for
 from flask_jwt_extended import get_jwt, jwt_required, verify_jwt_in_request
 from flask_mail import Message
 
@@ -44,6 +44,29 @@ def required_user_type(types: List[str]):
     return decorator
 
 
+def use_read_replica(func):
+    """
+    Decorator marking a read-only route whose queries may be served by a read replica.
+
+    Writes issued by the route still go to the primary. When combined with
+    @required_user_type, it must be applied below it so that the JWT identity
+    is available for read-your-writes stickiness.
+
+    Args:
+        func (function): The route function.
+
+    Returns:
+        function: Decorated function that enables replica reads.
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        g.db_read_only = True
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
 def success_response(
     message: Optional[str] = None, data: Any = None, status_code: int = 200
 ):
@@ -193,6 +216,7 @@ def send_order_cancellation_email(user: User, order_id: str):
 
 # Key features:
 # - User type-based access control decorator
+# - Read replica routing decorator for read-only routes
 # - Standardized success response function
 # - Email sending utilities for various application events (account verification, password reset, order confirmation/cancellation)
 # - RFC 5322 compliant email validation pattern
@@ -0,0 +1,229 @@
+import mmap
+import os
+import struct
+import tempfile
+from decimal import Decimal
+
+MAGIC = b"CATS"
+VERSION = 1
+
+# magic, version, number of categories, number of products, offsets of the
+# products, of the category index and of the string table
+HEADER = struct.Struct("<4sIIIQQQ")
+# id, title (offset and length in the string table), first position and
+# number of its products in the category index
+CATEGORY = struct.Struct("<26sIIII")
+# id, category position, minimum price in cents (-1 without listings),
+# name, description and image_src (offset and length in the string table)
+PRODUCT = struct.Struct("<26sIqIIIIII")
+# Position of a product, in the category index
+POSITION = struct.Struct("<I")
+
+NO_PRICE = -1
+
+
+def write_catalog_file(path: str, categories: list, products: list):
+    """
+    Write a catalog file, replacing the previous one atomically.
+
+    The file is written next to path, then renamed over it: the processes
+    reading the previous file keep their mapping of it, and the new one is
+    seen by the next open.
+
+    Args:
+        path (str): The path of the catalog file.
+        categories (list): The (id, title) of every category, in display order.
+        products (list): The products (ProductRecord), sorted by id. Those of
+            a category missing from categories (created after they were read)
+            are left out.
+    """
+    strings = bytearray()
+
+    def add_string(value):
+        encoded = (value or "").encode()
+        offset = len(strings)
+        strings.extend(encoded)
+        return offset, len(encoded)
+
+    category_positions = {id_: position for position, (id_, _) in enumerate(categories)}
+    index = [[] for _ in categories]
+    product_records = bytearray()
+    for product in products:
+        category_position = category_positions.get(product.category_id)
+        if category_position is None:
+            continue
+        index[category_position].append(len(product_records) // PRODUCT.size)
+        min_price = (
+            NO_PRICE if product.min_price is None else int(product.min_price * 100)
+        )
+        product_records += PRODUCT.pack(
+            product.id.encode(),
+            category_position,
+            min_price,
+            *add_string(product.name),
+            *add_string(product.description),
+            *add_string(product.image_src),
+        )
+
+    category_records = bytearray()
+    index_records = bytearray()
+    start = 0
+    for (id_, title), positions in zip(categories, index):
+        category_records += CATEGORY.pack(
+            id_.encode(), *add_string(title), start, len(positions)
+        )
+        for position in positions:
+            index_records += POSITION.pack(position)
+        start += len(positions)
+
+    products_offset = HEADER.size + len(category_records)
+    index_offset = products_offset + len(product_records)
+    strings_offset = index_offset + len(index_records)
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        len(categories),
+        len(product_records) // PRODUCT.size,
+        products_offset,
+        index_offset,
+        strings_offset,
+    )
+
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, temporary_path = tempfile.mkstemp(dir=directory, prefix=f".{name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for part in (header, category_records, product_records, index_records):
+                f.write(part)
+            f.write(strings)
+        os.chmod(temporary_path, 0o644)
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+
+
+class CatalogFile:
+    """
+    Read-only mapping of a catalog file.
+
+    The records are decoded from the mapping when a page is requested, so the
+    file is shared between all the processes mapping it (in the page cache)
+    instead of being copied in each of them.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.identity = (stat.st_ino, stat.st_mtime_ns)
+
+        (
+            magic,
+            version,
+            self._category_count,
+            self.product_count,
+            self._products_offset,
+            self._index_offset,
+            self._strings_offset,
+        ) = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a catalog file (version {VERSION})")
+
+        # The categories are few: decode them once
+        self._categories = []
+        self._category_positions = {}
+        for position in range(self._category_count):
+            id_, title_offset, title_length, start, count = CATEGORY.unpack_from(
+                self._mmap, HEADER.size + position * CATEGORY.size
+            )
+            id_ = id_.decode()
+            self._categories.append(
+                (id_, self._string(title_offset, title_length), start, count)
+            )
+            self._category_positions[id_] = position
+
+    def categories(self) -> list:
+        """
+        Get all the categories.
+
+        Returns:
+            list: The categories, with their id and title.
+        """
+        return [{"id": id_, "title": title} for id_, title, _, _ in self._categories]
+
+    def products(self, category_id: str = None, limit: int = 10, offset: int = 0):
+        """
+        Get a page of products, sorted by id.
+
+        Args:
+            category_id (str): The id of a category, or None for all products.
+            limit (int): The maximum number of products.
+            offset (int): The number of products to skip.
+
+        Returns:
+            list: The products.
+        """
+        if category_id is None:
+            positions = range(offset, min(offset + limit, self.product_count))
+        else:
+            category = self._category_positions.get(category_id)
+            if category is None:
+                return []
+            _, _, start, count = self._categories[category]
+            if offset >= count:
+                return []
+            count = min(limit, count - offset)
+            positions = struct.unpack_from(
+                f"<{count}I", self._mmap, self._index_offset + (start + offset) * 4
+            )
+
+        return [self._product(position) for position in positions]
+
+    def _product(self, position) -> dict:
+        (
+            id_,
+            category,
+            min_price,
+            name_offset,
+            name_length,
+            description_offset,
+            description_length,
+            image_offset,
+            image_length,
+        ) = PRODUCT.unpack_from(
+            self._mmap, self._products_offset + position * PRODUCT.size
+        )
+        return {
+            "id": id_.decode(),
+            "name": self._string(name_offset, name_length),
+            "description": self._string(description_offset, description_length),
+            "image_src": self._string(image_offset, image_length),
+            "category": self._categories[category][1],
+            "min_price": None
+            if min_price == NO_PRICE
+            else Decimal(min_price).scaleb(-2),
+        }
+
+    def _string(self, offset, length) -> str:
+        start = self._strings_offset + offset
+        return self._mmap[start : start + length].decode()
+
+
+# This module defines the catalog file shared by the processes of a node
+# (see CATALOG_SNAPSHOT_FILE in core/catalog_snapshot.py).
+
+# Layout (little-endian):
+#   header     HEADER
+#   categories CATEGORY records, in display order (by title)
+#   products   PRODUCT records, sorted by id; the category of a product is the
+#              position of its CATEGORY record
+#   index      the positions (u32) of the products of each category, sorted
+#              by id: the products of a category are index[start:start+count]
+#   strings    the UTF-8 text of the titles, names, descriptions and images
+# Every record is fixed-width, so the record of a product is found from its
+# position and a page is read without scanning the file. Prices are stored
+# in cents, as listings.price has two decimals.
+
+# A file is never modified: write_catalog_file writes a new one and renames it
+# over the previous one, so a reader always maps a complete file.
@@ -0,0 +1,426 @@
+import fcntl
+import os
+import threading
+from bisect import bisect_left, insort
+from contextlib import suppress
+from datetime import timedelta
+from sys import intern
+from time import monotonic
+
+from flask import current_app
+from sqlalchemy import func, select, update
+
+from .catalog_file import CatalogFile, write_catalog_file
+from .extensions import db
+from .models import Listing, Product, ProductCategory
+
+# Changes are reread this far behind the watermark, so that the products
+# updated by a transaction committed after a refresh are not missed
+WATERMARK_OVERLAP = timedelta(seconds=60)
+
+
+class ProductRecord:
+    """A product of the catalog snapshot, with the minimum price of its listings."""
+
+    __slots__ = ("id", "name", "description", "image_src", "category_id", "min_price")
+
+    def __init__(self, row):
+        self.id = row.id
+        self.name = row.name
+        self.description = row.description
+        self.image_src = row.image_src
+        # Category ids are shared by many products: store each string once
+        self.category_id = intern(row.category_id)
+        self.min_price = row.min_price
+
+    def __eq__(self, other):
+        if not isinstance(other, ProductRecord):
+            return NotImplemented
+        return all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+
+def touch_product(product_id: str):
+    """
+    Mark a product as changed, so that the catalog snapshots reload it.
+
+    Must be called in the transaction creating, deleting or repricing one of
+    its listings, as they change its minimum price.
+
+    Args:
+        product_id (str): The id of the product.
+    """
+    touch_products([product_id])
+
+
+def touch_products(product_ids: list):
+    """
+    Mark several products as changed, with a single UPDATE (see touch_product).
+
+    Args:
+        product_ids (list): The ids of the products.
+    """
+    db.session.execute(
+        update(Product)
+        .where(Product.id.in_(product_ids))
+        .values(updated_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+
+
+class CatalogSnapshot:
+    """
+    In-process copy of the catalog: the categories, and the products with the
+    minimum price of their listings.
+
+    The snapshot is loaded on first use, then updated every
+    CATALOG_SNAPSHOT_REFRESH_INTERVAL seconds with the products changed since
+    the last update (products.updated_at), and rebuilt from scratch every
+    CATALOG_SNAPSHOT_REBUILD_INTERVAL seconds. A catalog of more than
+    CATALOG_SNAPSHOT_MAX_PRODUCTS products is not kept in memory: the
+    snapshot is then unavailable, and the routes query the database.
+
+    With CATALOG_SNAPSHOT_FILE set, the snapshot is held by a single process
+    per node, which writes it to that file; every process maps the file
+    instead of holding its own copy (see write_file).
+    """
+
+    def __init__(self, app=None):
+        self.refresh_interval = 0
+        self.rebuild_interval = 0
+        self.max_products = 0
+        self.path = None
+        self._products = None
+        self._ids = []
+        self._ids_by_category = {}
+        self._categories = []
+        self._titles = {}
+        self._watermark = None
+        self._checked_at = None
+        self._rebuilt_at = None
+        self._file = None
+        self._file_checked_at = None
+        self._builder_lock = None
+        self._mutex = threading.Lock()
+        self._refresh_mutex = threading.Lock()
+        self._file_mutex = threading.Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Read the snapshot configuration.
+
+        Args:
+            app (Flask): The Flask application instance.
+        """
+        self.refresh_interval = app.config["CATALOG_SNAPSHOT_REFRESH_INTERVAL"]
+        self.rebuild_interval = app.config["CATALOG_SNAPSHOT_REBUILD_INTERVAL"]
+        self.max_products = app.config["CATALOG_SNAPSHOT_MAX_PRODUCTS"]
+        self.path = app.config["CATALOG_SNAPSHOT_FILE"] or None
+
+    def products(self, category_id: str = None, limit: int = 10, offset: int = 0):
+        """
+        Get a page of products, sorted by id.
+
+        Must be called within an application context, as the snapshot is
+        updated first if needed.
+
+        Args:
+            category_id (str): The id of a category, or None for all products.
+            limit (int): The maximum number of products.
+            offset (int): The number of products to skip.
+
+        Returns:
+            list | None: The products, or None if the snapshot is unavailable.
+        """
+        if self.path:
+            catalog = self._catalog_file()
+            return (
+                None
+                if catalog is None
+                else catalog.products(category_id, limit, offset)
+            )
+
+        self.refresh_if_stale()
+
+        with self._mutex:
+            if self._products is None:
+                return None
+
+            ids = (
+                self._ids
+                if category_id is None
+                else self._ids_by_category.get(category_id, [])
+            )
+            return [
+                {
+                    "id": record.id,
+                    "name": record.name,
+                    "description": record.description,
+                    "image_src": record.image_src,
+                    "category": self._titles.get(record.category_id),
+                    "min_price": record.min_price,
+                }
+                for record in map(self._products.get, ids[offset : offset + limit])
+            ]
+
+    def categories(self):
+        """
+        Get all the categories.
+
+        Returns:
+            list | None: The categories, or None if the snapshot is unavailable.
+        """
+        if self.path:
+            catalog = self._catalog_file()
+            return None if catalog is None else catalog.categories()
+
+        self.refresh_if_stale()
+
+        with self._mutex:
+            if self._products is None:
+                return None
+            return [{"id": id_, "title": title} for id_, title in self._categories]
+
+    def refresh_if_stale(self):
+        """
+        Update the snapshot if it has not been checked for refresh_interval.
+
+        The update runs in a single thread: the others keep serving the
+        current snapshot meanwhile.
+        """
+        now = monotonic()
+        if (
+            self._checked_at is not None
+            and now - self._checked_at < self.refresh_interval
+        ):
+            return
+
+        # Wait only for the first load, when there is nothing to serve yet
+        if not self._refresh_mutex.acquire(blocking=self._checked_at is None):
+            return
+        try:
+            if self._checked_at is not None and (
+                now - self._checked_at < self.refresh_interval
+            ):
+                return
+
+            self._update(now)
+            self._checked_at = now
+        finally:
+            self._refresh_mutex.release()
+
+    def write_file(self):
+        """
+        Update the snapshot and write it to the shared catalog file.
+
+        Called every CATALOG_SNAPSHOT_REFRESH_INTERVAL seconds in every process
+        by the catalog_snapshot_write job. Only the process holding the builder
+        lock of the node (an exclusive flock on the file path + ".lock") builds
+        the snapshot; it rewrites the file when the catalog changed. The lock
+        is released when the process exits, and taken over by the next process
+        running the job.
+        """
+        if not self.path or not self._lock_builder():
+            return
+
+        now = monotonic()
+        with self._refresh_mutex:
+            changed = self._update(now)
+            self._checked_at = now
+
+        if self._products is None:
+            # Too many products: the processes fall back to the database
+            with suppress(FileNotFoundError):
+                os.unlink(self.path)
+        elif changed or not os.path.exists(self.path):
+            with self._mutex:
+                categories = list(self._categories)
+                products = [self._products[id_] for id_ in self._ids]
+            write_catalog_file(self.path, categories, products)
+
+    def _lock_builder(self) -> bool:
+        if self._builder_lock is None:
+            lock = open(f"{self.path}.lock", "a")
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock.close()
+                return False
+            self._builder_lock = lock
+        return True
+
+    def _catalog_file(self):
+        """Get the mapping of the catalog file, remapped if the file was replaced."""
+        now = monotonic()
+        if (
+            self._file_checked_at is not None
+            and now - self._file_checked_at < self.refresh_interval
+        ):
+            return self._file
+
+        # Wait only for the first check, the others serve the current mapping
+        if not self._file_mutex.acquire(blocking=self._file_checked_at is None):
+            return self._file
+        try:
+            try:
+                stat = os.stat(self.path)
+                if self._file is None or self._file.identity != (
+                    stat.st_ino,
+                    stat.st_mtime_ns,
+                ):
+                    # The previous mapping is unmapped once the requests
+                    # reading it are done with it
+                    self._file = CatalogFile(self.path)
+            except FileNotFoundError:
+                self._file = None
+            except (OSError, ValueError):
+                current_app.logger.exception(f"cannot map {self.path}")
+                self._file = None
+            self._file_checked_at = now
+            return self._file
+        finally:
+            self._file_mutex.release()
+
+    def _update(self, now) -> bool:
+        if self._rebuilt_at is None or now - self._rebuilt_at >= self.rebuild_interval:
+            self._rebuild()
+            self._rebuilt_at = now
+            return True
+        if self._products is not None:
+            return self._apply_changes()
+        return False
+
+    def _select_products(self):
+        min_price = (
+            select(func.min(Listing.price))
+            .where(Listing.product_id == Product.id)
+            .scalar_subquery()
+        )
+        return select(
+            Product.id,
+            Product.name,
+            Product.description,
+            Product.image_src,
+            Product.category_id,
+            Product.updated_at,
+            min_price.label("min_price"),
+        )
+
+    def _select_categories(self):
+        return (
+            db.session.execute(
+                select(ProductCategory.id, ProductCategory.title).order_by(
+                    ProductCategory.title
+                )
+            )
+            .tuples()
+            .all()
+        )
+
+    def _rebuild(self):
+        if db.session.scalar(select(func.count()).select_from(Product)) > (
+            self.max_products
+        ):
+            with self._mutex:
+                self._products = None
+                self._ids, self._ids_by_category = [], {}
+            return
+
+        categories = self._select_categories()
+        products = {}
+        ids_by_category = {}
+        watermark = None
+        for row in db.session.execute(self._select_products()):
+            products[row.id] = ProductRecord(row)
+            ids_by_category.setdefault(row.category_id, []).append(row.id)
+            watermark = max(watermark or row.updated_at, row.updated_at)
+
+        with self._mutex:
+            self._products = products
+            self._ids = sorted(products)
+            self._ids_by_category = {
+                category_id: sorted(ids) for category_id, ids in ids_by_category.items()
+            }
+            self._categories, self._titles = categories, dict(categories)
+            self._watermark = watermark
+
+    def _apply_changes(self) -> bool:
+        categories = self._select_categories()
+        query = self._select_products()
+        if self._watermark is not None:
+            query = query.where(
+                Product.updated_at > self._watermark - WATERMARK_OVERLAP
+            )
+        rows = db.session.execute(query).all()
+
+        changed = categories != self._categories
+        with self._mutex:
+            for row in rows:
+                record = ProductRecord(row)
+                previous = self._products.get(row.id)
+                changed = changed or previous != record
+                if previous is None:
+                    insort(self._ids, row.id)
+                elif previous.category_id != record.category_id:
+                    _remove(self._ids_by_category[previous.category_id], row.id)
+                if previous is None or previous.category_id != record.category_id:
+                    insort(
+                        self._ids_by_category.setdefault(record.category_id, []), row.id
+                    )
+                self._products[row.id] = record
+                self._watermark = max(self._watermark or row.updated_at, row.updated_at)
+
+            self._categories, self._titles = categories, dict(categories)
+
+        # A catalog grown past the limit is dropped at the next rebuild
+        if len(self._products) > self.max_products:
+            self._rebuilt_at = None
+        return changed
+
+
+def _remove(ids, id_):
+    index = bisect_left(ids, id_)
+    if index < len(ids) and ids[index] == id_:
+        del ids[index]
+
+
+catalog_snapshot = CatalogSnapshot()
+
+
+# This module serves the public catalog reads (POST /products and
+# GET /categories) from memory, so that they do not query PostgreSQL.
+
+# Every process holds its own snapshot:
+# - the products, as ProductRecord instances (__slots__, no per-instance
+#   dict), with the minimum price of their listings, and the product ids
+#   sorted by id, overall and per category, for the pagination;
+# - the categories (id and title).
+
+# Change feed: products.updated_at is set on every change of a product (ORM
+# default and onupdate, including bulk UPDATEs such as the category
+# deletion), and touch_product sets it when a listing is created, deleted or
+# repriced. Every CATALOG_SNAPSHOT_REFRESH_INTERVAL seconds, one request per
+# process reads the products changed since the highest updated_at seen
+# (minus WATERMARK_OVERLAP, for the transactions committed late) through
+# ix_products_updated_at, and the categories. Changes outside these paths
+# (rows deleted by a cascade or by hand) are picked up by the full rebuild,
+# every CATALOG_SNAPSHOT_REBUILD_INTERVAL seconds.
+
+# Memory: a snapshot holds about one record per product (its description
+# being the largest part). Above CATALOG_SNAPSHOT_MAX_PRODUCTS products the
+# snapshot is not built and the routes fall back to the database.
+
+# Shared mode (CATALOG_SNAPSHOT_FILE): a snapshot per process multiplies the
+# memory by the number of gunicorn workers. With a file path set, one process
+# per node (the holder of the builder flock) keeps the snapshot up to date as
+# above, from the catalog_snapshot_write job, and writes it to the file when
+# it changed (see core/catalog_file.py); the file is replaced atomically. The
+# processes (the builder included) map the file read-only, check every
+# CATALOG_SNAPSHOT_REFRESH_INTERVAL seconds whether it was replaced, and
+# decode only the page they serve: the catalog is in memory once per node,
+# in the page cache, whatever the number of workers. Until the first file is
+# written, the routes query the database.
@@ -0,0 +1,213 @@
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import func, select, update
+from sqlalchemy_utils import refresh_materialized_view
+
+from .background_jobs import run_background_job, save_progress, start_background_job
+from .category_registry import category_registry
+from .category_tree import add_category_counts, category_tree, move_subcategories
+from .extensions import db, scheduler
+from .models import (
+    CategoryDeletion,
+    JobStatus,
+    Listing,
+    MVProductCategory,
+    Product,
+    ProductCategory,
+)
+
+# A running deletion without progress for this long is considered abandoned
+# (its process stopped), and is resumed by the next delete request
+STALLED_AFTER = timedelta(minutes=5)
+
+
+def move_products(category_id: str, target_id: str, limit: int = None) -> int:
+    """
+    Move the products of a category to another category.
+
+    The products are moved by a single UPDATE, and the product and listing
+    counts of both categories are adjusted in the same transaction. The
+    caller commits.
+
+    Args:
+        category_id (str): The id of the category the products are moved from.
+        target_id (str): The id of the category the products are moved to.
+        limit (int): The maximum number of products to move, or None to move
+            them all. The products locked by other transactions are skipped.
+
+    Returns:
+        int: The number of products moved.
+    """
+    if limit is None:
+        moved = Product.category_id == category_id
+    else:
+        product_ids = db.session.scalars(
+            select(Product.id)
+            .where(Product.category_id == category_id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        ).all()
+        moved = Product.id.in_(product_ids)
+
+    listings = db.session.scalar(
+        select(func.count())
+        .select_from(Listing)
+        .join(Product, Listing.product_id == Product.id)
+        .where(moved)
+    )
+    products = db.session.execute(
+        update(Product)
+        .where(moved)
+        .values(category_id=target_id)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    add_category_counts(category_id, products=-products, listings=-listings)
+    add_category_counts(target_id, products=products, listings=listings)
+    return products
+
+
+def remove_category(category: ProductCategory, target: ProductCategory):
+    """
+    Delete a category, moving its products to the target category.
+
+    Its subcategories are attached to its parent. Everything happens in one
+    transaction, committed here.
+
+    Args:
+        category (ProductCategory): The category to delete.
+        target (ProductCategory): The category receiving its products.
+    """
+    move_subcategories(category)
+    move_products(category.id, target.id)
+    category.delete()
+
+
+def start_category_deletion(
+    category: ProductCategory, target: ProductCategory, total_products: int
+) -> CategoryDeletion:
+    """
+    Start deleting a category in the background.
+
+    A deletion of the same category which is already running is returned
+    instead, unless it has stalled, in which case it is resumed.
+
+    Args:
+        category (ProductCategory): The category to delete.
+        target (ProductCategory): The category receiving its products.
+        total_products (int): The number of products in the category.
+
+    Returns:
+        CategoryDeletion: The deletion, whose progress is updated by the job.
+    """
+    running = CategoryDeletion.query.filter_by(
+        category_id=category.id, status=JobStatus.RUNNING
+    )
+
+    deletion = running.filter(
+        CategoryDeletion.updated_at > datetime.now(UTC) - STALLED_AFTER
+    ).first()
+    if deletion is not None:
+        return deletion
+
+    deletion = running.first() or CategoryDeletion.create(
+        category_id=category.id,
+        category_title=category.title,
+        target_id=target.id,
+        total_products=total_products,
+        updated_at=datetime.now(UTC),
+    )
+
+    start_background_job(deletion, run_category_deletion)
+    return deletion
+
+
+def run_category_deletion(deletion_id: str):
+    """
+    Background job deleting a category.
+
+    The products are moved in chunks of SCHEDULER_CLEANUP_CHUNK_SIZE, each in
+    its own transaction, so that the products table is never locked for long
+    and the progress is visible while the job runs. The products left (those
+    skipped because they were locked, or created meanwhile) are moved in the
+    final transaction, which also deletes the category.
+
+    Args:
+        deletion_id (str): The id of the CategoryDeletion to run.
+    """
+    with scheduler.app.app_context():
+        deletion = run_background_job(CategoryDeletion, deletion_id, _delete_category)
+        if deletion.status is not JobStatus.DONE:
+            return
+
+        scheduler.app.logger.info(
+            f"category {deletion.category_title} deleted, "
+            f"{deletion.moved_products} products moved"
+        )
+        invalidate_category_caches()
+
+
+def _delete_category(deletion: CategoryDeletion):
+    chunk_size = scheduler.app.config["SCHEDULER_CLEANUP_CHUNK_SIZE"]
+    while True:
+        moved = move_products(deletion.category_id, deletion.target_id, chunk_size)
+        deletion.moved_products += moved
+        save_progress(deletion)
+
+        # A short chunk means there is nothing left to move
+        if moved < chunk_size:
+            break
+
+    # Committed with the "done" status
+    category = db.session.get(ProductCategory, deletion.category_id)
+    if category is not None:
+        move_subcategories(category)
+        deletion.moved_products += move_products(category.id, deletion.target_id)
+        db.session.delete(category)
+
+
+def invalidate_category_caches():
+    """
+    Invalidate the caches built from the categories, after a category changed.
+
+    The in-process registry and tree are dropped, and the refresh of the
+    mv_product_categories materialized view is scheduled (a refresh rereads
+    every product, so it is not run in the request).
+    """
+    category_registry.invalidate()
+    category_tree.invalidate()
+    scheduler.add_job(
+        id="mv_product_categories_refresh",
+        func=refresh_product_categories_view,
+        replace_existing=True,
+    )
+
+
+def refresh_product_categories_view():
+    """Background job refreshing the mv_product_categories materialized view."""
+    with scheduler.app.app_context():
+        try:
+            refresh_materialized_view(db.session, MVProductCategory.__table__.name)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+
+# This module deletes product categories, moving their products to another
+# category (Generic, for the admin delete category route).
+
+# The products are moved with a set-based UPDATE products SET category_id
+# instead of one ORM object each, served by ix_products_category_id.
+# Categories with up to CATEGORY_DELETE_SYNC_LIMIT products are deleted in
+# the request, in a single transaction. Larger ones are deleted by a one-off
+# scheduler job started in the process handling the request
+# (start_category_deletion), which moves the products in chunks and records
+# its progress in category_deletions; the route answers 202 with the id of
+# the deletion, and GET /admin/category/deletions/<id> returns its progress.
+
+# Until the job ends, the category exists and is listed with its remaining
+# products; products created in it meanwhile are moved by the final
+# transaction. A job interrupted by a restart leaves its deletion "running"
+# without progress, and is resumed by the next delete request for the
+# category after STALLED_AFTER.
@@ -0,0 +1,73 @@
+from time import monotonic
+from typing import Optional
+
+from sqlalchemy import select
+
+from .extensions import db
+from .models import ProductCategory
+from .ttl_cache import TTLCache
+
+# Minimum number of seconds between two reloads caused by unknown titles
+MISS_RELOAD_INTERVAL = 1
+
+
+class CategoryRegistry(TTLCache):
+    """
+    In-process map of the product category titles to their ids.
+
+    The map is loaded on first use and reloaded every CATEGORY_REGISTRY_TTL
+    seconds. The admin routes creating or deleting a category invalidate it,
+    so that the process handling the change sees it immediately; an unknown
+    title also triggers a reload (at most once per MISS_RELOAD_INTERVAL
+    seconds), so categories created through another process are found
+    without waiting for the TTL.
+    """
+
+    ttl_config = "CATEGORY_REGISTRY_TTL"
+
+    def get(self, title: str) -> Optional[str]:
+        """
+        Get the id of a category.
+
+        Must be called within an application context, as the map is loaded
+        (or reloaded) first if needed.
+
+        Args:
+            title (str): The title of the category.
+
+        Returns:
+            Optional[str]: The id of the category, or None if it does not exist.
+        """
+        ids, loaded_at = self._get()
+
+        category_id = ids.get(title)
+        if category_id is None and monotonic() - loaded_at >= MISS_RELOAD_INTERVAL:
+            ids, _ = self._reload()
+            category_id = ids.get(title)
+        return category_id
+
+    def _load(self) -> dict:
+        return dict(
+            db.session.execute(select(ProductCategory.title, ProductCategory.id))
+            .tuples()
+            .all()
+        )
+
+
+category_registry = CategoryRegistry()
+
+
+# This module caches the product categories, which change rarely but are
+# looked up by title on every request filtering or creating products.
+
+# Usage (within a request):
+#   category_id = category_registry.get(title)
+
+# The category validator (core/validators/public_views/public_products.py)
+# and the product routes share the same lookup, so a request filtering by
+# category no longer queries product_categories, and the routes filter on
+# products.category_id directly.
+
+# Staleness: a category deleted through another process may be considered
+# valid here for up to CATEGORY_REGISTRY_TTL seconds. Filtering on it then
+# returns no products, and creating a product in it fails on the foreign key.
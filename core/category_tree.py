@@ -0,0 +1,172 @@
+from sqlalchemy import func, literal, select, update
+
+from .extensions import db
+from .models import Listing, Product, ProductCategory
+from .ttl_cache import TTLCache
+
+
+def add_category_counts(category_id: str, products: int = 0, listings: int = 0):
+    """
+    Add to the product and listing counts of a category.
+
+    Must be called in the transaction creating or deleting the products or
+    listings. The counts are incremented in place, so concurrent requests do
+    not overwrite each other.
+
+    Args:
+        category_id (str): The id of the category.
+        products (int): The number of products added (negative if removed).
+        listings (int): The number of listings added (negative if removed).
+    """
+    db.session.execute(
+        update(ProductCategory)
+        .where(ProductCategory.id == category_id)
+        .values(
+            product_count=ProductCategory.product_count + products,
+            listing_count=ProductCategory.listing_count + listings,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def move_subcategories(category: ProductCategory):
+    """
+    Attach the subcategories of a category to its parent.
+
+    The paths of the whole subtree are rewritten by a single UPDATE. Must be
+    called before the category is deleted.
+
+    Args:
+        category (ProductCategory): The category about to be deleted.
+    """
+    old_prefix = category.subtree_path
+    db.session.execute(
+        update(ProductCategory)
+        .where(ProductCategory.path.startswith(old_prefix, autoescape=True))
+        .values(
+            path=literal(category.path)
+            + func.substr(ProductCategory.path, len(old_prefix) + 1),
+            parent_id=func.coalesce(
+                func.nullif(ProductCategory.parent_id, category.id),
+                category.parent_id,
+            ),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def rebuild_category_counts():
+    """
+    Recompute the product and listing counts of every category.
+
+    Used to fill the counts the first time and to repair them. The caller
+    commits.
+    """
+    product_count = (
+        select(func.count())
+        .where(Product.category_id == ProductCategory.id)
+        .scalar_subquery()
+    )
+    listing_count = (
+        select(func.count())
+        .select_from(Listing)
+        .join(Product, Listing.product_id == Product.id)
+        .where(Product.category_id == ProductCategory.id)
+        .scalar_subquery()
+    )
+    db.session.execute(
+        update(ProductCategory)
+        .values(product_count=product_count, listing_count=listing_count)
+        .execution_options(synchronize_session=False)
+    )
+
+
+class CategoryTree(TTLCache):
+    """
+    In-process copy of the category tree with its product and listing counts.
+
+    The tree is built from a single query on product_categories and kept for
+    CATEGORY_TREE_TTL seconds. The admin routes creating or deleting a
+    category invalidate it.
+    """
+
+    ttl_config = "CATEGORY_TREE_TTL"
+
+    def get(self) -> list:
+        """
+        Get the category tree.
+
+        Must be called within an application context, as the tree is rebuilt
+        first if it has expired.
+
+        Returns:
+            list: The root categories, each with its subcategories in
+                "children". The counts of a category are its own, the totals
+                include its subcategories.
+        """
+        roots, _ = self._get()
+        return roots
+
+    def _load(self) -> list:
+        rows = db.session.execute(
+            select(
+                ProductCategory.id,
+                ProductCategory.title,
+                ProductCategory.parent_id,
+                ProductCategory.product_count,
+                ProductCategory.listing_count,
+            ).order_by(ProductCategory.title)
+        ).all()
+
+        nodes = {
+            row.id: {
+                "id": row.id,
+                "title": row.title,
+                "product_count": row.product_count,
+                "listing_count": row.listing_count,
+                "children": [],
+            }
+            for row in rows
+        }
+        roots = []
+        for row in rows:
+            parent = nodes.get(row.parent_id)
+            (parent["children"] if parent else roots).append(nodes[row.id])
+
+        for root in roots:
+            _add_totals(root)
+        return roots
+
+
+def _add_totals(node):
+    node["total_product_count"] = node["product_count"]
+    node["total_listing_count"] = node["listing_count"]
+    for child in node["children"]:
+        _add_totals(child)
+        node["total_product_count"] += child["total_product_count"]
+        node["total_listing_count"] += child["total_listing_count"]
+
+
+category_tree = CategoryTree()
+
+
+# This module maintains the category tree served by GET /categories/tree, so
+# that the category navigation is a single request answered from memory.
+
+# - Categories are nested through parent_id, and product_categories.path holds
+#   the ids of the ancestors of each category (materialized path). A subtree
+#   is selected with path LIKE '<path><id>/%', served by a text_pattern_ops
+#   index; the admin create category route sets the path from the parent.
+# - product_count and listing_count are incremented in the transaction of the
+#   routes that create products (admin) and create or delete listings
+#   (sellers), with add_category_counts. Deleting a category moves its counts
+#   to the category receiving its products.
+# - Every process keeps the tree in memory (category_tree.get) for
+#   CATEGORY_TREE_TTL seconds, so the counts served lag behind by at most that
+#   long. Creating or deleting a category invalidates the tree of the process
+#   handling the change; the other processes see it when their copy expires.
+
+# To fill the counts of existing categories, run once:
+#   $ flask shell
+#   >>> from core.category_tree import rebuild_category_counts
+#   >>> rebuild_category_counts(); db.session.commit()
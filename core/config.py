@@ -31,6 +31,55 @@ class Config(object):
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
 
+    # Database connection pool configuration (see core/db_pool.py)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+    # Set when DB_URI points to a transaction-pooling proxy such as PgBouncer
+    DB_PGBOUNCER_TRANSACTION_MODE = (
+        os.getenv("DB_PGBOUNCER_TRANSACTION_MODE", "false").lower() == "true"
+    )
+
+    # Read replicas for read-only routes (see core/replicas.py)
+    DB_REPLICA_URIS = [
+        uri.strip()
+        for uri in os.getenv("DB_REPLICA_URIS", "").split(",")
+        if uri.strip()
+    ]
+    DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "5"))
+    DB_REPLICA_LAG_CHECK_INTERVAL = float(
+        os.getenv("DB_REPLICA_LAG_CHECK_INTERVAL", "5")
+    )
+    DB_REPLICA_STICKY_SECONDS = float(os.getenv("DB_REPLICA_STICKY_SECONDS", "10"))
+
+    # Number of latest reviews embedded in each listing of the product pages
+    LISTING_REVIEWS_PREVIEW_SIZE = int(os.getenv("LISTING_REVIEWS_PREVIEW_SIZE", "5"))
+
+    # Listing views are buffered per process and written every interval (seconds)
+    VIEW_COUNTER_FLUSH_INTERVAL = int(os.getenv("VIEW_COUNTER_FLUSH_INTERVAL", "5"))
+    # Maximum number of distinct listings buffered per process between flushes
+    VIEW_COUNTER_MAX_PENDING = int(os.getenv("VIEW_COUNTER_MAX_PENDING", "50000"))
+
+    # Popular/trending listings: top RANKINGS_TOP_K per category, recomputed by
+    # a scheduled job every RANKINGS_RECOMPUTE_INTERVAL seconds
+    RANKINGS_TOP_K = int(os.getenv("RANKINGS_TOP_K", "100"))
+    RANKINGS_RECOMPUTE_INTERVAL = int(os.getenv("RANKINGS_RECOMPUTE_INTERVAL", "600"))
+    # Seconds between checks for a new computation by each process
+    RANKINGS_REFRESH_INTERVAL = float(os.getenv("RANKINGS_REFRESH_INTERVAL", "30"))
+    # Time for the trending score of past activity to halve (seconds)
+    RANKINGS_TRENDING_HALF_LIFE = float(
+        os.getenv("RANKINGS_TRENDING_HALF_LIFE", "86400")
+    )
+    # Score of a view and of a purchased item
+    RANKINGS_VIEW_WEIGHT = float(os.getenv("RANKINGS_VIEW_WEIGHT", "1"))
+    RANKINGS_PURCHASE_WEIGHT = float(os.getenv("RANKINGS_PURCHASE_WEIGHT", "20"))
+
+    # Seconds between two rebuilds of the listing counts of the search facets
+    FACETS_RECOMPUTE_INTERVAL = int(os.getenv("FACETS_RECOMPUTE_INTERVAL", "300"))
+
     # Email configuration
     MAIL_SERVER = os.getenv("MAIL_SERVER")
     MAIL_PORT = os.getenv("MAIL_PORT")
@@ -41,6 +90,72 @@ class Config(object):
     MAIL_DEFAULT_SENDER = os.getenv("MAIL_DEFAULT_SENDER")
     MAIL_CONFIRM_SALT = os.getenv("MAIL_CONFIRM_SALT")
 
+    # Scheduler cleanup jobs configuration
+    SCHEDULER_CLEANUP_CHUNK_SIZE = int(
+        os.getenv("SCHEDULER_CLEANUP_CHUNK_SIZE", "5000")
+    )
+    SCHEDULER_CLEANUP_TIME_BUDGET = float(
+        os.getenv("SCHEDULER_CLEANUP_TIME_BUDGET", "300")
+    )
+
+    # PostgreSQL advisory lock key identifying the scheduler leader
+    SCHEDULER_LEADER_LOCK_KEY = int(os.getenv("SCHEDULER_LEADER_LOCK_KEY", "727001"))
+    # Direct PostgreSQL URI for the leader lock, required behind a transaction pooler
+    SCHEDULER_DATABASE_URI = os.getenv("SCHEDULER_DB_URI")
+
+    # Days of tokens_blocklist partitions created ahead of time
+    TOKENS_BLOCKLIST_PARTITION_LOOKAHEAD_DAYS = int(
+        os.getenv("TOKENS_BLOCKLIST_PARTITION_LOOKAHEAD_DAYS", "7")
+    )
+
+    # Delivered and cancelled orders older than this are moved to archived_orders
+    ORDERS_ARCHIVE_AFTER_DAYS = int(os.getenv("ORDERS_ARCHIVE_AFTER_DAYS", "180"))
+
+    # Seconds between two runs of the job sending the queued order emails
+    ORDER_NOTIFICATIONS_INTERVAL = int(os.getenv("ORDER_NOTIFICATIONS_INTERVAL", "30"))
+    # Emails sent over one SMTP connection and marked sent by one transaction
+    ORDER_NOTIFICATIONS_BATCH_SIZE = int(
+        os.getenv("ORDER_NOTIFICATIONS_BATCH_SIZE", "50")
+    )
+    # Failed sends after which a queued email is abandoned
+    ORDER_NOTIFICATIONS_MAX_ATTEMPTS = int(
+        os.getenv("ORDER_NOTIFICATIONS_MAX_ATTEMPTS", "5")
+    )
+
+    # Seconds before the in-process category registry is reloaded
+    CATEGORY_REGISTRY_TTL = int(os.getenv("CATEGORY_REGISTRY_TTL", "60"))
+
+    # Seconds before the in-process category tree and its counts are rebuilt
+    CATEGORY_TREE_TTL = int(os.getenv("CATEGORY_TREE_TTL", "30"))
+
+    # In-process catalog snapshot: products changed since the last update are
+    # reloaded every REFRESH_INTERVAL seconds, everything every REBUILD_INTERVAL
+    CATALOG_SNAPSHOT_REFRESH_INTERVAL = float(
+        os.getenv("CATALOG_SNAPSHOT_REFRESH_INTERVAL", "5")
+    )
+    CATALOG_SNAPSHOT_REBUILD_INTERVAL = float(
+        os.getenv("CATALOG_SNAPSHOT_REBUILD_INTERVAL", "3600")
+    )
+    # Above this number of products, the catalog is read from the database
+    CATALOG_SNAPSHOT_MAX_PRODUCTS = int(
+        os.getenv("CATALOG_SNAPSHOT_MAX_PRODUCTS", "100000")
+    )
+    # Catalog file shared by the worker processes of a node (preferably on a
+    # tmpfs, e.g. /dev/shm/catalog.bin); empty for a snapshot per process
+    CATALOG_SNAPSHOT_FILE = os.getenv("CATALOG_SNAPSHOT_FILE", "")
+
+    # Categories with more products are deleted by a background job, in chunks
+    CATEGORY_DELETE_SYNC_LIMIT = int(os.getenv("CATEGORY_DELETE_SYNC_LIMIT", "10000"))
+
+    # Rows fetched from the server-side cursor at a time by the export routes
+    EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+    # Listing imports: rows validated and written per transaction, rows
+    # accepted per file, and rejected rows whose error is kept
+    LISTING_IMPORT_BATCH_SIZE = int(os.getenv("LISTING_IMPORT_BATCH_SIZE", "1000"))
+    LISTING_IMPORT_MAX_ROWS = int(os.getenv("LISTING_IMPORT_MAX_ROWS", "100000"))
+    LISTING_IMPORT_MAX_ERRORS = int(os.getenv("LISTING_IMPORT_MAX_ERRORS", "1000"))
+
 
 class ProductionConfig(Config):
     """Configuration for the production environment."""
@@ -0,0 +1,114 @@
+from time import perf_counter
+
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+from .metrics import (
+    db_pool_checked_out,
+    db_pool_checkout_wait,
+    db_pool_overflow,
+    db_pool_size,
+)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records how long each checkout waited for a connection.
+
+    The wait time covers both waiting for a connection to be returned to the
+    pool and opening a new (overflow) connection.
+    """
+
+    def __init__(self, creator, metrics_label="primary", **kwargs):
+        self.metrics_label = metrics_label
+        super().__init__(creator, **kwargs)
+
+    def _do_get(self):
+        started_at = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_wait.labels(pool=self.metrics_label).observe(
+                perf_counter() - started_at
+            )
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics_label = self.metrics_label
+        return pool
+
+
+def build_engine_options(config, metrics_label="primary"):
+    """
+    Build the SQLAlchemy engine options from the application configuration.
+
+    Args:
+        config (dict): The Flask application configuration.
+        metrics_label (str): The label identifying this pool in the metrics.
+
+    Returns:
+        dict: Keyword arguments for create_engine (SQLALCHEMY_ENGINE_OPTIONS).
+    """
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "metrics_label": metrics_label,
+        "pool_size": config["DB_POOL_SIZE"],
+        "max_overflow": config["DB_MAX_OVERFLOW"],
+        "pool_timeout": config["DB_POOL_TIMEOUT"],
+        "pool_recycle": config["DB_POOL_RECYCLE"],
+        "pool_pre_ping": config["DB_POOL_PRE_PING"],
+    }
+
+    # A transaction-pooling proxy rejects unknown startup parameters and hands
+    # the server connection to other clients between transactions, so session
+    # settings are applied per transaction instead (see instrument_engine).
+    if not config["DB_PGBOUNCER_TRANSACTION_MODE"]:
+        options["connect_args"] = {
+            "options": f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT_MS']}"
+        }
+
+    return options
+
+
+def instrument_engine(engine, config, metrics_label="primary"):
+    """
+    Attach the pool gauges and per-transaction settings to an engine.
+
+    Args:
+        engine (Engine): The engine to instrument.
+        config (dict): The Flask application configuration.
+        metrics_label (str): The label identifying this pool in the metrics.
+    """
+    db_pool_size.labels(pool=metrics_label).set_function(lambda: engine.pool.size())
+    db_pool_checked_out.labels(pool=metrics_label).set_function(
+        lambda: engine.pool.checkedout()
+    )
+    db_pool_overflow.labels(pool=metrics_label).set_function(
+        lambda: max(engine.pool.overflow(), 0)
+    )
+
+    if config["DB_PGBOUNCER_TRANSACTION_MODE"]:
+        statement_timeout = int(config["DB_STATEMENT_TIMEOUT_MS"])
+
+        @event.listens_for(engine, "begin")
+        def set_transaction_statement_timeout(conn):
+            conn.exec_driver_sql(f"SET LOCAL statement_timeout = {statement_timeout}")
+
+
+# This module configures and instruments the SQLAlchemy connection pool.
+
+# Pool sizing, recycling, pre-ping and the statement timeout are read from the
+# DB_* settings in core/config.py and turned into SQLALCHEMY_ENGINE_OPTIONS
+# before the db extension is initialized.
+
+# Metrics (see core/metrics.py):
+# - db_pool_size / db_pool_checked_out / db_pool_overflow: current pool usage
+# - db_pool_checkout_wait_seconds: time spent waiting for a connection
+
+# PgBouncer transaction mode (DB_PGBOUNCER_TRANSACTION_MODE=true):
+# - no startup parameters are sent; statement_timeout is set with SET LOCAL
+#   at the beginning of every transaction
+# - psycopg2 does not use server-side prepared statements, so no extra
+#   setting is needed for it
+# - session-level features (advisory locks used by the scheduler leader
+#   election) must use SCHEDULER_DATABASE_URI, pointing directly at PostgreSQL
@@ -0,0 +1,100 @@
+import csv
+import io
+from datetime import date
+from enum import Enum
+
+from flask import current_app, stream_with_context
+from sqlalchemy import Select
+
+from .extensions import db
+from .json_provider import dumps_bytes
+
+# Media type of each export format
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def export_response(query: Select, export_format: str, filename: str):
+    """
+    Build a response streaming the rows of a query.
+
+    The rows are read through a server-side cursor, EXPORT_BATCH_SIZE at a
+    time, and each batch is encoded and sent before the next one is fetched,
+    so the memory used does not depend on the number of rows.
+
+    Args:
+        query (Select): The query, whose column labels are the field names.
+        export_format (str): "ndjson" (one JSON object per line) or "csv"
+            (with a header line).
+        filename (str): The name of the downloaded file, without extension.
+
+    Returns:
+        Response: The streamed response.
+    """
+    batch_size = current_app.config["EXPORT_BATCH_SIZE"]
+    encode = _ndjson_lines if export_format == "ndjson" else _csv_lines
+
+    def generate():
+        result = db.session.execute(query.execution_options(yield_per=batch_size))
+        try:
+            if export_format == "csv":
+                yield _csv_lines([result.keys()])
+            for rows in result.partitions():
+                yield encode(rows)
+        finally:
+            result.close()
+
+    return current_app.response_class(
+        stream_with_context(generate()),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.{export_format}"'
+        },
+    )
+
+
+def _ndjson_lines(rows) -> bytes:
+    return b"".join(dumps_bytes(row._asdict()) + b"\n" for row in rows)
+
+
+def _csv_lines(rows) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(map(_csv_values, rows))
+    return buffer.getvalue().encode()
+
+
+def _csv_values(row):
+    return [_csv_value(value) for value in row]
+
+
+def _csv_value(value):
+    # The same representation as in the JSON responses
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+# This module streams the admin and seller exports (GET /admin/users/export,
+# GET /admin/products/export and GET /seller/listings/export).
+
+# The list routes load a page of ORM objects and serialize it as a single
+# JSON document; an export of every row would hold them all in memory, twice.
+# Here the rows are selected through a projection (only the exported columns)
+# with yield_per, which makes psycopg2 use a named (server-side) cursor: the
+# rows are fetched by batches of EXPORT_BATCH_SIZE, and each batch is written
+# to the response before the next one is fetched.
+
+# The response is generated after the view returns: stream_with_context keeps
+# the request context (and the database session) until the last row is sent.
+# The export runs in a single transaction, so it sees a consistent snapshot,
+# and statement_timeout applies to each fetch instead of the whole export.
+# Once the first bytes are sent the status can no longer change: an error
+# while streaming aborts the connection, and the client gets a truncated file.
@@ -5,8 +5,11 @@ from flask_jwt_extended import JWTManager
 from flask_mail import Mail
 from flask_sqlalchemy import SQLAlchemy
 
+from .replicas import RoutingSession
+
 # Initialize SQLAlchemy for database operations
-db = SQLAlchemy()
+# (the routing session sends the reads of read-only routes to the replicas)
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 # Initialize Bcrypt for password hashing
 bcrypt = Bcrypt()
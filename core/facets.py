@@ -0,0 +1,288 @@
+from sqlalchemy import (
+    Integer,
+    String,
+    case,
+    cast,
+    delete,
+    func,
+    insert,
+    literal,
+    select,
+    union_all,
+)
+
+from .extensions import db
+from .models import (
+    Listing,
+    ListingFacet,
+    Product,
+    ProductCategory,
+    ProductState,
+    Seller,
+)
+from .projections import searched_listing
+
+# Lower bounds of the price buckets; the last bucket has no upper bound
+PRICE_BUCKETS = (0, 10, 25, 50, 100, 250, 500, 1000)
+# Seller rating thresholds of the rating facet ("at least N")
+RATING_THRESHOLDS = (1, 2, 3, 4, 5)
+
+# Filters on the listings, by facet
+LISTING_FILTERS = {
+    "category": lambda category_id: Product.category_id == category_id,
+    "product_state": lambda state: Listing.product_state == state,
+    "price": lambda prices: (
+        Listing.price >= prices[0]
+        if prices[1] is None
+        else (Listing.price >= prices[0]) & (Listing.price < prices[1])
+    ),
+    "seller_rating": lambda rating: Seller.rating >= rating,
+    "is_available": lambda available: Listing.is_available == available,
+}
+
+# The same filters on listing_facets
+FACET_FILTERS = {
+    "category": lambda category_id: ListingFacet.category_id == category_id,
+    "product_state": lambda state: ListingFacet.product_state == state,
+    "price": lambda prices: ListingFacet.price_bucket.between(
+        PRICE_BUCKETS.index(prices[0]),
+        PRICE_BUCKETS.index(prices[1]) - 1
+        if prices[1] is not None
+        else len(PRICE_BUCKETS) - 1,
+    ),
+    "seller_rating": lambda rating: ListingFacet.rating_floor >= rating,
+    "is_available": lambda available: ListingFacet.is_available == available,
+}
+
+# The value of each facet in listing_facets, as a string
+FACET_KEYS = {
+    "category": ListingFacet.category_id,
+    "product_state": cast(ListingFacet.product_state, String),
+    "price": cast(ListingFacet.price_bucket, String),
+    "seller_rating": cast(ListingFacet.rating_floor, String),
+    "is_available": case((ListingFacet.is_available, "true"), else_="false"),
+}
+
+
+def rebuild_listing_facets() -> int:
+    """
+    Replace the listing counts of every facet combination.
+
+    The listings are counted by category, product state, price bucket, seller
+    rating (rounded down) and availability. The caller commits.
+
+    Returns:
+        int: The number of facet rows written.
+    """
+    price_bucket = case(
+        *(
+            (Listing.price < bound, bucket)
+            for bucket, bound in enumerate(PRICE_BUCKETS[1:])
+        ),
+        else_=len(PRICE_BUCKETS) - 1,
+    )
+    rating_floor = cast(func.floor(func.coalesce(Seller.rating, 0)), Integer)
+    combination = (
+        Product.category_id,
+        Listing.product_state,
+        price_bucket,
+        rating_floor,
+        Listing.is_available,
+    )
+
+    db.session.execute(delete(ListingFacet))
+    return db.session.execute(
+        insert(ListingFacet).from_select(
+            [
+                "category_id",
+                "product_state",
+                "price_bucket",
+                "rating_floor",
+                "is_available",
+                "listing_count",
+            ],
+            select(*combination, func.count())
+            .select_from(Listing)
+            .join(Product, Listing.product_id == Product.id)
+            .join(Seller, Listing.seller_id == Seller.id)
+            .group_by(*combination),
+        )
+    ).rowcount
+
+
+def active_filters(filters: dict, category_id: str = None) -> dict:
+    """
+    Get the filters of a search which are set.
+
+    Args:
+        filters (dict): The filters validated by ListingSearchSchema.
+        category_id (str): The id of the category filtered on, if any.
+
+    Returns:
+        dict: The value of each facet filtered on.
+    """
+    values = {
+        "category": category_id,
+        "product_state": ProductState(filters["product_state"])
+        if filters["product_state"]
+        else None,
+        "price": (filters["min_price"] or 0, filters["max_price"])
+        if filters["min_price"] or filters["max_price"]
+        else None,
+        "seller_rating": filters["min_seller_rating"],
+        "is_available": filters["is_available"],
+    }
+    return {facet: value for facet, value in values.items() if value is not None}
+
+
+def search_listings(active: dict, order_by: str, limit: int, offset: int) -> list:
+    """
+    Get a page of the listings matching the filters, sorted by price.
+
+    Args:
+        active (dict): The filters set, as returned by active_filters.
+        order_by (str): The price order, "asc" or "desc".
+        limit (int): The maximum number of listings to return.
+        offset (int): The number of listings to skip.
+
+    Returns:
+        list: The listings, as rows of the searched_listing projection.
+    """
+    price = Listing.price.asc() if order_by == "asc" else Listing.price.desc()
+
+    return db.session.execute(
+        searched_listing.select()
+        .select_from(Listing)
+        .join(Seller, Listing.seller_id == Seller.id)
+        .join(Product, Listing.product_id == Product.id)
+        .join(ProductCategory, Product.category_id == ProductCategory.id)
+        .where(*(LISTING_FILTERS[facet](value) for facet, value in active.items()))
+        .order_by(price, Listing.id)
+        .limit(limit)
+        .offset(offset)
+    ).all()
+
+
+def facet_counts(active: dict) -> tuple[int, dict]:
+    """
+    Count the listings matching the filters, and those of every facet value.
+
+    The counts of a facet apply all the filters except its own, so that they
+    are the numbers of listings each value of the facet would return. They are
+    all read from listing_facets with a single query.
+
+    Args:
+        active (dict): The filters set, as returned by active_filters.
+
+    Returns:
+        tuple: The number of listings matching all the filters, and the counts
+            of each facet, by value.
+    """
+    count = func.coalesce(func.sum(ListingFacet.listing_count), 0).label("count")
+    no_key = literal(None, String)
+
+    def filtered(query, excluded=None):
+        return query.where(
+            *(
+                FACET_FILTERS[facet](value)
+                for facet, value in active.items()
+                if facet != excluded
+            )
+        )
+
+    branches = [
+        filtered(
+            select(
+                literal("total").label("facet"),
+                no_key.label("key"),
+                no_key.label("title"),
+                count,
+            ).select_from(ListingFacet)
+        )
+    ]
+    for facet, key in FACET_KEYS.items():
+        query = select(
+            literal(facet).label("facet"),
+            key.label("key"),
+            (ProductCategory.title if facet == "category" else no_key).label("title"),
+            count,
+        ).select_from(ListingFacet)
+        if facet == "category":
+            query = query.join(
+                ProductCategory, ListingFacet.category_id == ProductCategory.id
+            ).group_by(key, ProductCategory.title)
+        else:
+            query = query.group_by(key)
+        branches.append(filtered(query, excluded=facet))
+
+    rows = db.session.execute(union_all(*branches)).all()
+    total = next(row.count for row in rows if row.facet == "total")
+    return total, _facets(rows)
+
+
+def _facets(rows) -> dict:
+    counts = {facet: {} for facet in FACET_KEYS}
+    titles = {}
+    for row in rows:
+        if row.facet in counts:
+            counts[row.facet][row.key] = row.count
+        if row.facet == "category":
+            titles[row.key] = row.title
+
+    ratings = {int(key): count for key, count in counts["seller_rating"].items()}
+    return {
+        "category": sorted(
+            (
+                {"id": key, "title": titles[key], "count": count}
+                for key, count in counts["category"].items()
+            ),
+            key=lambda value: value["title"],
+        ),
+        "product_state": [
+            {"value": state.value, "count": counts["product_state"].get(state.name, 0)}
+            for state in ProductState
+        ],
+        "price": [
+            {
+                "min": bound,
+                "max": PRICE_BUCKETS[bucket + 1]
+                if bucket + 1 < len(PRICE_BUCKETS)
+                else None,
+                "count": counts["price"].get(str(bucket), 0),
+            }
+            for bucket, bound in enumerate(PRICE_BUCKETS)
+        ],
+        "seller_rating": [
+            {
+                "min": threshold,
+                "count": sum(
+                    count for floor, count in ratings.items() if floor >= threshold
+                ),
+            }
+            for threshold in RATING_THRESHOLDS
+        ],
+        "is_available": [
+            {"value": value, "count": counts["is_available"].get(key, 0)}
+            for value, key in ((True, "true"), (False, "false"))
+        ],
+    }
+
+
+# This module serves the faceted listing search (POST /listings/search): the
+# listings filtered by category, product state, price range, minimum seller
+# rating and availability, with the number of listings of every value of
+# these facets, so that a filter panel is filled by the same request.
+
+# - The listings are read from the live tables. The price, state and product
+#   filters are served by the ix_listings_* indexes (see the Listing model).
+# - The facet counts are read from listing_facets, which holds the number of
+#   listings of every combination of category, state, price bucket, seller
+#   rating (rounded down) and availability: at most a few hundred rows per
+#   category, whatever the number of listings. All the counts, and the total,
+#   are computed by a single UNION ALL over it.
+# - listing_facets is rebuilt by the listing_facets_recompute job every
+#   FACETS_RECOMPUTE_INTERVAL seconds, so the counts lag behind the listings
+#   by at most that long.
+
+# Price filters are bucket bounds (PRICE_BUCKETS, returned in the price facet),
+# so that the counts are exact for any price range a client can request.
@@ -0,0 +1,60 @@
+from decimal import Decimal
+
+import orjson
+from flask.json.provider import JSONProvider
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(value):
+    """Serialize the types orjson does not handle natively."""
+    if isinstance(value, Decimal):
+        return str(value)
+    if hasattr(value, "__html__"):
+        return str(value.__html__())
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj) -> bytes:
+    """
+    Serialize an object to UTF-8 encoded JSON.
+
+    datetime, date, time, UUID, enums and dataclasses are serialized natively
+    by orjson; Decimal is serialized as a string, as with the default provider.
+
+    Args:
+        obj: The object to serialize.
+
+    Returns:
+        bytes: The JSON document.
+    """
+    return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS)
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    JSON provider backed by orjson.
+
+    Used by jsonify/success_response and request.get_json. Responses are built
+    directly from the encoded bytes, without an intermediate str.
+    """
+
+    def dumps(self, obj, **kwargs) -> str:
+        return dumps_bytes(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype="application/json")
+
+
+# This module plugs orjson into Flask (and Quart) as the application JSON provider:
+#   app.json = OrjsonProvider(app)
+
+# Differences with the default provider:
+# - datetime and date values are serialized in ISO 8601 format
+# - enums are serialized as their value
+# - keys are kept in insertion order instead of being sorted
+# - the output is always compact
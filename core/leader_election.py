@@ -0,0 +1,162 @@
+import threading
+from functools import wraps
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.pool import NullPool
+
+from .extensions import db, scheduler
+from .metrics import scheduler_is_leader, scheduler_job_duration, scheduler_job_skipped
+
+
+class LeaderElection:
+    """
+    Elect a single leader among all the processes sharing the same database.
+
+    Leadership is a session-level PostgreSQL advisory lock held on a dedicated
+    connection. The lock is released automatically when the leader process or
+    its connection dies, so another process takes over on its next attempt.
+    """
+
+    def __init__(self, app=None):
+        self.lock_key = None
+        self._engine = None
+        self._connection = None
+        self._mutex = threading.Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Read the advisory lock key from the application configuration.
+
+        When SCHEDULER_DATABASE_URI is set (e.g. because DB_URI points to a
+        transaction-pooling proxy), the lock is taken on a direct connection
+        to that database instead of the application pool.
+
+        Args:
+            app (Flask): The Flask application instance.
+        """
+        self.lock_key = app.config["SCHEDULER_LEADER_LOCK_KEY"]
+
+        uri = app.config.get("SCHEDULER_DATABASE_URI")
+        if uri:
+            self._engine = create_engine(uri, poolclass=NullPool)
+
+    @property
+    def is_leader(self) -> bool:
+        """Whether this process currently holds the leader lock."""
+        return self._connection is not None
+
+    def try_acquire(self) -> bool:
+        """
+        Become (or confirm being) the leader without blocking.
+
+        Must be called within an application context.
+
+        Returns:
+            bool: True if this process holds the leader lock.
+        """
+        with self._mutex:
+            if self._connection is not None:
+                try:
+                    self._connection.execute(select(1))
+                    self._connection.commit()
+                    return True
+                except DBAPIError:
+                    # The connection (and therefore the lock) is gone
+                    self._close_connection()
+
+            connection = (self._engine or db.engine).connect()
+            try:
+                acquired = connection.execute(
+                    select(func.pg_try_advisory_lock(self.lock_key))
+                ).scalar()
+                connection.commit()
+            except Exception:
+                connection.close()
+                raise
+
+            if acquired:
+                self._connection = connection
+            else:
+                connection.close()
+
+            scheduler_is_leader.set(1 if acquired else 0)
+            return bool(acquired)
+
+    def release(self):
+        """Give up leadership, if held."""
+        with self._mutex:
+            if self._connection is None:
+                return
+            try:
+                self._connection.execute(select(func.pg_advisory_unlock(self.lock_key)))
+                self._connection.commit()
+            except DBAPIError:
+                pass
+            self._close_connection()
+
+    def _close_connection(self):
+        try:
+            self._connection.close()
+        except DBAPIError:
+            pass
+        self._connection = None
+        scheduler_is_leader.set(0)
+
+
+scheduler_leader = LeaderElection()
+
+
+def leader_only(job_id: str):
+    """
+    Decorator that runs a scheduled job only in the elected leader process.
+
+    The decorated job runs within an application context and its duration is
+    recorded in the scheduler_job_duration_seconds histogram. Processes that
+    are not the leader skip the run.
+
+    Args:
+        job_id (str): The scheduler job id, used as the metrics label.
+
+    Returns:
+        function: The decorated job.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with scheduler.app.app_context():
+                if not scheduler_leader.try_acquire():
+                    scheduler_job_skipped.labels(job=job_id).inc()
+                    return None
+
+                with scheduler_job_duration.labels(job=job_id).time():
+                    return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# This module makes the APScheduler jobs safe to run with several gunicorn
+# workers on several nodes.
+
+# Every process still starts its own scheduler, but a job body only runs in the
+# process holding the PostgreSQL advisory lock SCHEDULER_LEADER_LOCK_KEY. The
+# first process to try the lock becomes the leader and keeps it, on a dedicated
+# connection, until it exits; the others skip the job.
+
+# Usage:
+#   @scheduler.task("cron", id="my_job", hour=0)
+#   @leader_only("my_job")
+#   def my_job():
+#       ...
+
+# Note: session-level advisory locks need a direct (session-pooled) connection
+# to PostgreSQL. They do not work through a transaction-pooling proxy, so set
+# SCHEDULER_DB_URI when DB_URI points to PgBouncer in transaction mode.
+
+# tools/leader_election.py checks the election locally with several processes.
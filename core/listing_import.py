@@ -0,0 +1,238 @@
+import csv
+import io
+from collections import Counter
+from datetime import UTC, datetime
+from itertools import islice
+
+import orjson
+from marshmallow import ValidationError
+from sqlalchemy import insert, select, update
+
+from .background_jobs import run_background_job, save_progress, start_background_job
+from .catalog_snapshot import touch_products
+from .category_tree import add_category_counts
+from .extensions import db, scheduler
+from .models import JobStatus, Listing, ListingImport, Product, ProductState
+from .validators.seller.seller_listing import ImportListingSchema
+
+validate_import_row = ImportListingSchema()
+
+
+def read_import_rows(stream, import_format: str, max_rows: int) -> list:
+    """
+    Read the rows of an uploaded listings file.
+
+    Args:
+        stream: The file, opened in binary mode.
+        import_format (str): "csv" (with a header line) or "ndjson" (one JSON
+            object per line).
+        max_rows (int): The maximum number of rows read.
+
+    Returns:
+        list: The rows, as dicts. An NDJSON line which is not a JSON object is
+            returned as None, and rejected by the import.
+
+    Raises:
+        ValueError: If the file is not UTF-8 or not valid CSV.
+    """
+    if import_format == "csv":
+        try:
+            reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig"))
+            return list(islice(reader, max_rows))
+        except csv.Error as e:
+            raise ValueError(str(e)) from e
+
+    rows = []
+    for line in stream:
+        if len(rows) == max_rows:
+            break
+        if not line.strip():
+            continue
+        try:
+            row = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            row = None
+        rows.append(row if isinstance(row, dict) else None)
+    return rows
+
+
+def start_listing_import(seller_id: str, rows: list) -> ListingImport:
+    """
+    Start importing listings in the background.
+
+    Args:
+        seller_id (str): The id of the seller importing the listings.
+        rows (list): The rows, as returned by read_import_rows.
+
+    Returns:
+        ListingImport: The import, whose progress is updated by the job.
+    """
+    listing_import = ListingImport.create(
+        seller_id=seller_id,
+        total_rows=len(rows),
+        updated_at=datetime.now(UTC),
+    )
+
+    start_background_job(listing_import, run_listing_import, rows)
+    return listing_import
+
+
+def run_listing_import(import_id: str, rows: list):
+    """
+    Background job importing listings.
+
+    The rows are imported in batches of LISTING_IMPORT_BATCH_SIZE, each in
+    its own transaction, which also records the progress of the import. The
+    rejected rows do not stop the import; an unexpected error does, leaving
+    the batches already imported in place.
+
+    Args:
+        import_id (str): The id of the ListingImport to run.
+        rows (list): The rows, as returned by read_import_rows.
+    """
+    with scheduler.app.app_context():
+        listing_import = run_background_job(
+            ListingImport,
+            import_id,
+            lambda listing_import: _import_rows(listing_import, rows),
+        )
+        if listing_import.status is not JobStatus.DONE:
+            return
+
+        scheduler.app.logger.info(
+            f"listing import {import_id} done: {listing_import.created_listings} "
+            f"created, {listing_import.updated_listings} updated, "
+            f"{listing_import.rejected_rows} rejected"
+        )
+
+
+def _import_rows(listing_import: ListingImport, rows: list):
+    batch_size = scheduler.app.config["LISTING_IMPORT_BATCH_SIZE"]
+    max_errors = scheduler.app.config["LISTING_IMPORT_MAX_ERRORS"]
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start : start + batch_size]
+        created, updated, errors = import_listings(
+            listing_import.seller_id, batch, first_row=start + 1
+        )
+        listing_import.processed_rows += len(batch)
+        listing_import.created_listings += created
+        listing_import.updated_listings += updated
+        listing_import.rejected_rows += len(errors)
+        kept = max_errors - len(listing_import.row_errors)
+        if errors and kept > 0:
+            listing_import.row_errors = listing_import.row_errors + errors[:kept]
+        save_progress(listing_import)
+
+
+def import_listings(seller_id: str, rows: list, first_row: int = 1) -> tuple:
+    """
+    Validate a batch of rows, and create or update their listings.
+
+    The products and the listings referenced by the batch are looked up with
+    one query each, the new listings are inserted by a multi-row INSERT and
+    the others updated by a batched UPDATE. The category counts and the
+    catalog snapshots are updated as for a single listing. The caller commits.
+
+    Args:
+        seller_id (str): The id of the seller importing the listings.
+        rows (list): The rows, as returned by read_import_rows.
+        first_row (int): The number of the first row in the file, for the
+            error reports.
+
+    Returns:
+        tuple: The numbers of listings created and updated, and the errors of
+            the rejected rows ({"row": number, "error": message}).
+    """
+    errors = []
+    valid = []
+    for number, row in enumerate(rows, start=first_row):
+        if row is None:
+            errors.append({"row": number, "error": "Invalid row"})
+            continue
+        try:
+            valid.append((number, validate_import_row.load(row)))
+        except ValidationError as err:
+            errors.append({"row": number, "error": err.messages})
+
+    categories = dict(
+        db.session.execute(
+            select(Product.id, Product.category_id).where(
+                Product.id.in_({data["product_id"] for _, data in valid})
+            )
+        )
+        .tuples()
+        .all()
+    )
+    listing_products = dict(
+        db.session.execute(
+            select(Listing.id, Listing.product_id).where(
+                Listing.id.in_({data["id"] for _, data in valid if data["id"]}),
+                Listing.seller_id == seller_id,
+            )
+        )
+        .tuples()
+        .all()
+    )
+
+    new_listings = []
+    changed_listings = []
+    for number, data in valid:
+        values = {
+            "quantity": data["quantity"],
+            "is_available": data["quantity"] != 0,
+            "price": data["price"],
+            "product_state": ProductState(data["product_state"].lower()),
+        }
+        if data["product_id"] not in categories:
+            errors.append({"row": number, "error": "Product not found"})
+        elif data["id"] is None:
+            new_listings.append(
+                {**values, "seller_id": seller_id, "product_id": data["product_id"]}
+            )
+        elif data["id"] not in listing_products:
+            errors.append({"row": number, "error": "Listing not found"})
+        elif listing_products[data["id"]] != data["product_id"]:
+            errors.append(
+                {"row": number, "error": "product_id does not match the listing"}
+            )
+        else:
+            changed_listings.append({**values, "id": data["id"]})
+
+    if new_listings:
+        db.session.execute(insert(Listing), new_listings)
+    if changed_listings:
+        db.session.execute(update(Listing), changed_listings)
+
+    # In a fixed order, so that concurrent imports lock the rows in the same order
+    added = Counter(categories[listing["product_id"]] for listing in new_listings)
+    for category_id in sorted(added):
+        add_category_counts(category_id, listings=added[category_id])
+    touched = {listing["product_id"] for listing in new_listings} | {
+        listing_products[listing["id"]] for listing in changed_listings
+    }
+    if touched:
+        touch_products(sorted(touched))
+
+    errors.sort(key=lambda error: error["row"])
+    return len(new_listings), len(changed_listings), errors
+
+
+# This module imports listings in bulk for sellers (POST
+# /seller/listings/import), instead of one create listing request each.
+
+# The route reads the file (CSV or NDJSON, with the columns of the listings
+# export: id, product_id, quantity, price and product_state), records a
+# ListingImport and answers 202 with its id; a one-off scheduler job started
+# in the same process imports the rows in batches, and GET
+# /seller/listings/imports/<id> returns its progress and the errors of the
+# rejected rows.
+
+# A row without id creates a listing, a row with the id of one of the
+# seller's listings updates its quantity, price and state, so an exported
+# file can be edited and imported back. Importing the same file twice
+# updates the same listings, but creates its new listings twice.
+
+# The rows are kept in memory until the job ends (at most
+# LISTING_IMPORT_MAX_ROWS). An import interrupted by a restart stays
+# "running": its first processed_rows rows are imported, and the rest of the
+# file has to be imported again.
@@ -0,0 +1,155 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+# Duration of every scheduled job run, labelled by the APScheduler job id
+scheduler_job_duration = Histogram(
+    "scheduler_job_duration_seconds",
+    "Time spent running a scheduled job",
+    ["job"],
+    buckets=(0.05, 0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600),
+)
+
+# Delay between the time a job was scheduled for and the time it was submitted
+scheduler_job_lag = Histogram(
+    "scheduler_job_lag_seconds",
+    "Delay between the scheduled and actual start of a job",
+    ["job"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 15, 60),
+)
+
+# Runs skipped because this process is not the scheduler leader
+scheduler_job_skipped = Counter(
+    "scheduler_job_skipped_total",
+    "Scheduled job runs skipped by non-leader processes",
+    ["job"],
+)
+
+# Whether this process holds the scheduler leader lock
+scheduler_is_leader = Gauge(
+    "scheduler_is_leader",
+    "1 if this process is the scheduler leader, 0 otherwise",
+    multiprocess_mode="livesum",
+)
+
+# Rows removed by the chunked cleanup jobs
+scheduler_cleanup_rows_deleted = Counter(
+    "scheduler_cleanup_rows_deleted_total",
+    "Rows deleted by scheduled cleanup jobs",
+    ["job"],
+)
+
+# Chunks (one transaction each) executed by the chunked cleanup jobs
+scheduler_cleanup_chunks = Counter(
+    "scheduler_cleanup_chunks_total",
+    "Delete chunks executed by scheduled cleanup jobs",
+    ["job"],
+)
+
+# Runs that stopped because the time budget ran out before the backlog was empty
+scheduler_cleanup_budget_exhausted = Counter(
+    "scheduler_cleanup_budget_exhausted_total",
+    "Cleanup runs that hit their time budget with rows still pending",
+    ["job"],
+)
+
+# Daily partitions created and dropped by the partition maintenance job
+partitions_created = Counter(
+    "partitions_created_total",
+    "Daily partitions created ahead of time",
+    ["table"],
+)
+partitions_dropped = Counter(
+    "partitions_dropped_total",
+    "Expired daily partitions dropped",
+    ["table"],
+)
+
+# Database connection pool usage, labelled by pool (primary, replicas, ...)
+db_pool_size = Gauge(
+    "db_pool_size",
+    "Configured number of persistent connections in the pool",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+db_pool_checked_out = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pool",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+db_pool_overflow = Gauge(
+    "db_pool_overflow",
+    "Overflow connections currently open beyond the pool size",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+db_pool_checkout_wait = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting to check a connection out of the pool",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+
+# Read routing decisions and replica lag (see core/replicas.py)
+db_read_routing = Counter(
+    "db_read_routing_total",
+    "Read-only requests routed to a replica or to the primary",
+    ["target", "reason"],
+)
+db_replica_lag = Gauge(
+    "db_replica_lag_seconds",
+    "Last measured replication lag of a read replica",
+    ["pool"],
+    multiprocess_mode="max",
+)
+
+
+# Buffered listing view counts (see core/view_counter.py)
+view_counter_flushes = Counter(
+    "view_counter_flushes_total",
+    "Batched view_count updates written",
+)
+view_counter_flushed_views = Counter(
+    "view_counter_flushed_views_total",
+    "Listing views written to view_count",
+)
+view_counter_flush_failures = Counter(
+    "view_counter_flush_failures_total",
+    "View count flushes that failed and were retried",
+)
+view_counter_flush_duration = Histogram(
+    "view_counter_flush_duration_seconds",
+    "Time spent writing a batch of buffered views",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5),
+)
+view_counter_pending = Gauge(
+    "view_counter_pending_listings",
+    "Listings with views buffered and not yet written",
+    multiprocess_mode="livesum",
+)
+view_counter_dropped = Counter(
+    "view_counter_dropped_total",
+    "Listing views dropped because the buffer was full",
+)
+
+# Queued order emails (see core/notifications.py)
+order_notifications_sent = Counter(
+    "order_notifications_sent_total",
+    "Queued order emails sent",
+)
+order_notifications_failed = Counter(
+    "order_notifications_failed_total",
+    "Queued order emails whose sending failed",
+)
+order_notifications_abandoned = Counter(
+    "order_notifications_abandoned_total",
+    "Queued order emails abandoned after ORDER_NOTIFICATIONS_MAX_ATTEMPTS failures",
+)
+
+# This module defines the custom Prometheus metrics exposed by the application.
+
+# prometheus_flask_exporter (set up in create_app) serves the default
+# prometheus_client registry on /metrics, so every metric declared here is
+# scraped together with the per-endpoint request metrics.
+
+# Metrics are declared once at import time and labelled by job/component, which
+# keeps the number of time series bounded.
@@ -1,5 +1,5 @@
 import enum
-from datetime import UTC, datetime
+from datetime import UTC, date, datetime
 from decimal import Decimal
 from time import time
 from typing import List, Optional
@@ -8,18 +8,25 @@ import jwt
 from flask import current_app
 from sqlalchemy import (
     CHAR,
+    DDL,
+    JSON,
     Boolean,
     Column,
     Date,
     DateTime,
+    Float,
     ForeignKey,
+    Index,
     Numeric,
+    SmallInteger,
     String,
     Table,
     Text,
     TypeDecorator,
+    event,
     func,
     select,
+    text,
 )
 from sqlalchemy import (
     Enum as SQLAlchemyEnum,
@@ -28,8 +35,8 @@ from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy_utils import create_materialized_view
 from sqlalchemy_utils.compat import _select_args
 
-from . import db
 from .base_models import BaseModel
+from .extensions import db
 
 USERS_ID_FK = "users.id"
 CUSTOMERS_ID = "customers.id"
@@ -87,6 +94,14 @@ class OrderStatus(enum.Enum):
     CANCELLED = "cancelled"
 
 
+class JobStatus(enum.Enum):
+    """Enum representing the statuses of a background job."""
+
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
 class ReviewRate(enum.Enum):
     """Enum representing possible ratings for a review."""
 
@@ -98,16 +113,34 @@ class ReviewRate(enum.Enum):
 
 
 class TokenBlocklist(BaseModel):
-    """Model for storing blocked JWT tokens."""
+    """
+    Model for storing blocked JWT tokens.
+
+    The table is range-partitioned by day on expired_at, so expired tokens are
+    removed by dropping whole partitions (see core/partitions.py). The partition
+    key has to be part of the primary key.
+    """
 
     __tablename__ = "tokens_blocklist"
+    __table_args__ = {"postgresql_partition_by": "RANGE (expired_at)"}
     id: Mapped[str] = mapped_column(
         ULID, primary_key=True, server_default=func.gen_ulid()
     )
     jti: Mapped[str] = mapped_column(String(36), index=True)
     user_id: Mapped[str] = mapped_column(ULID, ForeignKey(USERS_ID_FK))
     created_at: Mapped[datetime] = mapped_column(DateTime)
-    expired_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+    expired_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+
+
+# Catch-all partition for tokens expiring outside the pre-created daily partitions
+event.listen(
+    TokenBlocklist.__table__,
+    "after_create",
+    DDL(
+        "CREATE TABLE IF NOT EXISTS tokens_blocklist_default "
+        "PARTITION OF tokens_blocklist DEFAULT"
+    ),
+)
 
 
 class User(BaseModel):
@@ -280,15 +313,42 @@ class CustomerAddress(BaseModel):
 
 
 class ProductCategory(BaseModel):
-    """Model representing a product category."""
+    """
+    Model representing a product category.
+
+    Categories form a tree: path is the materialized path of the ancestors of
+    the category ("<root id>/.../<parent id>/", empty for a root category), so
+    that a subtree is selected by a prefix match. product_count and
+    listing_count count the products and listings of the category itself,
+    not of its subcategories, and are maintained by the routes creating and
+    deleting them (see core/category_tree.py).
+    """
 
     __tablename__ = "product_categories"
+    __table_args__ = (
+        Index(
+            "ix_product_categories_path",
+            "path",
+            postgresql_ops={"path": "text_pattern_ops"},
+        ),
+    )
     id: Mapped[str] = mapped_column(
         ULID, primary_key=True, server_default=func.gen_ulid()
     )
     title: Mapped[str] = mapped_column(String(32), unique=True)
+    parent_id: Mapped[Optional[str]] = mapped_column(
+        ULID, ForeignKey("product_categories.id")
+    )
+    path: Mapped[str] = mapped_column(String(512), default="", server_default="")
+    product_count: Mapped[int] = mapped_column(default=0, server_default="0")
+    listing_count: Mapped[int] = mapped_column(default=0, server_default="0")
     product: Mapped[List["Product"]] = relationship(back_populates="category")
 
+    @property
+    def subtree_path(self) -> str:
+        """The path of the subcategories of this category."""
+        return f"{self.path}{self.id}/"
+
 
 ProductWordOccurrence = Table(
     "product_word_occurrences",
@@ -314,6 +374,10 @@ class Product(BaseModel):
     """Model representing a product."""
 
     __tablename__ = "products"
+    __table_args__ = (
+        Index("ix_products_category_id", "category_id"),
+        Index("ix_products_updated_at", "updated_at"),
+    )
     id: Mapped[str] = mapped_column(
         ULID, primary_key=True, server_default=func.gen_ulid()
     )
@@ -321,6 +385,11 @@ class Product(BaseModel):
     description: Mapped[str] = mapped_column(Text)
     image_src: Mapped[str] = mapped_column(Text)
     category_id: Mapped[str] = mapped_column(ULID, ForeignKey("product_categories.id"))
+    # Time of the last change of the product or of its listings' prices, read
+    # by the catalog snapshots (see core/catalog_snapshot.py)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=func.now(), onupdate=func.now(), server_default=func.now()
+    )
 
     category: Mapped["ProductCategory"] = relationship(back_populates="product")
     listing: Mapped[Optional[List["Listing"]]] = relationship(back_populates="product")
@@ -333,6 +402,15 @@ class Listing(BaseModel):
     """Model representing a product listing by a seller."""
 
     __tablename__ = "listings"
+    __table_args__ = (
+        Index("ix_listings_product_id_price", "product_id", "price"),
+        Index("ix_listings_product_state_price", "product_state", "price"),
+        Index(
+            "ix_listings_available_price",
+            "price",
+            postgresql_where=text("is_available"),
+        ),
+    )
 
     id: Mapped[str] = mapped_column(
         ULID, primary_key=True, server_default=func.gen_ulid()
@@ -364,6 +442,10 @@ class ListingReview(BaseModel):
     """Model representing a review for a product listing."""
 
     __tablename__ = "reviews"
+    # Serves the latest reviews of a listing without sorting all of them
+    __table_args__ = (
+        Index("ix_reviews_listing_id_created_at", "listing_id", "created_at", "id"),
+    )
     id: Mapped[str] = mapped_column(
         ULID, primary_key=True, server_default=func.gen_ulid()
     )
@@ -459,10 +541,13 @@ class OrderEntry(BaseModel):
     """
 
     __tablename__ = "order_entries"
+    __table_args__ = (Index("ix_order_entries_order_id", "order_id"),)
     id: Mapped[str] = mapped_column(
         ULID, primary_key=True, server_default=func.gen_ulid()
     )
     quantity: Mapped[int]
+    # Listing price when the order was placed (NULL for older orders)
+    unit_price: Mapped[Optional[Decimal]] = mapped_column(Numeric(10, 2))
     order_id: Mapped[str] = mapped_column(ULID, ForeignKey("orders.id"))
     listing_id: Mapped[str] = mapped_column(ULID, ForeignKey(LISTINGS_ID))
 
@@ -478,6 +563,11 @@ class Order(BaseModel):
     """
 
     __tablename__ = "orders"
+    # Serves the per-customer order history and the archiving job
+    __table_args__ = (
+        Index("ix_orders_customer_id_purchased_at", "customer_id", "purchased_at"),
+        Index("ix_orders_purchased_at", "purchased_at"),
+    )
     id: Mapped[str] = mapped_column(
         ULID, primary_key=True, server_default=func.gen_ulid()
     )
@@ -495,6 +585,141 @@ class Order(BaseModel):
     customer: Mapped["Customer"] = relationship(back_populates="order")
 
 
+class ArchivedOrderEntry(BaseModel):
+    """
+    Model representing an item of an archived order.
+
+    Same columns as OrderEntry; rows are moved here together with their order.
+    """
+
+    __tablename__ = "archived_order_entries"
+    __table_args__ = (Index("ix_archived_order_entries_order_id", "order_id"),)
+    id: Mapped[str] = mapped_column(ULID, primary_key=True)
+    quantity: Mapped[int]
+    unit_price: Mapped[Optional[Decimal]] = mapped_column(Numeric(10, 2))
+    order_id: Mapped[str] = mapped_column(
+        ULID, ForeignKey("archived_orders.id", ondelete="cascade")
+    )
+    listing_id: Mapped[str] = mapped_column(ULID, ForeignKey(LISTINGS_ID))
+
+    order: Mapped["ArchivedOrder"] = relationship(back_populates="order_entries")
+    listing: Mapped["Listing"] = relationship()
+
+
+class ArchivedOrder(BaseModel):
+    """
+    Model representing a delivered or cancelled order moved out of the orders table.
+
+    Same columns as Order. Orders are archived by a scheduled job once they
+    are older than ORDERS_ARCHIVE_AFTER_DAYS (see core/scheduler_jobs.py).
+    """
+
+    __tablename__ = "archived_orders"
+    __table_args__ = (
+        Index(
+            "ix_archived_orders_customer_id_purchased_at",
+            "customer_id",
+            "purchased_at",
+        ),
+    )
+    id: Mapped[str] = mapped_column(ULID, primary_key=True)
+    price: Mapped[Decimal] = mapped_column(Numeric(10, 2))
+    order_status: Mapped[OrderStatus] = mapped_column(SQLAlchemyEnum(OrderStatus))
+    purchased_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    address_street: Mapped[str] = mapped_column(String(128))
+    address_city: Mapped[str] = mapped_column(String(64))
+    address_state: Mapped[str] = mapped_column(String(64))
+    address_country: Mapped[str] = mapped_column(String(64))
+    address_postal_code: Mapped[str] = mapped_column(String(32))
+    customer_id: Mapped[str] = mapped_column(
+        ULID, ForeignKey(CUSTOMERS_ID, ondelete="cascade")
+    )
+
+    order_entries: Mapped[List["ArchivedOrderEntry"]] = relationship(
+        back_populates="order"
+    )
+
+
+class SellerDailySales(BaseModel):
+    """
+    Model holding a seller's sales of one day, maintained as orders change.
+
+    Cancelled orders are not counted. See core/seller_rollups.py.
+    """
+
+    __tablename__ = "seller_daily_sales"
+    seller_id: Mapped[str] = mapped_column(
+        ULID, ForeignKey("sellers.id", ondelete="cascade"), primary_key=True
+    )
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    orders: Mapped[int] = mapped_column(default=0)
+    units: Mapped[int] = mapped_column(default=0)
+    revenue: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=0)
+
+
+class SellerListingSales(BaseModel):
+    """Model holding the all-time sales of a listing, maintained as orders change."""
+
+    __tablename__ = "seller_listing_sales"
+    listing_id: Mapped[str] = mapped_column(
+        ULID, ForeignKey(LISTINGS_ID, ondelete="cascade"), primary_key=True
+    )
+    seller_id: Mapped[str] = mapped_column(
+        ULID, ForeignKey("sellers.id", ondelete="cascade"), index=True
+    )
+    units: Mapped[int] = mapped_column(default=0)
+    revenue: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=0)
+
+
+class SellerOrderStatusCount(BaseModel):
+    """Model holding the number of a seller's orders in each status."""
+
+    __tablename__ = "seller_order_status_counts"
+    seller_id: Mapped[str] = mapped_column(
+        ULID, ForeignKey("sellers.id", ondelete="cascade"), primary_key=True
+    )
+    order_status: Mapped[OrderStatus] = mapped_column(
+        SQLAlchemyEnum(OrderStatus), primary_key=True
+    )
+    orders: Mapped[int] = mapped_column(default=0)
+
+
+class OrderNotification(BaseModel):
+    """
+    Model representing an order email waiting to be sent to a customer.
+
+    Notifications are inserted in the transaction that changes the order and
+    sent in batches by a scheduled job (see core/scheduler_jobs.py). The
+    order is not a foreign key, so that orders can be archived before their
+    notification is sent.
+    """
+
+    __tablename__ = "order_notifications"
+    __table_args__ = (
+        Index(
+            "ix_order_notifications_pending",
+            "created_at",
+            postgresql_where=text("sent_at IS NULL"),
+        ),
+    )
+    id: Mapped[str] = mapped_column(
+        ULID, primary_key=True, server_default=func.gen_ulid()
+    )
+    kind: Mapped[str] = mapped_column(String(32))
+    order_id: Mapped[str] = mapped_column(ULID)
+    customer_id: Mapped[str] = mapped_column(
+        ULID, ForeignKey(CUSTOMERS_ID, ondelete="cascade")
+    )
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    # Failed sends; the notification is retried once per
+    # ORDER_NOTIFICATIONS_INTERVAL, and abandoned after
+    # ORDER_NOTIFICATIONS_MAX_ATTEMPTS
+    attempts: Mapped[int] = mapped_column(default=0)
+    last_attempt_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    last_error: Mapped[Optional[str]] = mapped_column(Text)
+
+
 class DeleteRequest(BaseModel):
     """
     Model representing a user's request to delete their account.
@@ -514,6 +739,124 @@ class DeleteRequest(BaseModel):
     user: Mapped["User"] = relationship(back_populates="delete_request")
 
 
+class BackgroundJobMixin:
+    """
+    Status columns of a model tracking a background job.
+
+    The job is run by core/background_jobs.py, which records its progress
+    (updated_at) and its outcome here.
+    """
+
+    status: Mapped[JobStatus] = mapped_column(
+        SQLAlchemyEnum(JobStatus), default=JobStatus.RUNNING
+    )
+    error: Mapped[Optional[str]] = mapped_column(Text)
+    started_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(DateTime)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+
+class CategoryDeletion(BackgroundJobMixin, BaseModel):
+    """
+    Model tracking the deletion of a large product category.
+
+    The products are moved to the target category in chunks by a background
+    job (see core/category_deletion.py), which records its progress here.
+    The category ids are not foreign keys, as the category is deleted at the
+    end of the job.
+    """
+
+    __tablename__ = "category_deletions"
+    id: Mapped[str] = mapped_column(
+        ULID, primary_key=True, server_default=func.gen_ulid()
+    )
+    category_id: Mapped[str] = mapped_column(ULID)
+    category_title: Mapped[str] = mapped_column(String(32))
+    target_id: Mapped[str] = mapped_column(ULID)
+    total_products: Mapped[int] = mapped_column(default=0)
+    moved_products: Mapped[int] = mapped_column(default=0)
+
+
+class ListingImport(BackgroundJobMixin, BaseModel):
+    """
+    Model tracking a bulk import of listings by a seller.
+
+    The rows are validated and written in batches by a background job (see
+    core/listing_import.py), which records its progress and the errors of the
+    rejected rows here.
+    """
+
+    __tablename__ = "listing_imports"
+    id: Mapped[str] = mapped_column(
+        ULID, primary_key=True, server_default=func.gen_ulid()
+    )
+    seller_id: Mapped[str] = mapped_column(
+        ULID, ForeignKey("sellers.id", ondelete="cascade"), index=True
+    )
+    total_rows: Mapped[int] = mapped_column(default=0)
+    processed_rows: Mapped[int] = mapped_column(default=0)
+    created_listings: Mapped[int] = mapped_column(default=0)
+    updated_listings: Mapped[int] = mapped_column(default=0)
+    rejected_rows: Mapped[int] = mapped_column(default=0)
+    # The first LISTING_IMPORT_MAX_ERRORS rejected rows: [{"row": n, "error": ...}]
+    row_errors: Mapped[list] = mapped_column(JSON, default=list)
+
+
+class ListingActivity(BaseModel):
+    """
+    Model holding a listing's counters as of the last rankings computation.
+
+    The difference with the current counters is the activity since then,
+    which is added to the decayed trending score.
+    """
+
+    __tablename__ = "listing_activity"
+    listing_id: Mapped[str] = mapped_column(
+        ULID, ForeignKey(LISTINGS_ID, ondelete="cascade"), primary_key=True
+    )
+    view_count: Mapped[int]
+    purchase_count: Mapped[int]
+    trending_score: Mapped[float] = mapped_column(Float)
+    updated_at: Mapped[datetime] = mapped_column(DateTime)
+
+
+class ListingRanking(BaseModel):
+    """Model representing a position in the precomputed top listings of a category."""
+
+    __tablename__ = "listing_rankings"
+    ranking: Mapped[str] = mapped_column(String(16), primary_key=True)
+    category_id: Mapped[str] = mapped_column(
+        ULID, ForeignKey("product_categories.id", ondelete="cascade"), primary_key=True
+    )
+    position: Mapped[int] = mapped_column(primary_key=True)
+    listing_id: Mapped[str] = mapped_column(
+        ULID, ForeignKey(LISTINGS_ID, ondelete="cascade")
+    )
+    score: Mapped[float] = mapped_column(Float)
+    computed_at: Mapped[datetime] = mapped_column(DateTime)
+
+
+class ListingFacet(BaseModel):
+    """
+    Model holding the number of listings of a combination of facet values.
+
+    The table is rebuilt periodically from the listings (see core/facets.py)
+    and answers the facet counts of the listing search.
+    """
+
+    __tablename__ = "listing_facets"
+    category_id: Mapped[str] = mapped_column(
+        ULID, ForeignKey("product_categories.id", ondelete="cascade"), primary_key=True
+    )
+    product_state: Mapped[ProductState] = mapped_column(
+        SQLAlchemyEnum(ProductState), primary_key=True
+    )
+    price_bucket: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    rating_floor: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    is_available: Mapped[bool] = mapped_column(primary_key=True)
+    listing_count: Mapped[int]
+
+
 class WordOccurrence(BaseModel):
     """
     Model representing the occurrence of words in product descriptions.
@@ -0,0 +1,172 @@
+import smtplib
+from datetime import UTC, datetime, timedelta
+
+from flask import current_app, render_template
+from flask_mail import Message
+from sqlalchemy import insert, or_, select, update
+
+from .extensions import db, email_manager
+from .metrics import order_notifications_abandoned
+from .models import OrderNotification, User
+
+ORDER_CANCELLED = "order_cancelled"
+
+# Subject and template of each kind of notification
+NOTIFICATION_EMAILS = {
+    ORDER_CANCELLED: ("ShopSphere Order Cancellation", "order_cancellation.html"),
+}
+
+
+def enqueue_order_notifications(kind: str, orders):
+    """
+    Queue one email per order, to be sent by the order_notifications job.
+
+    All the notifications are inserted by a single statement, in the caller's
+    transaction: they are only sent if the order change is committed.
+
+    Args:
+        kind (str): The kind of notification, a key of NOTIFICATION_EMAILS.
+        orders (list): (order_id, customer_id) pairs.
+    """
+    if not orders:
+        return
+
+    db.session.execute(
+        insert(OrderNotification),
+        [
+            {"kind": kind, "order_id": order_id, "customer_id": customer_id}
+            for order_id, customer_id in orders
+        ],
+    )
+
+
+def send_order_notifications_batch(
+    batch_size: int, max_attempts: int, retry_after: timedelta
+) -> tuple:
+    """
+    Send one batch of queued order emails over a single SMTP connection.
+
+    The batch is locked with SKIP LOCKED, and the emails sent are marked as
+    sent in the caller's transaction, committed after the batch: a crash
+    before the commit resends at most batch_size emails. An email refused by
+    the mail server (e.g. an invalid recipient) has its failure recorded and
+    does not stop the batch; it is retried retry_after later, and abandoned
+    after max_attempts failures. A lost connection stops the batch after
+    recording the failure of the email being sent.
+
+    Args:
+        batch_size (int): The maximum number of emails to send.
+        max_attempts (int): The number of failures after which an email is
+            abandoned.
+        retry_after (timedelta): The time before a failed email is retried.
+
+    Returns:
+        tuple: The numbers of emails sent and failed, and whether the batch
+            was stopped by a lost connection.
+    """
+    pending = db.session.execute(
+        select(
+            OrderNotification.id,
+            OrderNotification.kind,
+            OrderNotification.order_id,
+            OrderNotification.attempts,
+            User.email,
+        )
+        .join(User, OrderNotification.customer_id == User.id)
+        .where(
+            OrderNotification.sent_at.is_(None),
+            OrderNotification.attempts < max_attempts,
+            or_(
+                OrderNotification.last_attempt_at.is_(None),
+                OrderNotification.last_attempt_at < datetime.now(UTC) - retry_after,
+            ),
+        )
+        .order_by(OrderNotification.created_at)
+        .limit(batch_size)
+        .with_for_update(of=OrderNotification, skip_locked=True)
+    ).all()
+
+    if not pending:
+        return 0, 0, False
+
+    sender = current_app.config["MAIL_DEFAULT_SENDER"]
+    sent = []
+    failed = 0
+    connected = interrupted = False
+    try:
+        with email_manager.connect() as connection:
+            connected = True
+            for notification in pending:
+                subject, template = NOTIFICATION_EMAILS[notification.kind]
+                message = Message(
+                    subject, sender=sender, recipients=[notification.email]
+                )
+                message.html = render_template(
+                    template,
+                    username=notification.email.split("@")[0],
+                    order_id=notification.order_id,
+                )
+                try:
+                    connection.send(message)
+                except smtplib.SMTPServerDisconnected as e:
+                    _record_failure(notification, e, max_attempts)
+                    failed += 1
+                    interrupted = True
+                    break
+                except smtplib.SMTPException as e:
+                    # Before OSError, which SMTPException derives from
+                    _record_failure(notification, e, max_attempts)
+                    failed += 1
+                    continue
+                except OSError as e:
+                    _record_failure(notification, e, max_attempts)
+                    failed += 1
+                    interrupted = True
+                    break
+                sent.append(notification.id)
+    except (smtplib.SMTPServerDisconnected, OSError):
+        # Without a connection nothing was sent: the whole batch is retried.
+        # Otherwise the error comes from closing a connection already lost.
+        if not connected:
+            raise
+
+    if sent:
+        db.session.execute(
+            update(OrderNotification)
+            .where(OrderNotification.id.in_(sent))
+            .values(sent_at=datetime.now(UTC))
+            .execution_options(synchronize_session=False)
+        )
+    return len(sent), failed, interrupted
+
+
+def _record_failure(notification, error, max_attempts):
+    db.session.execute(
+        update(OrderNotification)
+        .where(OrderNotification.id == notification.id)
+        .values(
+            attempts=OrderNotification.attempts + 1,
+            last_attempt_at=datetime.now(UTC),
+            last_error=str(error),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if notification.attempts + 1 >= max_attempts:
+        order_notifications_abandoned.inc()
+        current_app.logger.warning(
+            f"order notification {notification.id} abandoned after "
+            f"{max_attempts} attempts: {error}"
+        )
+
+
+# This module queues the emails sent to customers when their orders change, in
+# the order_notifications table (a transactional outbox).
+
+# Routes that change many orders at once (e.g. the seller bulk status update)
+# queue their emails with enqueue_order_notifications instead of sending them
+# inline, so that the request does not wait on the mail server and the emails
+# follow the commit of the change. The order_notifications job
+# (core/scheduler_jobs.py) sends them in batches of
+# ORDER_NOTIFICATIONS_BATCH_SIZE, one SMTP connection and one transaction per
+# batch. Failures are recorded per email (attempts, last_error), so a refused
+# recipient neither blocks the queue nor makes the emails before it resent.
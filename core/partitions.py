@@ -0,0 +1,168 @@
+from datetime import UTC, date, datetime, timedelta
+from typing import Dict, List, Tuple
+
+from sqlalchemy import text
+
+from .extensions import db
+from .metrics import partitions_created, partitions_dropped
+
+PARTITION_SUFFIX_FORMAT = "%Y%m%d"
+
+
+def daily_partition_name(table_name: str, day: date) -> str:
+    """
+    Build the name of the daily partition of a table.
+
+    Args:
+        table_name (str): The name of the partitioned (parent) table.
+        day (date): The first day covered by the partition.
+
+    Returns:
+        str: The partition name, e.g. 'tokens_blocklist_p20240131'.
+    """
+    return f"{table_name}_p{day.strftime(PARTITION_SUFFIX_FORMAT)}"
+
+
+def list_daily_partitions(table_name: str) -> Dict[str, date]:
+    """
+    List the daily partitions currently attached to a table.
+
+    Only partitions following the daily_partition_name convention are
+    returned; the default partition is ignored.
+
+    Args:
+        table_name (str): The name of the partitioned (parent) table.
+
+    Returns:
+        Dict[str, date]: A mapping of partition name to the first day it covers.
+    """
+    rows = db.session.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = :table_name"
+        ),
+        {"table_name": table_name},
+    ).scalars()
+
+    prefix = f"{table_name}_p"
+    partitions = {}
+    for name in rows:
+        if not name.startswith(prefix):
+            continue
+        try:
+            partitions[name] = datetime.strptime(
+                name[len(prefix) :], PARTITION_SUFFIX_FORMAT
+            ).date()
+        except ValueError:
+            continue
+    return partitions
+
+
+def create_daily_partitions(table_name: str, start: date, days: int) -> List[str]:
+    """
+    Create the missing daily partitions of a range-partitioned table.
+
+    Each partition covers [day, day + 1). Existing partitions are left untouched.
+
+    Args:
+        table_name (str): The name of the partitioned (parent) table.
+        start (date): The first day to create a partition for.
+        days (int): How many consecutive days to cover, starting from `start`.
+
+    Returns:
+        List[str]: The names of the partitions that were created.
+    """
+    existing = list_daily_partitions(table_name)
+    created = []
+
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        name = daily_partition_name(table_name, day)
+        if name in existing:
+            continue
+
+        db.session.execute(
+            text(
+                f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table_name}" '
+                f"FOR VALUES FROM ('{day.isoformat()}') "
+                f"TO ('{(day + timedelta(days=1)).isoformat()}')"
+            )
+        )
+        created.append(name)
+
+    db.session.commit()
+    return created
+
+
+def drop_daily_partitions_before(table_name: str, cutoff: date) -> List[str]:
+    """
+    Drop every daily partition whose whole range lies before `cutoff`.
+
+    Dropping a partition removes all of its rows at once, without scanning
+    them or generating per-row dead tuples.
+
+    Args:
+        table_name (str): The name of the partitioned (parent) table.
+        cutoff (date): Partitions ending on or before this day are dropped.
+
+    Returns:
+        List[str]: The names of the partitions that were dropped.
+    """
+    dropped = []
+
+    for name, day in sorted(list_daily_partitions(table_name).items()):
+        if day + timedelta(days=1) > cutoff:
+            continue
+
+        db.session.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
+        dropped.append(name)
+
+    db.session.commit()
+    return dropped
+
+
+def maintain_daily_partitions(
+    table_name: str, lookahead_days: int, retention_days: int = 0
+) -> Tuple[List[str], List[str]]:
+    """
+    Create the upcoming daily partitions of a table and drop the expired ones.
+
+    Args:
+        table_name (str): The name of the partitioned (parent) table.
+        lookahead_days (int): How many days after today must already have a partition.
+        retention_days (int): How many full days before today are kept.
+
+    Returns:
+        Tuple[List[str], List[str]]: The names of the created and dropped partitions.
+    """
+    today = datetime.now(UTC).date()
+
+    created = create_daily_partitions(table_name, today, lookahead_days + 1)
+    dropped = drop_daily_partitions_before(
+        table_name, today - timedelta(days=retention_days)
+    )
+
+    partitions_created.labels(table=table_name).inc(len(created))
+    partitions_dropped.labels(table=table_name).inc(len(dropped))
+
+    return created, dropped
+
+
+# This module contains helpers to manage PostgreSQL declarative range partitions.
+
+# Tables partitioned by day (e.g. tokens_blocklist on expired_at) get one child
+# table per day named <table>_pYYYYMMDD, plus a <table>_default partition that
+# catches rows outside the pre-created ranges.
+
+# The scheduler calls maintain_daily_partitions to keep a few days of partitions
+# ready ahead of time and to expire whole days of data in O(1) by dropping
+# their partitions, instead of deleting rows one by one.
+
+# Partitions must be created before rows for their day are inserted: once the
+# default partition holds rows for a day, PostgreSQL refuses to create that
+# day's partition. Keep the lookahead larger than any expected scheduler outage.
+
+# Note: table names are interpolated into the DDL, so these helpers must only be
+# called with the application's own table names, never with user input.
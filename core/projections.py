@@ -0,0 +1,239 @@
+from sqlalchemy import case, func, select, true
+from sqlalchemy.orm import aliased
+
+from .models import (
+    Listing,
+    ListingReview,
+    Product,
+    ProductCategory,
+    ReviewRate,
+    Seller,
+    User,
+)
+
+# Users appear in the same query both as sellers and as review authors
+seller_user = aliased(User, name="seller_user")
+customer_user = aliased(User, name="customer_user")
+
+# Numeric value of a review rating (the enum is stored by name)
+review_rating_value = case(
+    {rate.name: rate.value for rate in ReviewRate},
+    value=ListingReview.rating,
+)
+
+
+class Projection:
+    """
+    A named set of columns selected together instead of full ORM entities.
+
+    Queries built from a projection return Row tuples whose attributes are the
+    projection's field names. Only the listed columns are fetched, so the
+    models' large columns (descriptions, profile images, password hashes) and
+    their relationships are never loaded.
+    """
+
+    def __init__(self, **columns):
+        self.columns = columns
+        self._labeled = tuple(
+            column.label(name) for name, column in self.columns.items()
+        )
+
+    def select(self, *extra_columns):
+        """
+        Build a SELECT of the projection's columns.
+
+        The caller adds the FROM clause (select_from/join), filters, ordering
+        and pagination.
+
+        Args:
+            *extra_columns: Additional columns or labeled expressions to select.
+
+        Returns:
+            Select: The SELECT statement.
+        """
+        return select(*self._labeled, *extra_columns)
+
+    def extend(self, **columns) -> "Projection":
+        """
+        Build a new projection with additional columns.
+
+        Args:
+            **columns: The additional columns, by field name.
+
+        Returns:
+            Projection: The extended projection.
+        """
+        return Projection(**self.columns, **columns)
+
+
+product_details = Projection(
+    id=Product.id,
+    name=Product.name,
+    description=Product.description,
+    image_src=Product.image_src,
+    category=ProductCategory.title,
+)
+
+# Select from User; the profile image and the password hash are not exported
+exported_user = Projection(
+    id=User.id,
+    email=User.email,
+    name=User.name,
+    surname=User.surname,
+    birth_date=User.birth_date,
+    phone_number=User.phone_number,
+    user_type=User.user_type,
+    is_verified=User.is_verified,
+    created_at=User.created_at,
+    modified_at=User.modified_at,
+    verified_on=User.verified_on,
+)
+
+# Select from Listing joined with seller_user
+listing_offer = Projection(
+    id=Listing.id,
+    price=Listing.price,
+    quantity=Listing.quantity,
+    is_available=Listing.is_available,
+    product_state=Listing.product_state,
+    purchase_count=Listing.purchase_count,
+    view_count=Listing.view_count,
+    seller_id=seller_user.id,
+    seller_name=seller_user.name,
+)
+
+# Select from Listing joined with Product and ProductCategory
+seller_listing = Projection(
+    id=Listing.id,
+    price=Listing.price,
+    quantity=Listing.quantity,
+    is_available=Listing.is_available,
+    product_state=Listing.product_state,
+    purchase_count=Listing.purchase_count,
+    view_count=Listing.view_count,
+    product_id=Product.id,
+    product_name=Product.name,
+    product_description=Product.description,
+    product_image_src=Product.image_src,
+    product_category=ProductCategory.title,
+)
+
+# Select from Listing joined with seller_user, Product and ProductCategory
+ranked_listing = listing_offer.extend(
+    product_id=Product.id,
+    product_name=Product.name,
+    product_image_src=Product.image_src,
+    product_category=ProductCategory.title,
+)
+
+# Select from Listing joined with Seller, Product and ProductCategory
+searched_listing = Projection(
+    id=Listing.id,
+    price=Listing.price,
+    quantity=Listing.quantity,
+    is_available=Listing.is_available,
+    product_state=Listing.product_state,
+    seller_id=Seller.id,
+    seller_company_name=Seller.company_name,
+    seller_rating=Seller.rating,
+    product_id=Product.id,
+    product_name=Product.name,
+    product_image_src=Product.image_src,
+    product_category=ProductCategory.title,
+)
+
+# Select from ListingReview joined with customer_user
+listing_review = Projection(
+    id=ListingReview.id,
+    listing_id=ListingReview.listing_id,
+    title=ListingReview.title,
+    description=ListingReview.description,
+    rating=ListingReview.rating,
+    created_at=ListingReview.created_at,
+    modified_at=ListingReview.modified_at,
+    customer_id=customer_user.id,
+    customer_name=customer_user.name,
+)
+
+
+def latest_listing_reviews(listing_ids, per_listing: int):
+    """
+    Build a query of the latest reviews of each listing, at most per_listing each.
+
+    Each listing's reviews are read by a LATERAL subquery ordered by
+    (created_at, id) with a LIMIT, which walks the
+    ix_reviews_listing_id_created_at index and stops after per_listing rows,
+    however many reviews the listing has.
+
+    Args:
+        listing_ids (list): The ids of the listings.
+        per_listing (int): The maximum number of reviews per listing.
+
+    Returns:
+        Select: A query of listing_review rows, newest first within each listing.
+    """
+    latest = (
+        listing_review.select()
+        .select_from(ListingReview)
+        .join(customer_user, ListingReview.customer_id == customer_user.id)
+        .where(ListingReview.listing_id == Listing.id)
+        .order_by(ListingReview.created_at.desc(), ListingReview.id.desc())
+        .limit(per_listing)
+        .lateral("latest_reviews")
+    )
+
+    return (
+        select(latest)
+        .select_from(Listing)
+        .join(latest, true())
+        .where(Listing.id.in_(listing_ids))
+    )
+
+
+def listing_rating_summaries(listing_ids):
+    """
+    Build a query of the rating summary of each listing.
+
+    Args:
+        listing_ids (list): The ids of the listings.
+
+    Returns:
+        Select: One row per listing with at least one review: listing_id, count,
+            average and rated_1 ... rated_5 (the number of reviews per rating).
+    """
+    return (
+        select(
+            ListingReview.listing_id,
+            func.count(ListingReview.id).label("count"),
+            func.avg(review_rating_value).label("average"),
+            *(
+                func.count(ListingReview.id)
+                .filter(ListingReview.rating == rate)
+                .label(f"rated_{rate.value}")
+                for rate in ReviewRate
+            ),
+        )
+        .where(ListingReview.listing_id.in_(listing_ids))
+        .group_by(ListingReview.listing_id)
+    )
+
+
+# This module defines the column projections used by the read-heavy routes.
+
+# A projection lists the columns a response needs; the route builds the rest
+# of the query and reads the resulting rows by field name:
+#   rows = db.session.execute(
+#       listing_offer.select()
+#       .select_from(Listing)
+#       .join(seller_user, Listing.seller_id == seller_user.id)
+#       .where(Listing.product_id == product_id)
+#   ).all()
+#   rows[0].seller_name
+
+# Compared to loading entities, rows skip the identity map, change tracking and
+# relationship loading, and hold only the selected values.
+
+# Sellers and customers are read through aliases of the users table (their
+# names live there), which avoids joining the sellers/customers tables.
+
+# latest_listing_reviews uses LATERAL, which is specific to PostgreSQL.
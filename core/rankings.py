@@ -0,0 +1,346 @@
+import heapq
+import threading
+from itertools import chain
+from time import monotonic
+
+from sqlalchemy import delete, func, literal, select
+from sqlalchemy.dialects.postgresql import insert
+
+from .extensions import db
+from .models import Listing, ListingActivity, ListingRanking, Product, ProductCategory
+from .projections import ranked_listing, seller_user
+from .view_counter import view_counter
+
+POPULAR = "popular"
+TRENDING = "trending"
+RANKINGS = (POPULAR, TRENDING)
+
+
+def update_listing_activity(config):
+    """
+    Snapshot the listing counters and update the decayed trending scores.
+
+    The trending score of every listing is decayed by half for each
+    RANKINGS_TRENDING_HALF_LIFE seconds since the previous snapshot, then
+    increased by the views and purchases made since then. Listings without a
+    snapshot count all their views and purchases as new activity.
+
+    Args:
+        config (dict): The application configuration.
+
+    Returns:
+        int: The number of listings updated.
+    """
+    now = func.localtimestamp()
+    elapsed = func.extract("epoch", now - ListingActivity.updated_at)
+    decay = func.power(0.5, elapsed / config["RANKINGS_TRENDING_HALF_LIFE"])
+
+    new_views = func.greatest(
+        Listing.view_count - func.coalesce(ListingActivity.view_count, 0), 0
+    )
+    new_purchases = func.greatest(
+        Listing.purchase_count - func.coalesce(ListingActivity.purchase_count, 0), 0
+    )
+    trending_score = (
+        func.coalesce(ListingActivity.trending_score * decay, 0)
+        + config["RANKINGS_VIEW_WEIGHT"] * new_views
+        + config["RANKINGS_PURCHASE_WEIGHT"] * new_purchases
+    )
+
+    snapshot = select(
+        Listing.id,
+        Listing.view_count,
+        Listing.purchase_count,
+        trending_score,
+        now,
+    ).outerjoin(ListingActivity, ListingActivity.listing_id == Listing.id)
+
+    statement = insert(ListingActivity).from_select(
+        ["listing_id", "view_count", "purchase_count", "trending_score", "updated_at"],
+        snapshot,
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[ListingActivity.listing_id],
+        set_={
+            "view_count": statement.excluded.view_count,
+            "purchase_count": statement.excluded.purchase_count,
+            "trending_score": statement.excluded.trending_score,
+            "updated_at": statement.excluded.updated_at,
+        },
+    )
+    return db.session.execute(statement).rowcount
+
+
+def rebuild_listing_rankings(config):
+    """
+    Replace the top RANKINGS_TOP_K listings of each category and ranking.
+
+    Only listings that can be bought are ranked. The popular ranking scores
+    the all-time views and purchases, the trending ranking uses the decayed
+    score computed by update_listing_activity.
+
+    Args:
+        config (dict): The application configuration.
+
+    Returns:
+        int: The number of ranking rows written.
+    """
+    popular_score = (
+        config["RANKINGS_VIEW_WEIGHT"] * Listing.view_count
+        + config["RANKINGS_PURCHASE_WEIGHT"] * Listing.purchase_count
+    )
+    scores = {
+        POPULAR: popular_score,
+        TRENDING: ListingActivity.trending_score,
+    }
+
+    db.session.execute(delete(ListingRanking))
+
+    written = 0
+    for ranking, score in scores.items():
+        ranked = (
+            select(
+                literal(ranking).label("ranking"),
+                Product.category_id,
+                func.row_number()
+                .over(
+                    partition_by=Product.category_id,
+                    order_by=(score.desc(), Listing.id),
+                )
+                .label("position"),
+                Listing.id.label("listing_id"),
+                score.label("score"),
+                func.localtimestamp().label("computed_at"),
+            )
+            .select_from(Listing)
+            .join(Product, Listing.product_id == Product.id)
+            .join(ListingActivity, ListingActivity.listing_id == Listing.id)
+            .where(Listing.is_available, Listing.quantity > 0)
+            .subquery()
+        )
+
+        written += db.session.execute(
+            insert(ListingRanking).from_select(
+                [
+                    "ranking",
+                    "category_id",
+                    "position",
+                    "listing_id",
+                    "score",
+                    "computed_at",
+                ],
+                select(ranked).where(ranked.c.position <= config["RANKINGS_TOP_K"]),
+            )
+        ).rowcount
+
+    return written
+
+
+class ListingRankings:
+    """
+    In-memory copy of the precomputed popular and trending listings.
+
+    Each process loads the listing_rankings table when a new computation is
+    available, checking at most every RANKINGS_REFRESH_INTERVAL seconds, and
+    serves the rankings from memory. Between computations, the views flushed
+    and the purchases made by this process are added to the scores of the
+    listings they concern and the rankings are re-sorted.
+    """
+
+    def __init__(self, app=None):
+        self.refresh_interval = 0
+        self.view_weight = 0
+        self.purchase_weight = 0
+        self.computed_at = None
+        self._checked_at = None
+        self._rankings = {}
+        self._entries_by_listing = {}
+        self._mutex = threading.Lock()
+        self._refresh_mutex = threading.Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Read the rankings configuration and follow the flushed listing views.
+
+        Args:
+            app (Flask): The Flask application instance.
+        """
+        self.refresh_interval = app.config["RANKINGS_REFRESH_INTERVAL"]
+        self.view_weight = app.config["RANKINGS_VIEW_WEIGHT"]
+        self.purchase_weight = app.config["RANKINGS_PURCHASE_WEIGHT"]
+
+        view_counter.add_flush_listener(self.record_views)
+
+    def top(self, ranking: str, category: str = None, limit: int = 10) -> list:
+        """
+        Get the top listings of a ranking.
+
+        Must be called within an application context, as the rankings are
+        reloaded first if a newer computation is available.
+
+        Args:
+            ranking (str): "popular" or "trending".
+            category (str): The title of a category, or None for all categories.
+            limit (int): The maximum number of listings.
+
+        Returns:
+            list: The listings, best first, with their score and rank.
+        """
+        self.refresh_if_stale()
+
+        with self._mutex:
+            if category is not None:
+                entries = self._rankings.get((ranking, category), [])[:limit]
+            else:
+                # The overall top listings are among the top of their category
+                entries = heapq.nlargest(
+                    limit,
+                    chain.from_iterable(
+                        entries
+                        for (name, _), entries in self._rankings.items()
+                        if name == ranking
+                    ),
+                    key=lambda entry: entry["score"],
+                )
+
+            return [
+                dict(entry, rank=rank) for rank, entry in enumerate(entries, start=1)
+            ]
+
+    def refresh_if_stale(self):
+        """
+        Reload the rankings if a newer computation is available.
+
+        The check runs at most every RANKINGS_REFRESH_INTERVAL seconds, in a
+        single thread: the others keep serving the current rankings meanwhile.
+        """
+        now = monotonic()
+        if self._checked_at is not None and (
+            now - self._checked_at < self.refresh_interval
+        ):
+            return
+
+        # Wait only for the first load, when there is nothing to serve yet
+        if not self._refresh_mutex.acquire(blocking=self._checked_at is None):
+            return
+        try:
+            if self._checked_at is not None and (
+                now - self._checked_at < self.refresh_interval
+            ):
+                return
+
+            computed_at = db.session.scalar(
+                select(func.max(ListingRanking.computed_at))
+            )
+            if computed_at != self.computed_at:
+                self._load(computed_at)
+            self._checked_at = now
+        finally:
+            self._refresh_mutex.release()
+
+    def record_views(self, views: dict):
+        """
+        Add views to the scores of the ranked listings.
+
+        Args:
+            views (dict): The number of views per listing id.
+        """
+        self._add_activity("view_count", views, self.view_weight)
+
+    def record_purchase(self, listing_id: str, quantity: int):
+        """
+        Add a purchase to the scores of the ranked listing.
+
+        Args:
+            listing_id (str): The id of the purchased listing.
+            quantity (int): The number of items purchased.
+        """
+        self._add_activity(
+            "purchase_count", {listing_id: quantity}, self.purchase_weight
+        )
+
+    def _add_activity(self, counter, counts, weight):
+        with self._mutex:
+            changed = set()
+            for listing_id, count in counts.items():
+                for key, entry in self._entries_by_listing.get(listing_id, ()):
+                    entry[counter] += count
+                    entry["score"] += weight * count
+                    changed.add(key)
+
+            for key in changed:
+                self._rankings[key].sort(key=lambda entry: entry["score"], reverse=True)
+
+    def _load(self, computed_at):
+        rows = db.session.execute(
+            ranked_listing.select(ListingRanking.ranking, ListingRanking.score)
+            .select_from(ListingRanking)
+            .join(Listing, ListingRanking.listing_id == Listing.id)
+            .join(seller_user, Listing.seller_id == seller_user.id)
+            .join(Product, Listing.product_id == Product.id)
+            .join(ProductCategory, ListingRanking.category_id == ProductCategory.id)
+            .where(ListingRanking.computed_at == computed_at)
+            .order_by(
+                ListingRanking.ranking,
+                ListingRanking.category_id,
+                ListingRanking.position,
+            )
+        )
+
+        rankings = {}
+        entries_by_listing = {}
+        for row in rows:
+            key = (row.ranking, row.product_category)
+            entry = {
+                "id": row.id,
+                "price": float(row.price),
+                "quantity": row.quantity,
+                "is_available": row.is_available,
+                "product_state": row.product_state.value,
+                "purchase_count": row.purchase_count,
+                "view_count": row.view_count,
+                "seller": {"name": row.seller_name},
+                "product": {
+                    "id": row.product_id,
+                    "name": row.product_name,
+                    "image_src": row.product_image_src,
+                    "category": row.product_category,
+                },
+                "score": row.score,
+            }
+            rankings.setdefault(key, []).append(entry)
+            entries_by_listing.setdefault(row.id, []).append((key, entry))
+
+        with self._mutex:
+            self._rankings = rankings
+            self._entries_by_listing = entries_by_listing
+            self.computed_at = computed_at
+
+
+listing_rankings = ListingRankings()
+
+
+# This module ranks listings as "popular" and "trending" without sorting the
+# listings table on every request.
+
+# - The listing_rankings_recompute job (core/scheduler_jobs.py) runs every
+#   RANKINGS_RECOMPUTE_INTERVAL seconds in the leader: update_listing_activity
+#   decays the trending scores and adds the activity since the last run, then
+#   rebuild_listing_rankings writes the top RANKINGS_TOP_K listings of every
+#   category for each ranking.
+# - Every process serves the rankings from memory (listing_rankings.top) and
+#   reloads them when the job has written a newer computation.
+# - Between computations, a process adds its own flushed views and purchases
+#   to the in-memory scores. Activity from other processes, and listings
+#   entering the top K, show up at the next computation.
+
+# Scores:
+#   popular  = RANKINGS_VIEW_WEIGHT * views + RANKINGS_PURCHASE_WEIGHT * purchases
+#   trending = the same sum over recent activity, halved every
+#              RANKINGS_TRENDING_HALF_LIFE seconds
+
+# The listing details served with the rankings (price, quantity, ...) are
+# those read at the last reload.
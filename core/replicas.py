@@ -0,0 +1,236 @@
+import random
+import threading
+from time import monotonic, time
+
+from flask import g, has_request_context, session
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, text
+from sqlalchemy.sql.dml import UpdateBase
+
+from .db_pool import build_engine_options, instrument_engine
+from .metrics import db_read_routing, db_replica_lag
+
+PRIMARY_UNTIL_SESSION_KEY = "db_primary_until"
+
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE "
+    "WHEN NOT pg_is_in_recovery() "
+    "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class Replica:
+    """A read replica engine together with its last measured replication lag."""
+
+    def __init__(self, name, engine):
+        self.name = name
+        self.engine = engine
+        self.lag = None
+        self.checked_at = None
+        # Whether a thread is measuring the lag
+        self.refreshing = False
+
+
+class ReplicaRouter:
+    """
+    Route the reads of read-only routes to the configured read replicas.
+
+    A replica is used only while its replication lag is below
+    DB_REPLICA_MAX_LAG_SECONDS; otherwise (or when it cannot be reached) reads
+    fall back to the primary. After a user writes, their reads stay on the
+    primary for DB_REPLICA_STICKY_SECONDS so they always see their own writes.
+    """
+
+    def __init__(self, app=None):
+        self.replicas = []
+        self.max_lag = None
+        self.lag_check_interval = None
+        self.sticky_seconds = None
+        self._recent_writers = {}
+        self._mutex = threading.Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Create the replica engines and register the stickiness hook.
+
+        Args:
+            app (Flask): The Flask application instance.
+        """
+        self.max_lag = app.config["DB_REPLICA_MAX_LAG_SECONDS"]
+        self.lag_check_interval = app.config["DB_REPLICA_LAG_CHECK_INTERVAL"]
+        self.sticky_seconds = app.config["DB_REPLICA_STICKY_SECONDS"]
+
+        self.replicas = []
+        for i, uri in enumerate(app.config["DB_REPLICA_URIS"]):
+            name = f"replica-{i}"
+            engine = create_engine(
+                uri, **build_engine_options(app.config, metrics_label=name)
+            )
+            instrument_engine(engine, app.config, metrics_label=name)
+            self.replicas.append(Replica(name, engine))
+
+        app.after_request(self._remember_writer)
+
+    def engine_for_read(self):
+        """
+        Pick the engine that should serve a read in the current request.
+
+        Returns:
+            Engine | None: A replica engine, or None to use the primary.
+        """
+        if not self.replicas or not has_request_context():
+            return None
+        if not g.get("db_read_only") or g.get("db_wrote"):
+            return None
+
+        # Keep every statement of a request on the same replica
+        if "db_replica" in g:
+            return g.db_replica.engine if g.db_replica else None
+
+        replica = None
+        if self._is_sticky():
+            db_read_routing.labels(target="primary", reason="sticky").inc()
+        else:
+            healthy = [r for r in self.replicas if self._is_healthy(r)]
+            if healthy:
+                replica = random.choice(healthy)
+                db_read_routing.labels(target="replica", reason="healthy").inc()
+            else:
+                db_read_routing.labels(target="primary", reason="lag").inc()
+
+        g.db_replica = replica
+        return replica.engine if replica else None
+
+    def record_write(self):
+        """Mark the current request as having written to the primary."""
+        if has_request_context():
+            g.db_wrote = True
+
+    def _is_healthy(self, replica):
+        now = monotonic()
+        if self._is_stale(replica, now):
+            # One thread measures the lag, outside the lock (connecting to an
+            # unreachable replica can take the whole connect timeout); the
+            # others use the last known lag meanwhile
+            with self._mutex:
+                refresh = not replica.refreshing and self._is_stale(replica, now)
+                if refresh:
+                    replica.refreshing = True
+
+            if refresh:
+                lag = None
+                try:
+                    lag = self._measure_lag(replica)
+                finally:
+                    with self._mutex:
+                        replica.lag = lag
+                        replica.checked_at = now
+                        replica.refreshing = False
+
+        return replica.lag is not None and replica.lag <= self.max_lag
+
+    def _is_stale(self, replica, now):
+        return (
+            replica.checked_at is None
+            or now - replica.checked_at >= self.lag_check_interval
+        )
+
+    def _measure_lag(self, replica):
+        try:
+            with replica.engine.connect() as connection:
+                lag = float(connection.execute(REPLICA_LAG_QUERY).scalar() or 0)
+        except Exception:
+            db_replica_lag.labels(pool=replica.name).set(float("inf"))
+            return None
+
+        db_replica_lag.labels(pool=replica.name).set(lag)
+        return lag
+
+    def _is_sticky(self):
+        now = time()
+        if session.get(PRIMARY_UNTIL_SESSION_KEY, 0) > now:
+            return True
+
+        identity = _current_identity()
+        return identity is not None and self._recent_writers.get(identity, 0) > now
+
+    def _remember_writer(self, response):
+        if not self.replicas or not g.get("db_wrote"):
+            return response
+
+        until = time() + self.sticky_seconds
+        session[PRIMARY_UNTIL_SESSION_KEY] = until
+
+        identity = _current_identity()
+        if identity is not None:
+            with self._mutex:
+                self._recent_writers[identity] = until
+                # Forget users whose window has expired
+                if len(self._recent_writers) > 10_000:
+                    now = time()
+                    self._recent_writers = {
+                        k: v for k, v in self._recent_writers.items() if v > now
+                    }
+
+        return response
+
+
+replica_router = ReplicaRouter()
+
+
+def _current_identity():
+    """Return the JWT identity of the current request, if it was verified."""
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        return None
+
+
+def _is_write(clause) -> bool:
+    """Whether a statement must run on the primary."""
+    if isinstance(clause, UpdateBase):
+        return True
+    return getattr(clause, "_for_update_arg", None) is not None
+
+
+class RoutingSession(Session):
+    """
+    Flask-SQLAlchemy session that sends the reads of read-only routes to a replica.
+
+    Flushes, INSERT/UPDATE/DELETE statements and SELECT ... FOR UPDATE always
+    use the primary, and mark the request as a write for read-your-writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or _is_write(clause):
+                replica_router.record_write()
+            else:
+                engine = replica_router.engine_for_read()
+                if engine is not None:
+                    return engine
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+# This module implements read-replica routing for the database session.
+
+# Configuration (see core/config.py):
+# - DB_REPLICA_URIS: comma-separated replica URIs; routing is disabled when empty
+# - DB_REPLICA_MAX_LAG_SECONDS: replicas lagging more than this are skipped
+# - DB_REPLICA_LAG_CHECK_INTERVAL: how often each worker re-measures the lag
+# - DB_REPLICA_STICKY_SECONDS: how long a user's reads stay on the primary
+#   after one of their writes
+
+# Only routes decorated with @use_read_replica (core/blueprints/utils.py) read
+# from replicas. Every statement of a request uses the same replica, so the
+# request sees a single consistent snapshot.
+
+# Read-your-writes: the sticky window is stored both in the signed Flask session
+# cookie (shared by all workers and nodes) and in a per-process map keyed by the
+# JWT identity, for clients that do not keep cookies.
@@ -0,0 +1,90 @@
+from collections import defaultdict
+
+from .models import ReviewRate
+from .validators.customer.customer_review import encode_review_cursor
+
+
+def build_reviews_previews(listing_ids, reviews, summaries, reviews_url) -> dict:
+    """
+    Build the reviews preview of each listing shown on a product page.
+
+    The preview holds the latest reviews of the listing, the rating summary
+    computed over all its reviews, and, when there are more reviews, the link
+    and cursor to page through them (no cursor when the preview is empty).
+
+    Args:
+        listing_ids (list): The ids of the listings.
+        reviews (list): The rows of latest_listing_reviews for these listings.
+        summaries (list): The rows of listing_rating_summaries for these
+            listings.
+        reviews_url (callable): Returns the URL of the reviews of a listing,
+            from its id.
+
+    Returns:
+        dict: The preview of each listing, by listing id.
+    """
+    latest_reviews = defaultdict(list)
+    for review in reviews:
+        latest_reviews[review.listing_id].append(review)
+    summaries = {summary.listing_id: summary for summary in summaries}
+
+    previews = {}
+    for listing_id in listing_ids:
+        reviews = latest_reviews[listing_id]
+        summary = summaries.get(listing_id)
+        has_more = summary is not None and summary.count > len(reviews)
+
+        previews[listing_id] = {
+            "reviews": [_review_to_dict(review) for review in reviews],
+            "rating_summary": _rating_summary(summary),
+            "more_reviews": {
+                "url": reviews_url(listing_id),
+                # Without a preview (LISTING_REVIEWS_PREVIEW_SIZE=0), the pages
+                # start from the newest review, and return the next cursor
+                "cursor": encode_review_cursor(reviews[-1].created_at, reviews[-1].id)
+                if reviews
+                else None,
+            }
+            if has_more
+            else None,
+        }
+
+    return previews
+
+
+def _review_to_dict(review):
+    return {
+        "id": review.id,
+        "title": review.title,
+        "description": review.description,
+        "rating": review.rating.value,
+        "created_at": review.created_at.isoformat(),
+        "customer": {"id": review.customer_id, "name": review.customer_name},
+    }
+
+
+def _rating_summary(summary):
+    if summary is None:
+        return {
+            "count": 0,
+            "average": None,
+            "distribution": {str(rate.value): 0 for rate in ReviewRate},
+        }
+    return {
+        "count": summary.count,
+        "average": round(float(summary.average), 2),
+        "distribution": {
+            str(rate.value): getattr(summary, f"rated_{rate.value}")
+            for rate in ReviewRate
+        },
+    }
+
+
+# This module builds the reviews preview embedded in the listings of the
+# product pages, for both the sync routes
+# (core/blueprints/public_views/listings/routes.py) and their async variants
+# (core/asgi/listings.py), so that both deployments return the same payload.
+
+# The caller runs latest_listing_reviews and listing_rating_summaries
+# (core/projections.py) through its own session, sync or async, and passes
+# the rows.
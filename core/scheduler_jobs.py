@@ -1,66 +1,481 @@
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
+from time import monotonic
 
-from core import scheduler
-from core.models import DeleteRequest, TokenBlocklist, User
+from sqlalchemy import delete, insert, select
+
+from core import db, scheduler
+from core.catalog_snapshot import catalog_snapshot
+from core.facets import rebuild_listing_facets
+from core.leader_election import leader_only
+from core.metrics import (
+    order_notifications_failed,
+    order_notifications_sent,
+    scheduler_cleanup_budget_exhausted,
+    scheduler_cleanup_chunks,
+    scheduler_cleanup_rows_deleted,
+    scheduler_job_duration,
+    scheduler_job_lag,
+)
+from core.models import (
+    ArchivedOrder,
+    ArchivedOrderEntry,
+    DeleteRequest,
+    Order,
+    OrderEntry,
+    OrderStatus,
+    TokenBlocklist,
+    User,
+)
+from core.notifications import send_order_notifications_batch
+from core.partitions import maintain_daily_partitions
+from core.rankings import rebuild_listing_rankings, update_listing_activity
+from core.view_counter import view_counter
+
+
+def record_job_lag(event):
+    """
+    APScheduler listener recording how late a job was submitted.
+
+    Args:
+        event (JobSubmissionEvent): The job submission event.
+    """
+    if not event.scheduled_run_times:
+        return
+    lag = datetime.now(UTC) - min(event.scheduled_run_times)
+    scheduler_job_lag.labels(job=event.job_id).observe(max(lag.total_seconds(), 0))
+
+
+def run_chunked_cleanup(job_id, delete_chunk):
+    """
+    Repeatedly run a bulk delete chunk until the backlog is empty or the time budget is spent.
+
+    Each chunk runs in its own short transaction, so locks are held only for
+    the rows of a single chunk instead of the whole backlog.
+
+    Args:
+        job_id (str): The scheduler job id, used as the metrics label.
+        delete_chunk (callable): Deletes at most `chunk_size` rows and returns
+            the number of rows removed. Called as delete_chunk(chunk_size).
+
+    Returns:
+        int: The total number of rows deleted during this run.
+    """
+    chunk_size = scheduler.app.config["SCHEDULER_CLEANUP_CHUNK_SIZE"]
+    time_budget = scheduler.app.config["SCHEDULER_CLEANUP_TIME_BUDGET"]
+
+    started_at = monotonic()
+    total_deleted = 0
+
+    while True:
+        try:
+            deleted = delete_chunk(chunk_size)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        total_deleted += deleted
+        scheduler_cleanup_chunks.labels(job=job_id).inc()
+        scheduler_cleanup_rows_deleted.labels(job=job_id).inc(deleted)
+
+        # A short chunk means there is nothing left to remove
+        if deleted < chunk_size:
+            break
+
+        if monotonic() - started_at >= time_budget:
+            scheduler_cleanup_budget_exhausted.labels(job=job_id).inc()
+            scheduler.app.logger.warning(
+                f"{job_id}: time budget of {time_budget}s exhausted after "
+                f"deleting {total_deleted} rows, resuming on next run"
+            )
+            break
+
+    return total_deleted
+
+
+def delete_expired_tokens_chunk(chunk_size):
+    """
+    Delete one chunk of expired tokens from the blocklist.
+
+    PostgreSQL has no DELETE ... LIMIT, so the chunk is selected in a subquery.
+    SKIP LOCKED keeps the job from waiting on rows locked by concurrent requests.
+
+    Args:
+        chunk_size (int): The maximum number of rows to delete.
+
+    Returns:
+        int: The number of rows deleted.
+    """
+    expired_ids = (
+        select(TokenBlocklist.id)
+        .where(TokenBlocklist.expired_at <= datetime.now(UTC))
+        .limit(chunk_size)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+
+    result = db.session.execute(
+        delete(TokenBlocklist)
+        .where(TokenBlocklist.id.in_(expired_ids))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def delete_expired_users_chunk(chunk_size):
+    """
+    Delete one chunk of expired delete requests together with their users.
+
+    The delete requests are removed first so that the users can be deleted
+    without violating the delete_requests.user_id foreign key.
+
+    Args:
+        chunk_size (int): The maximum number of delete requests to process.
+
+    Returns:
+        int: The number of delete requests processed.
+    """
+    expired_ids = (
+        select(DeleteRequest.id)
+        .where(DeleteRequest.to_be_removed_at <= datetime.now(UTC))
+        .limit(chunk_size)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+
+    user_ids = (
+        db.session.execute(
+            delete(DeleteRequest)
+            .where(DeleteRequest.id.in_(expired_ids))
+            .returning(DeleteRequest.user_id)
+            .execution_options(synchronize_session=False)
+        )
+        .scalars()
+        .all()
+    )
+
+    if user_ids:
+        db.session.execute(
+            delete(User)
+            .where(User.id.in_(user_ids))
+            .execution_options(synchronize_session=False)
+        )
+
+    return len(user_ids)
+
+
+def move_rows(source, target, condition):
+    """
+    Build a statement moving the rows matching a condition to another table.
+
+    The rows are deleted and inserted by a single statement
+    (WITH moved AS (DELETE ... RETURNING ...) INSERT ... SELECT), so they are
+    read only once and never exist in both tables.
+
+    Args:
+        source (Table): The table to move the rows from.
+        target (Table): The table to move the rows to, with the same columns.
+        condition: The WHERE clause selecting the rows of source.
+
+    Returns:
+        Insert: The statement; its rowcount is the number of rows moved.
+    """
+    moved = delete(source).where(condition).returning(*source.columns).cte("moved")
+    return insert(target).from_select(
+        [column.name for column in source.columns], select(moved)
+    )
+
+
+def archive_orders_chunk(chunk_size):
+    """
+    Move one chunk of old delivered or cancelled orders to the archive tables.
+
+    The orders are copied to archived_orders first, as the
+    archived_order_entries.order_id foreign key requires the archived order
+    to exist before its entries are moved; the entries are then moved, and
+    the orders deleted last, as order_entries.order_id references them. The
+    three statements run in the caller's transaction.
+
+    Args:
+        chunk_size (int): The maximum number of orders to move.
+
+    Returns:
+        int: The number of orders moved.
+    """
+    cutoff = datetime.now(UTC) - timedelta(
+        days=scheduler.app.config["ORDERS_ARCHIVE_AFTER_DAYS"]
+    )
+
+    order_ids = (
+        db.session.execute(
+            select(Order.id)
+            .where(
+                Order.purchased_at < cutoff,
+                Order.order_status.in_([OrderStatus.DELIVERED, OrderStatus.CANCELLED]),
+            )
+            .order_by(Order.purchased_at)
+            .limit(chunk_size)
+            .with_for_update(skip_locked=True)
+        )
+        .scalars()
+        .all()
+    )
+
+    if order_ids:
+        orders = Order.__table__
+        db.session.execute(
+            insert(ArchivedOrder.__table__).from_select(
+                [column.name for column in orders.columns],
+                select(orders).where(orders.c.id.in_(order_ids)),
+            )
+        )
+        db.session.execute(
+            move_rows(
+                OrderEntry.__table__,
+                ArchivedOrderEntry.__table__,
+                OrderEntry.order_id.in_(order_ids),
+            )
+        )
+        db.session.execute(delete(orders).where(orders.c.id.in_(order_ids)))
+
+    return len(order_ids)
+
+
+@scheduler.task("cron", id="tokens_blocklist_partitions", minute=0)
+@leader_only("tokens_blocklist_partitions")
+def manage_tokens_blocklist_partitions():
+    """
+    Scheduled task to maintain the daily partitions of the token blocklist.
+
+    This function runs every hour and makes sure that partitions exist for
+    the next TOKENS_BLOCKLIST_PARTITION_LOOKAHEAD_DAYS days, then drops every
+    partition whose tokens have all expired. Dropping a partition removes a
+    whole day of tokens at once, regardless of how many rows it holds.
+    """
+    created, dropped = maintain_daily_partitions(
+        TokenBlocklist.__tablename__,
+        scheduler.app.config["TOKENS_BLOCKLIST_PARTITION_LOOKAHEAD_DAYS"],
+    )
+
+    if created or dropped:
+        scheduler.app.logger.info(
+            f"tokens_blocklist partitions created={created} dropped={dropped}"
+        )
 
 
 # test: ('interval', id='jwt_tokens_table_cleanup', seconds=60)
 @scheduler.task("cron", id="jwt_tokens_table_cleanup", hour=0)
+@leader_only("jwt_tokens_table_cleanup")
 def cleanup_tokens_blocklist():
     """
     Scheduled task to clean up expired JWT tokens from the blocklist.
 
     This function runs daily at midnight (00:00) and removes all tokens
-    from the TokenBlocklist that have expired. This helps to keep the
-    blocklist table from growing indefinitely.
+    from the TokenBlocklist that have expired. Whole days of tokens are
+    expired by manage_tokens_blocklist_partitions; this job only removes
+    the leftovers in the current day and default partitions. Tokens are
+    deleted with set-based statements in chunks of
+    SCHEDULER_CLEANUP_CHUNK_SIZE rows, each in its own transaction, for at
+    most SCHEDULER_CLEANUP_TIME_BUDGET seconds; whatever is left is picked
+    up by the next run.
 
     Note: The commented out line below shows how this could be set up
     to run every 60 seconds for testing purposes.
     # test: ('interval', id='jwt_tokens_table_cleanup', seconds=60)
     """
-    with scheduler.app.app_context():
-        current_time = datetime.now(UTC)
-        expired_tokens = TokenBlocklist.query.filter(
-            TokenBlocklist.expired_at <= current_time
-        ).all()
-
-        if expired_tokens is not None:
-            for token in expired_tokens:
-                token.delete()
+    run_chunked_cleanup("jwt_tokens_table_cleanup", delete_expired_tokens_chunk)
 
 
 @scheduler.task("cron", id="delete_requests_cleanup", hour=0)
+@leader_only("delete_requests_cleanup")
 def cleanup_delete_requests():
     """
     Scheduled task to process and execute user deletion requests.
 
     This function runs daily at midnight (00:00) and checks for any
     DeleteRequest entries where the scheduled deletion time
-    (to_be_removed_at) has passed. For each such request, it deletes
-    the associated user account and then removes the DeleteRequest entry.
+    (to_be_removed_at) has passed. The expired requests and their
+    associated user accounts are removed in chunks, using the same
+    chunk size and time budget as the blocklist cleanup.
 
     This implementation allows for a grace period between when a user
     requests account deletion and when it actually occurs, giving users
     a chance to change their minds.
     """
+    run_chunked_cleanup("delete_requests_cleanup", delete_expired_users_chunk)
+
+
+@scheduler.task("cron", id="orders_archive", hour=1)
+@leader_only("orders_archive")
+def archive_orders():
+    """
+    Scheduled task to move old orders out of the orders table.
+
+    This function runs daily at 01:00 and moves the delivered and cancelled
+    orders purchased more than ORDERS_ARCHIVE_AFTER_DAYS days ago, with their
+    entries, to archived_orders and archived_order_entries. This keeps the
+    orders table, which every order route reads, limited to the recent and
+    still open orders. The orders are moved in chunks, using the same chunk
+    size and time budget as the cleanup jobs.
+    """
+    run_chunked_cleanup("orders_archive", archive_orders_chunk)
+
+
+@scheduler.task(
+    "interval",
+    id="order_notifications",
+    seconds=scheduler.app.config["ORDER_NOTIFICATIONS_INTERVAL"],
+)
+@leader_only("order_notifications")
+def send_order_notifications():
+    """
+    Scheduled task to send the queued order emails.
+
+    This function runs every ORDER_NOTIFICATIONS_INTERVAL seconds and sends
+    the emails queued in order_notifications (see core/notifications.py) in
+    batches of ORDER_NOTIFICATIONS_BATCH_SIZE, each committed on its own,
+    until the queue is empty, the connection to the mail server is lost, or
+    ORDER_NOTIFICATIONS_INTERVAL seconds have been spent.
+    """
+    batch_size = scheduler.app.config["ORDER_NOTIFICATIONS_BATCH_SIZE"]
+    max_attempts = scheduler.app.config["ORDER_NOTIFICATIONS_MAX_ATTEMPTS"]
+    interval = scheduler.app.config["ORDER_NOTIFICATIONS_INTERVAL"]
+
+    started_at = monotonic()
+    while True:
+        try:
+            sent, failed, interrupted = send_order_notifications_batch(
+                batch_size, max_attempts, timedelta(seconds=interval)
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        order_notifications_sent.inc(sent)
+        order_notifications_failed.inc(failed)
+
+        # A short batch means there is nothing left to send
+        if (
+            interrupted
+            or sent + failed < batch_size
+            or monotonic() - started_at >= interval
+        ):
+            break
+
+
+@scheduler.task(
+    "interval",
+    id="flush_listing_views",
+    seconds=scheduler.app.config["VIEW_COUNTER_FLUSH_INTERVAL"],
+)
+def flush_listing_views():
+    """
+    Scheduled task to write the buffered listing views to listings.view_count.
+
+    This function runs every VIEW_COUNTER_FLUSH_INTERVAL seconds in every
+    process, not only in the leader: each process flushes the views it has
+    buffered itself (see core/view_counter.py).
+    """
+    with scheduler.app.app_context():
+        with scheduler_job_duration.labels(job="flush_listing_views").time():
+            view_counter.flush()
+
+
+@scheduler.task(
+    "interval",
+    id="catalog_snapshot_write",
+    seconds=scheduler.app.config["CATALOG_SNAPSHOT_REFRESH_INTERVAL"],
+)
+def write_catalog_snapshot():
+    """
+    Scheduled task to write the catalog file shared by the processes of a node.
+
+    This function runs every CATALOG_SNAPSHOT_REFRESH_INTERVAL seconds in every
+    process, not only in the leader: the file is local to the node, and is
+    written by the process holding its builder lock (see
+    core/catalog_snapshot.py). It does nothing without CATALOG_SNAPSHOT_FILE.
+    """
+    if not catalog_snapshot.path:
+        return
     with scheduler.app.app_context():
-        current_time = datetime.now(UTC)
+        with scheduler_job_duration.labels(job="catalog_snapshot_write").time():
+            catalog_snapshot.write_file()
 
-        expired_delete_request = DeleteRequest.query.filter(
-            DeleteRequest.to_be_removed_at <= current_time
-        ).all()
 
-        if expired_delete_request is not None:
-            for edr in expired_delete_request:
-                User.query.filter_by(id=edr.user_id).delete()
-                edr.delete()
+@scheduler.task(
+    "interval",
+    id="listing_rankings_recompute",
+    seconds=scheduler.app.config["RANKINGS_RECOMPUTE_INTERVAL"],
+)
+@leader_only("listing_rankings_recompute")
+def recompute_listing_rankings():
+    """
+    Scheduled task to recompute the popular and trending listings.
+
+    This function runs every RANKINGS_RECOMPUTE_INTERVAL seconds. It updates
+    the decayed trending score of every listing from its counters, then
+    replaces the top RANKINGS_TOP_K listings of each category, in a single
+    transaction: the processes serving the rankings keep reading the
+    previous computation until it commits.
+    """
+    try:
+        update_listing_activity(scheduler.app.config)
+        written = rebuild_listing_rankings(scheduler.app.config)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    scheduler.app.logger.info(f"listing rankings recomputed: {written} rows")
+
+
+@scheduler.task(
+    "interval",
+    id="listing_facets_recompute",
+    seconds=scheduler.app.config["FACETS_RECOMPUTE_INTERVAL"],
+)
+@leader_only("listing_facets_recompute")
+def recompute_listing_facets():
+    """
+    Scheduled task to recount the listings of the search facets.
+
+    This function runs every FACETS_RECOMPUTE_INTERVAL seconds and replaces
+    the contents of listing_facets in a single transaction (see
+    core/facets.py).
+    """
+    try:
+        written = rebuild_listing_facets()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    scheduler.app.logger.info(f"listing facets recomputed: {written} rows")
 
 
 # This module defines scheduled tasks for the application using Flask-APScheduler.
 # These tasks perform regular maintenance operations:
-# 1. Cleaning up expired JWT tokens from the blocklist
-# 2. Processing and executing user account deletion requests
+# 1. Creating and dropping the daily partitions of the token blocklist (hourly)
+# 2. Cleaning up expired JWT tokens from the blocklist
+# 3. Processing and executing user account deletion requests
+# 4. Writing the buffered listing views (every few seconds)
+# 5. Moving old delivered and cancelled orders to the archive tables (daily)
+# 6. Sending the queued order emails (every ORDER_NOTIFICATIONS_INTERVAL seconds)
+# 7. Recomputing the popular and trending listings (see core/rankings.py)
+# 8. Recounting the listings of the search facets (see core/facets.py)
+# 9. Writing the catalog file shared by the workers of a node (see
+#    core/catalog_snapshot.py)
 
-# Both tasks are scheduled to run daily at midnight (00:00) UTC.
+# The cleanup tasks are scheduled to run daily at midnight (00:00) UTC.
 # The scheduler ensures these maintenance tasks occur regularly without manual intervention,
 # helping to keep the database clean and respect user privacy requests.
+
+# Cleanup is set-based: each chunk is a single DELETE over at most
+# SCHEDULER_CLEANUP_CHUNK_SIZE rows committed on its own, so a large backlog
+# never holds table locks for long. Progress and duration are exported as
+# Prometheus metrics (see core/metrics.py).
+
+# Every job but flush_listing_views and write_catalog_snapshot is wrapped in @leader_only, so with several workers and nodes each
+# run executes in exactly one process: the one holding the scheduler advisory
+# lock (see core/leader_election.py).
@@ -0,0 +1,324 @@
+from decimal import Decimal
+
+from sqlalchemy import Date, cast, delete, func, literal, select, union_all
+from sqlalchemy.dialects.postgresql import insert
+
+from .extensions import db
+from .models import (
+    ArchivedOrder,
+    ArchivedOrderEntry,
+    Listing,
+    Order,
+    OrderEntry,
+    OrderStatus,
+    SellerDailySales,
+    SellerListingSales,
+    SellerOrderStatusCount,
+)
+
+
+def _add(model, key_columns, counter_columns, rows):
+    """
+    Add the counters of rows to a rollup table, creating the missing rows.
+
+    Args:
+        model: The rollup model.
+        key_columns (tuple): The primary key columns.
+        counter_columns (tuple): The columns incremented on conflict.
+        rows (list): The rows, at most one per key.
+    """
+    if not rows:
+        return
+
+    # Rows are locked in key order, so concurrent orders cannot deadlock
+    rows = sorted(rows, key=lambda row: tuple(str(row[key]) for key in key_columns))
+
+    statement = insert(model).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=list(key_columns),
+        set_={
+            column: getattr(model, column) + statement.excluded[column]
+            for column in counter_columns
+        },
+    )
+    db.session.execute(statement)
+
+
+def _add_sales(order, entries, sign):
+    """Add (sign=1) or remove (sign=-1) the sales of an order."""
+    day = order.purchased_at.date()
+    daily = {}
+    listings = {}
+
+    for entry in entries:
+        seller_id = entry.listing.seller_id
+        unit_price = entry.unit_price
+        if unit_price is None:
+            unit_price = entry.listing.price
+        units = sign * entry.quantity
+        revenue = units * unit_price
+
+        seller_day = daily.setdefault(
+            seller_id,
+            {
+                "seller_id": seller_id,
+                "day": day,
+                "orders": sign,
+                "units": 0,
+                "revenue": Decimal(0),
+            },
+        )
+        seller_day["units"] += units
+        seller_day["revenue"] += revenue
+
+        listing = listings.setdefault(
+            entry.listing_id,
+            {
+                "listing_id": entry.listing_id,
+                "seller_id": seller_id,
+                "units": 0,
+                "revenue": Decimal(0),
+            },
+        )
+        listing["units"] += units
+        listing["revenue"] += revenue
+
+    _add(
+        SellerDailySales,
+        ("seller_id", "day"),
+        ("orders", "units", "revenue"),
+        list(daily.values()),
+    )
+    _add(
+        SellerListingSales,
+        ("listing_id",),
+        ("units", "revenue"),
+        list(listings.values()),
+    )
+
+
+def _add_status(entries, status, sign):
+    """Add (sign=1) or remove (sign=-1) an order from its sellers' status counts."""
+    _add(
+        SellerOrderStatusCount,
+        ("seller_id", "order_status"),
+        ("orders",),
+        [
+            {"seller_id": seller_id, "order_status": status, "orders": sign}
+            for seller_id in {entry.listing.seller_id for entry in entries}
+        ],
+    )
+
+
+def record_order_placed(order, entries):
+    """
+    Add a new order to the rollups of its sellers.
+
+    Must be called in the transaction creating the order.
+
+    Args:
+        order (Order): The new order.
+        entries (list): Its OrderEntry rows, with their listing.
+    """
+    _add_sales(order, entries, 1)
+    _add_status(entries, order.order_status, 1)
+
+
+def record_order_status_change(order, entries, previous_status):
+    """
+    Move an order to its new status in the rollups of its sellers.
+
+    Cancelled orders are removed from the sales. Must be called in the
+    transaction changing the status.
+
+    Args:
+        order (Order): The order, with its new status.
+        entries (list): Its OrderEntry rows, with their listing.
+        previous_status (OrderStatus): The status before the change.
+    """
+    if order.order_status == previous_status:
+        return
+
+    _add_status(entries, previous_status, -1)
+    _add_status(entries, order.order_status, 1)
+
+    if order.order_status == OrderStatus.CANCELLED:
+        _add_sales(order, entries, -1)
+
+
+def record_orders_status_change(order_ids, previous_status, new_status):
+    """
+    Move a batch of orders from one status to another in the rollups.
+
+    The set-based counterpart of record_order_status_change, used by the
+    bulk status update: the rollups of all the orders are updated by one
+    statement per table. Must be called in the transaction changing the
+    statuses, after the orders have been updated.
+
+    Args:
+        order_ids (list): The ids of the orders that changed status.
+        previous_status (OrderStatus): Their status before the change.
+        new_status (OrderStatus): Their new status.
+    """
+    if not order_ids or previous_status == new_status:
+        return
+
+    lines = _order_lines(Order, OrderEntry).where(Order.id.in_(order_ids)).subquery()
+    orders = func.count(lines.c.order_id.distinct())
+
+    for status, sign in ((previous_status, -1), (new_status, 1)):
+        _add_from_select(
+            SellerOrderStatusCount,
+            ("seller_id", "order_status"),
+            ("orders",),
+            select(
+                lines.c.seller_id,
+                literal(status, type_=Order.order_status.type),
+                sign * orders,
+            ).group_by(lines.c.seller_id),
+        )
+
+    if new_status == OrderStatus.CANCELLED:
+        _add_from_select(
+            SellerDailySales,
+            ("seller_id", "day"),
+            ("orders", "units", "revenue"),
+            select(
+                lines.c.seller_id,
+                lines.c.day,
+                -orders,
+                -func.sum(lines.c.quantity),
+                -func.sum(lines.c.revenue),
+            ).group_by(lines.c.seller_id, lines.c.day),
+        )
+        _add_from_select(
+            SellerListingSales,
+            ("listing_id",),
+            ("units", "revenue"),
+            select(
+                lines.c.listing_id,
+                lines.c.seller_id,
+                -func.sum(lines.c.quantity),
+                -func.sum(lines.c.revenue),
+            ).group_by(lines.c.listing_id, lines.c.seller_id),
+            extra_columns=("seller_id",),
+        )
+
+
+def _add_from_select(model, key_columns, counter_columns, query, extra_columns=()):
+    """
+    Add the counters selected by a query to a rollup table.
+
+    The query selects one row per key: the key columns, then the extra
+    (non-counter) columns, then the counters.
+    """
+    statement = insert(model).from_select(
+        [*key_columns, *extra_columns, *counter_columns], query
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=list(key_columns),
+        set_={
+            column: getattr(model, column) + statement.excluded[column]
+            for column in counter_columns
+        },
+    )
+    db.session.execute(statement)
+
+
+def _order_lines(order_model, entry_model):
+    return (
+        select(
+            Listing.seller_id,
+            order_model.id.label("order_id"),
+            cast(order_model.purchased_at, Date).label("day"),
+            order_model.order_status,
+            entry_model.listing_id,
+            entry_model.quantity,
+            (
+                entry_model.quantity
+                * func.coalesce(entry_model.unit_price, Listing.price)
+            ).label("revenue"),
+        )
+        .join(entry_model, entry_model.order_id == order_model.id)
+        .join(Listing, entry_model.listing_id == Listing.id)
+    )
+
+
+def rebuild_seller_rollups():
+    """
+    Recompute every rollup from the orders and the archived orders.
+
+    Used to fill the rollups the first time and to repair them. The caller
+    commits.
+    """
+    lines = union_all(
+        _order_lines(Order, OrderEntry),
+        _order_lines(ArchivedOrder, ArchivedOrderEntry),
+    ).subquery()
+    sold = lines.c.order_status != OrderStatus.CANCELLED
+
+    for model in (SellerDailySales, SellerListingSales, SellerOrderStatusCount):
+        db.session.execute(delete(model))
+
+    db.session.execute(
+        insert(SellerDailySales).from_select(
+            ["seller_id", "day", "orders", "units", "revenue"],
+            select(
+                lines.c.seller_id,
+                lines.c.day,
+                func.count(lines.c.order_id.distinct()),
+                func.sum(lines.c.quantity),
+                func.sum(lines.c.revenue),
+            )
+            .where(sold)
+            .group_by(lines.c.seller_id, lines.c.day),
+        )
+    )
+    db.session.execute(
+        insert(SellerListingSales).from_select(
+            ["listing_id", "seller_id", "units", "revenue"],
+            select(
+                lines.c.listing_id,
+                lines.c.seller_id,
+                func.sum(lines.c.quantity),
+                func.sum(lines.c.revenue),
+            )
+            .where(sold)
+            .group_by(lines.c.listing_id, lines.c.seller_id),
+        )
+    )
+    db.session.execute(
+        insert(SellerOrderStatusCount).from_select(
+            ["seller_id", "order_status", "orders"],
+            select(
+                lines.c.seller_id,
+                lines.c.order_status,
+                func.count(lines.c.order_id.distinct()),
+            ).group_by(lines.c.seller_id, lines.c.order_status),
+        )
+    )
+
+
+# This module maintains the per-seller sales rollups read by the seller
+# analytics endpoint, so that dashboards never scan the order history.
+
+# - seller_daily_sales: orders, units and revenue per seller and day
+# - seller_listing_sales: units and revenue per listing
+# - seller_order_status_counts: number of orders per seller and status
+
+# The routes that create orders or change their status call
+# record_order_placed / record_order_status_change (or, for the bulk status
+# update, record_orders_status_change) in the same transaction,
+# so the rollups are always consistent with the orders. Each call is a few
+# INSERT ... ON CONFLICT DO UPDATE statements adding to the counters.
+
+# Revenue uses the unit price stored on the order entry, falling back to the
+# current listing price for entries created before it was recorded.
+# Cancelled orders are not counted as sales.
+
+# Archiving orders (see core/scheduler_jobs.py) does not change the rollups.
+
+# To fill the rollups for existing orders, run once:
+#   $ flask shell
+#   >>> from core.seller_rollups import rebuild_seller_rollups
+#   >>> rebuild_seller_rollups(); db.session.commit()
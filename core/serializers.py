@@ -0,0 +1,143 @@
+from operator import attrgetter
+
+
+class ModelSerializer:
+    """
+    Serialize model instances to dictionaries with an explicit list of fields.
+
+    The attribute getters are built once, when the serializer is defined, so
+    serializing an instance does not inspect the model. Values are returned
+    as-is (Decimal, datetime, enums, ...) and encoded by the JSON provider.
+
+    Relationships are only serialized when listed in `nested`, with their own
+    serializer; a list (one-to-many) is serialized item by item.
+    """
+
+    def __init__(self, *fields: str, **nested: "ModelSerializer"):
+        self.fields = fields
+        self.nested = nested
+        self._getter = attrgetter(*fields)
+
+    def dump(self, obj):
+        """
+        Serialize a single instance.
+
+        Args:
+            obj: The model instance (or any object with the listed attributes).
+
+        Returns:
+            dict | None: The serialized instance, or None if obj is None.
+        """
+        if obj is None:
+            return None
+
+        values = self._getter(obj)
+        data = dict(zip(self.fields, values if len(self.fields) > 1 else (values,)))
+
+        for name, serializer in self.nested.items():
+            value = getattr(obj, name)
+            data[name] = (
+                serializer.dump_many(value)
+                if isinstance(value, list)
+                else serializer.dump(value)
+            )
+
+        return data
+
+    def dump_many(self, objs):
+        """
+        Serialize a sequence of instances.
+
+        Args:
+            objs: The model instances.
+
+        Returns:
+            list: The serialized instances.
+        """
+        return [self.dump(obj) for obj in objs]
+
+
+category_serializer = ModelSerializer("id", "title")
+
+category_deletion_serializer = ModelSerializer(
+    "id",
+    "category_title",
+    "status",
+    "total_products",
+    "moved_products",
+    "error",
+    "started_at",
+    "finished_at",
+)
+
+product_serializer = ModelSerializer(
+    "id", "name", "description", "image_src", "category_id"
+)
+
+listing_serializer = ModelSerializer(
+    "id",
+    "quantity",
+    "is_available",
+    "price",
+    "product_state",
+    "purchase_count",
+    "view_count",
+    "seller_id",
+    "product_id",
+)
+
+listing_import_serializer = ModelSerializer(
+    "id",
+    "status",
+    "total_rows",
+    "processed_rows",
+    "created_listings",
+    "updated_listings",
+    "rejected_rows",
+    "row_errors",
+    "error",
+    "started_at",
+    "finished_at",
+)
+
+# The password hash is never serialized
+user_serializer = ModelSerializer(
+    "id",
+    "email",
+    "name",
+    "surname",
+    "birth_date",
+    "phone_number",
+    "profile_img",
+    "user_type",
+    "is_verified",
+    "created_at",
+    "modified_at",
+    "verified_on",
+)
+
+seller_profile_serializer = ModelSerializer(
+    "email",
+    "name",
+    "surname",
+    "birth_date",
+    "phone_number",
+    "profile_img",
+    "company_name",
+)
+
+
+# This module defines the serializers used to build the JSON responses from
+# model instances.
+
+# They replace SerializerMixin.to_dict in the routes: to_dict discovers the
+# fields of every instance by reflection and follows all the relationships by
+# default (loading them lazily, one query each), while these serializers read
+# a fixed list of attributes.
+
+# Usage:
+#   success_response(data=listing_serializer.dump(listing))
+#   success_response(data=product_serializer.dump_many(products))
+
+# Nested serializers:
+#   ModelSerializer("id", "price", seller=ModelSerializer("id", "name"))
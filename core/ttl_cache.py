@@ -0,0 +1,76 @@
+import threading
+from time import monotonic
+
+
+class TTLCache:
+    """
+    In-process value loaded from the database and kept for a TTL.
+
+    Subclasses set ttl_config (the name of the setting holding the TTL, in
+    seconds) and implement _load. The value is loaded on first use and
+    reloaded once it has expired; invalidate drops it, so that the process
+    making a change sees it immediately.
+    """
+
+    ttl_config = None
+
+    def __init__(self, app=None):
+        self.ttl = 0
+        self._value = None
+        self._loaded_at = None
+        self._generation = 0
+        self._mutex = threading.Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Read the cache configuration.
+
+        Args:
+            app (Flask): The Flask application instance.
+        """
+        self.ttl = app.config[self.ttl_config]
+
+    def invalidate(self):
+        """Drop the value, so that the next use reloads it."""
+        with self._mutex:
+            self._value = None
+            self._generation += 1
+
+    def _get(self) -> tuple:
+        """
+        Get the value, loading it first if it is missing or has expired.
+
+        Must be called within an application context.
+
+        Returns:
+            tuple: The value, and the monotonic time it was loaded at.
+        """
+        value, loaded_at = self._value, self._loaded_at
+        if value is None or monotonic() - loaded_at >= self.ttl:
+            value, loaded_at = self._reload()
+        return value, loaded_at
+
+    def _reload(self) -> tuple:
+        generation = self._generation
+        value = self._load()
+        loaded_at = monotonic()
+        with self._mutex:
+            # A value read before an invalidation may miss the change
+            if generation == self._generation:
+                self._value, self._loaded_at = value, loaded_at
+        return value, loaded_at
+
+    def _load(self):
+        raise NotImplementedError
+
+
+# This module defines the base class of the in-process caches of data which
+# changes rarely but is read on many requests (core/category_registry.py,
+# core/category_tree.py).
+
+# Each process keeps its own copy: a change made through another process is
+# seen once the copy expires. The value is replaced, never modified in place,
+# so readers need no lock; two threads finding it expired may both reload it.
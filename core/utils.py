@@ -1,7 +1,12 @@
 from datetime import datetime
 
+from flask import current_app
+
+from .category_registry import category_registry
+from .category_tree import category_tree
 from .extensions import bcrypt, db
-from .models import Admin, Cart, Customer, ProductCategory, Seller
+from .models import Admin, Cart, Customer, ProductCategory, Seller, TokenBlocklist
+from .partitions import maintain_daily_partitions
 
 
 def init_db(init_data):
@@ -24,6 +29,12 @@ def init_db(init_data):
     db.create_all()
     db.session.commit()
 
+    # Partitioned tables need their first partitions before any insert
+    maintain_daily_partitions(
+        TokenBlocklist.__tablename__,
+        current_app.config["TOKENS_BLOCKLIST_PARTITION_LOOKAHEAD_DAYS"],
+    )
+
     categories = init_data.get("categories", [])
     admin = init_data.get("admins", [])
     seller = init_data.get("sellers", [])
@@ -32,6 +43,8 @@ def init_db(init_data):
     # Create product categories
     for c in categories:
         ProductCategory.create(title=c)
+    category_registry.invalidate()
+    category_tree.invalidate()
 
     # Create admin users
     for a in admin:
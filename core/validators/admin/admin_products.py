@@ -1,4 +1,6 @@
-from marshmallow import Schema, fields, post_load
+from marshmallow import Schema, fields, post_load, validate
+
+from core.exports import EXPORT_FORMATS
 
 
 class CategorySchema(Schema):
@@ -12,6 +14,7 @@ class CategorySchema(Schema):
     category_title = fields.String(
         required=True, error_messages={"required": "Missing product category title"}
     )
+    parent_title = fields.String(required=False, missing=None)
 
     @post_load
     def get_validated_category_product(self, data, **kwargs):
@@ -26,10 +29,13 @@ class CategorySchema(Schema):
             **kwargs: Additional keyword arguments passed to the method.
 
         Returns:
-            dict: A dictionary with the 'title' key containing the category title.
+            dict: A dictionary with the 'title' key containing the category title,
+                and the 'parent_title' key containing the title of the parent
+                category (None for a root category).
         """
         return {
             "title": data.get("category_title"),
+            "parent_title": data.get("parent_title"),
         }
 
 
@@ -77,14 +83,45 @@ class AddProductSchema(Schema):
         }
 
 
+class ProductsExportSchema(Schema):
+    """
+    Schema for validating the query parameters of the admin products export.
+    """
+
+    format = fields.String(
+        required=False, missing="ndjson", validate=validate.OneOf(EXPORT_FORMATS)
+    )
+    category = fields.String(required=False, missing=None)
+
+    @post_load
+    def get_validated_products_export(self, data, **kwargs):
+        """
+        Post-load hook to transform validated export parameters.
+
+        Args:
+            data (dict): The validated export parameters.
+            **kwargs: Additional keyword arguments passed to the method.
+
+        Returns:
+            dict: A dictionary containing the export format, and the title of
+                the category exported (None for all products).
+        """
+        return {
+            "format": data.get("format"),
+            "category": data.get("category"),
+        }
+
+
 # This module defines Marshmallow schemas for validating and deserializing
 # input data related to product categories and products in the admin interface.
 
 # Key components:
 # 1. CategorySchema: Used for validating product category data.
 # 2. AddProductSchema: Used for validating data when adding a new product.
+# 3. ProductsExportSchema: Used for validating the parameters of the products
+#    export.
 
-# Both schemas include post_load hooks that transform the validated data
+# The schemas include post_load hooks that transform the validated data
 # into the format expected by the application's business logic.
 
 # These schemas help ensure data integrity and provide clear error messages
@@ -1,5 +1,8 @@
 from marshmallow import Schema, fields, post_load, validate
 
+from core.exports import EXPORT_FORMATS
+from core.models import UserType
+
 
 class AdminUsersFiltersSchema(Schema):
     """
@@ -44,6 +47,39 @@ class AdminUsersFiltersSchema(Schema):
         }
 
 
+class AdminUsersExportSchema(Schema):
+    """
+    Schema for validating the query parameters of the admin users export.
+    """
+
+    format = fields.String(
+        required=False, missing="ndjson", validate=validate.OneOf(EXPORT_FORMATS)
+    )
+    user_type = fields.String(
+        required=False,
+        missing=None,
+        validate=validate.OneOf([user_type.value for user_type in UserType]),
+    )
+
+    @post_load
+    def get_validated_admin_users_export(self, data, **kwargs):
+        """
+        Post-load hook to transform validated export parameters.
+
+        Args:
+            data (dict): The validated export parameters.
+            **kwargs: Additional keyword arguments.
+
+        Returns:
+            dict: A dictionary containing the export format, and the user type
+                exported (None for all users).
+        """
+        return {
+            "format": data.get("format"),
+            "user_type": UserType(data["user_type"]) if data.get("user_type") else None,
+        }
+
+
 class AdminDeleteUserSchema(Schema):
     """
     Schema for validating and deserializing user deletion requests.
@@ -78,7 +114,9 @@ class AdminDeleteUserSchema(Schema):
 # 1. AdminUsersFiltersSchema: Used for validating and formatting filter parameters
 #    when listing users in the admin interface. It includes options for pagination,
 #    sorting, and ordering.
-# 2. AdminDeleteUserSchema: Used for validating the reason provided when an admin
+# 2. AdminUsersExportSchema: Used for validating the format and the user type
+#    filter of the users export.
+# 3. AdminDeleteUserSchema: Used for validating the reason provided when an admin
 #    attempts to delete a user account.
 
 # These schemas help ensure data integrity, provide clear constraints on input data,
@@ -64,6 +64,29 @@ class RemoveFromCartSchema(BaseSchema):
         return {"cart_item_ids": data.get("cart_item_ids")}
 
 
+class AsyncRemoveFromCartSchema(RemoveFromCartSchema):
+    """
+    Schema for validating cart item removals in the async (ASGI) routes.
+
+    Only the request format is validated; the caller checks that the cart
+    items exist with its own (async) session.
+    """
+
+    @validates("cart_item_ids")
+    def validate_cart_items(self, value):
+        """
+        Validate that at least one cart item ID is provided.
+
+        Args:
+            value (List[str]): List of cart item IDs to be removed.
+
+        Raises:
+            ValidationError: If the list is empty.
+        """
+        if not value:
+            raise ValidationError("At least one cart_item_id must be provided.")
+
+
 class CartDetailsSchema(BaseSchema):
     """Schema for validating requests to get cart details."""
 
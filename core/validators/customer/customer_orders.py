@@ -118,6 +118,11 @@ class OrderSummaryFilterSchema(Schema):
         validate=OneOf(["pending", "shipped", "delivered", "cancelled"]),
         error_messages={INVALID_ARG_KEY: "Invalid order status"},
     )
+    archived = fields.Boolean(
+        required=False,
+        missing=False,
+        error_messages={INVALID_ARG_KEY: "Invalid archived value"},
+    )
 
     @post_load
     def get_validated_order_history_filters(self, data, **kwargs):
@@ -128,4 +133,5 @@ class OrderSummaryFilterSchema(Schema):
             "order_by": data.get("order_by"),
             "order_direction": data.get("order_direction"),
             "status": data.get("status"),
+            "archived": data.get("archived"),
         }
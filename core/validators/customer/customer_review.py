@@ -1,3 +1,7 @@
+import base64
+import binascii
+from datetime import datetime
+
 from marshmallow import Schema, ValidationError, fields, post_load, validates_schema
 from marshmallow.validate import OneOf, Range
 
@@ -10,6 +14,34 @@ REVIEW_FILTERS = {
 }
 
 
+def encode_review_cursor(created_at: datetime, review_id: str) -> str:
+    """
+    Encode the position of a review in the newest-first review order.
+
+    Args:
+        created_at (datetime): The creation time of the last review returned.
+        review_id (str): The id of the last review returned.
+
+    Returns:
+        str: An opaque cursor for the reviews endpoint.
+    """
+    position = f"{created_at.isoformat()}|{review_id}".encode()
+    return base64.urlsafe_b64encode(position).decode().rstrip("=")
+
+
+class ReviewCursor(fields.String):
+    """Field deserializing a cursor built by encode_review_cursor."""
+
+    def _deserialize(self, value, attr, data, **kwargs):
+        cursor = super()._deserialize(value, attr, data, **kwargs)
+        try:
+            position = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            created_at, review_id = position.decode().split("|")
+            return datetime.fromisoformat(created_at), review_id
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise ValidationError("Invalid cursor")
+
+
 class EditCustomerReviewSchema(Schema):
     """
     Schema for validating edit requests for customer reviews.
@@ -109,6 +141,8 @@ class ReviewFilterSchema(Schema):
         validate=OneOf(REVIEW_FILTERS.get("order")),
         error_messages={INVALID_ARG_KEY: "Invalid order_by filter"},
     )
+    # Continue the newest-first order after a given review (replaces offset)
+    cursor = ReviewCursor(required=False, missing=None)
 
     @post_load
     def get_validated_review_filters(self, data, **kwargs):
@@ -117,4 +151,5 @@ class ReviewFilterSchema(Schema):
             "limit": data.get("limit"),
             "offset": data.get("offset"),
             "order_by": data.get("order_by"),
+            "cursor": data.get("cursor"),
         }
@@ -1,8 +1,17 @@
-from marshmallow import Schema, ValidationError, fields, post_load, validate
+from marshmallow import (
+    Schema,
+    ValidationError,
+    fields,
+    post_load,
+    validate,
+    validates_schema,
+)
 from marshmallow.validate import Range
 
-from core.extensions import db
-from core.models import ProductCategory, ProductState
+from core.category_registry import category_registry
+from core.facets import PRICE_BUCKETS
+from core.models import ProductState
+from core.rankings import RANKINGS
 
 INVALID_ARG_KEY = "invalid arg"
 ORDER_BY_OPTIONS = ["asc", "desc"]
@@ -10,7 +19,7 @@ ORDER_BY_OPTIONS = ["asc", "desc"]
 
 def validate_product_category(title):
     """
-    Validate that a product category exists in the database.
+    Validate that a product category exists.
 
     Args:
         title (str): The title of the product category to validate.
@@ -18,10 +27,8 @@ def validate_product_category(title):
     Raises:
         ValidationError: If the category does not exist in the database.
     """
-    with db.session() as session:
-        category = session.query(ProductCategory).filter_by(title=title).first()
-        if not category:
-            raise ValidationError(message=f"Invalid category: {title}")
+    if category_registry.get(title) is None:
+        raise ValidationError(message=f"Invalid category: {title}")
 
 
 class ProductsFilterSchema(Schema):
@@ -60,6 +67,17 @@ class ProductsFilterSchema(Schema):
         }
 
 
+class AsyncProductsFilterSchema(ProductsFilterSchema):
+    """
+    Schema for validating product filter parameters in the async (ASGI) routes.
+
+    The category is not looked up while loading; the caller checks that it
+    exists with its own (async) session.
+    """
+
+    category = fields.String(required=False, missing=None)
+
+
 class ListingsFilterSchema(Schema):
     """
     Schema for validating product listing filter parameters.
@@ -118,13 +136,136 @@ class ListingsFilterSchema(Schema):
         }
 
 
+class ListingSearchSchema(Schema):
+    """
+    Schema for validating the filters of the faceted listing search.
+
+    Every filter is optional. The price range bounds must be bounds of the
+    price facet buckets (PRICE_BUCKETS), the maximum price being excluded.
+    """
+
+    limit = fields.Integer(
+        required=False,
+        missing=10,
+        validate=Range(min=1, max=100),
+        error_messages={INVALID_ARG_KEY: "Invalid limit"},
+    )
+    offset = fields.Integer(
+        required=False,
+        missing=0,
+        validate=Range(min=0),
+        error_messages={INVALID_ARG_KEY: "Invalid offset"},
+    )
+    category = fields.String(
+        required=False,
+        missing=None,
+        validate=validate_product_category,
+    )
+    product_state = fields.String(
+        required=False,
+        missing=None,
+        validate=validate.OneOf([state.value for state in ProductState]),
+    )
+    min_price = fields.Integer(
+        required=False,
+        missing=None,
+        validate=validate.OneOf(PRICE_BUCKETS),
+        error_messages={INVALID_ARG_KEY: "Invalid min_price"},
+    )
+    max_price = fields.Integer(
+        required=False,
+        missing=None,
+        validate=validate.OneOf(PRICE_BUCKETS[1:]),
+        error_messages={INVALID_ARG_KEY: "Invalid max_price"},
+    )
+    min_seller_rating = fields.Integer(
+        required=False,
+        missing=None,
+        validate=Range(min=1, max=5),
+        error_messages={INVALID_ARG_KEY: "Invalid min_seller_rating"},
+    )
+    is_available = fields.Boolean(required=False, missing=None)
+    price_order_by = fields.String(
+        required=False,
+        missing="asc",
+        validate=validate.OneOf(ORDER_BY_OPTIONS),
+        error_messages={INVALID_ARG_KEY: "Invalid price_order_by"},
+    )
+
+    @validates_schema
+    def validate_price_range(self, data, **kwargs):
+        """
+        Validate that the price range is not empty.
+
+        Args:
+            data (dict): The data to validate.
+
+        Raises:
+            ValidationError: If the minimum price is not below the maximum price.
+        """
+        min_price, max_price = data.get("min_price"), data.get("max_price")
+        if min_price is not None and max_price is not None and min_price >= max_price:
+            raise ValidationError("min_price must be lower than max_price")
+
+    @post_load
+    def get_validated_filters(self, data, **kwargs):
+        """Transform validated filter data into the expected format."""
+        return {
+            "limit": data.get("limit"),
+            "offset": data.get("offset"),
+            "category": data.get("category"),
+            "product_state": data.get("product_state"),
+            "min_price": data.get("min_price"),
+            "max_price": data.get("max_price"),
+            "min_seller_rating": data.get("min_seller_rating"),
+            "is_available": data.get("is_available"),
+            "price_order_by": data.get("price_order_by"),
+        }
+
+
+class RankingFilterSchema(Schema):
+    """
+    Schema for validating the parameters of the popular/trending listings.
+
+    The category is not looked up in the database: the rankings are served
+    from memory, and a category without ranked listings returns no listings.
+    """
+
+    ranking = fields.String(
+        required=False,
+        missing="popular",
+        validate=validate.OneOf(RANKINGS),
+        error_messages={INVALID_ARG_KEY: "Invalid ranking"},
+    )
+    category = fields.String(required=False, missing=None)
+    limit = fields.Integer(
+        required=False,
+        missing=10,
+        validate=Range(min=1, max=100),
+        error_messages={INVALID_ARG_KEY: "Invalid limit"},
+    )
+
+    @post_load
+    def get_validated_filters(self, data, **kwargs):
+        """Transform validated filter data into the expected format."""
+        return {
+            "ranking": data.get("ranking"),
+            "category": data.get("category"),
+            "limit": data.get("limit"),
+        }
+
+
 # This module defines schemas for validating product and listing-related operations in the customer interface.
 
 # Key components:
 # 1. validate_product_category: A function to validate that a product category exists in the database.
 # 2. ProductsFilterSchema: Validates filter parameters for retrieving products, including pagination and category filtering.
+#    AsyncProductsFilterSchema is its variant for the async routes, which check the category themselves.
 # 3. ListingsFilterSchema: Validates filter parameters for retrieving product listings, including pagination,
 #    sorting options (price, reviews, view count, purchase count), and product state filtering.
+# 4. ListingSearchSchema: Validates the filters of the faceted listing search (category, product state,
+#    price range, minimum seller rating, availability) and its pagination.
+# 5. RankingFilterSchema: Validates the ranking, category and limit of the popular/trending listings.
 
 # These schemas ensure that all product and listing-related queries receive valid filter parameters and
 # transform the data into a consistent format for further processing by the application logic.
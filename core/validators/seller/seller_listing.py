@@ -1,8 +1,17 @@
 from decimal import Decimal
 
-from marshmallow import Schema, ValidationError, fields, post_load, validates
-from marshmallow.validate import Length
-
+from marshmallow import (
+    EXCLUDE,
+    Schema,
+    ValidationError,
+    fields,
+    post_load,
+    pre_load,
+    validates,
+)
+from marshmallow.validate import Length, OneOf
+
+from core.exports import EXPORT_FORMATS
 from core.models import ProductState
 
 
@@ -118,6 +127,54 @@ class AddListingSchema(Schema):
         }
 
 
+class ImportListingSchema(AddListingSchema):
+    """
+    Schema for validating a row of a listing import.
+
+    A row with the id of one of the seller's listings updates it, a row without
+    creates a new listing. The other columns of an export are ignored, so an
+    exported file can be edited and imported back.
+    """
+
+    class Meta:
+        unknown = EXCLUDE
+
+    id = fields.String(required=False, missing=None, validate=Length(equal=26))
+
+    @pre_load
+    def drop_empty_values(self, data, **kwargs):
+        """Treat the empty cells of a CSV file as missing values."""
+        return {key: value for key, value in data.items() if value not in ("", None)}
+
+    @post_load
+    def get_validated_listing(self, data, **kwargs):
+        """Transform validated listing row data into the expected format."""
+        return {
+            "id": data.get("id"),
+            "product_id": data.get("product_id"),
+            "quantity": data.get("quantity"),
+            "price": data.get("price"),
+            "product_state": data.get("product_state"),
+        }
+
+
+class ListingsExportSchema(Schema):
+    """Schema for validating the query parameters of the seller listings export."""
+
+    format = fields.String(
+        required=False, missing="ndjson", validate=OneOf(EXPORT_FORMATS)
+    )
+
+    @post_load
+    def get_validated_listings_export(self, data, **kwargs):
+        """Transform validated export parameters into the expected format."""
+        return {"format": data.get("format")}
+
+
+class ListingsImportSchema(ListingsExportSchema):
+    """Schema for validating the query parameters of the seller listings import."""
+
+
 # This module defines schemas and validation functions for seller listing operations.
 
 # Key components:
@@ -125,6 +182,10 @@ class AddListingSchema(Schema):
 # 2. validate_price: Ensures that the listing price is within a valid range.
 # 3. EditListingSchema: Validates data for updating existing listings.
 # 4. AddListingSchema: Validates data for creating new listings.
+# 5. ImportListingSchema: Validates a row of a listings import (AddListingSchema,
+#    with the id of the listing to update, if any).
+# 6. ListingsExportSchema and ListingsImportSchema: Validate the format of the
+#    listings export and import.
 
 # These schemas ensure that all listing-related operations receive valid data and
 # transform the data into a consistent format for further processing by the application logic.
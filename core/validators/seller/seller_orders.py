@@ -65,3 +65,60 @@ class UpdateOrderStatusSchema(Schema):
     def make_update_dict(self, data, **kwargs):
         """Transform validated status update data into the expected format."""
         return {"status": data["status"]}
+
+
+# Maximum number of orders updated by one bulk status update
+BULK_STATUS_MAX_ORDERS = 500
+
+
+class BulkUpdateOrderStatusSchema(Schema):
+    """
+    Schema for validating bulk order status update requests.
+
+    This schema validates the target status and the list of orders moved to it.
+    """
+
+    order_ids = fields.List(
+        fields.String(validate=validate.Length(equal=26)),
+        required=True,
+        validate=validate.Length(min=1, max=BULK_STATUS_MAX_ORDERS),
+    )
+    status = fields.String(
+        required=True,
+        validate=validate.OneOf(["pending", "shipped", "delivered", "cancelled"]),
+    )
+
+    @post_load
+    def make_update_dict(self, data, **kwargs):
+        """Transform validated bulk update data into the expected format."""
+        return {
+            "order_ids": list(dict.fromkeys(data["order_ids"])),
+            "status": data["status"],
+        }
+
+
+class SellerAnalyticsSchema(Schema):
+    """
+    Schema for validating the parameters of the seller analytics.
+
+    This schema validates the number of days of revenue and the number of best
+    selling listings returned.
+    """
+
+    days = fields.Integer(
+        required=False,
+        missing=30,
+        validate=validate.Range(min=1, max=366),
+        error_messages={"invalid arg": "Invalid days value"},
+    )
+    top_listings = fields.Integer(
+        required=False,
+        missing=10,
+        validate=validate.Range(min=1, max=100),
+        error_messages={"invalid arg": "Invalid top_listings value"},
+    )
+
+    @post_load
+    def make_filter_dict(self, data, **kwargs):
+        """Transform validated analytics parameters into the expected format."""
+        return {"days": data.get("days"), "top_listings": data.get("top_listings")}
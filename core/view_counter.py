@@ -0,0 +1,237 @@
+import asyncio
+import atexit
+import threading
+from collections import Counter
+from time import perf_counter
+
+from sqlalchemy import Integer, String, column, update, values
+from sqlalchemy.exc import SQLAlchemyError
+
+from .extensions import db
+from .metrics import (
+    view_counter_dropped,
+    view_counter_flush_duration,
+    view_counter_flush_failures,
+    view_counter_flushed_views,
+    view_counter_flushes,
+    view_counter_pending,
+)
+from .models import Listing
+
+
+class ViewCounter:
+    """
+    Buffer listing views in memory and add them to listings.view_count in batches.
+
+    Recording a view only increments an in-process counter. The buffer is
+    written by flush(), which a scheduled job calls every
+    VIEW_COUNTER_FLUSH_INTERVAL seconds in every process: all the listings
+    viewed since the last flush are updated by a single statement, so a
+    popular listing gets one row update per interval and process instead of
+    one per view.
+    """
+
+    def __init__(self, app=None):
+        self.max_pending = 0
+        self._app = None
+        self._pending = Counter()
+        self._mutex = threading.Lock()
+        self._flush_listeners = []
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, flush_at_exit=True):
+        """
+        Read the buffer bound from the configuration.
+
+        Args:
+            app (Flask): The Flask application instance.
+            flush_at_exit (bool): Whether to flush the remaining views through
+                the Flask session when the process exits. The ASGI
+                application flushes them on shutdown instead.
+        """
+        self.max_pending = app.config["VIEW_COUNTER_MAX_PENDING"]
+
+        if flush_at_exit and self._app is None:
+            atexit.register(self._flush_at_exit)
+            self._app = app
+
+    def add_flush_listener(self, listener):
+        """
+        Call listener(views) after every successful flush.
+
+        Args:
+            listener (callable): Called with the number of views written per
+                listing id.
+        """
+        self._flush_listeners.append(listener)
+
+    def record(self, listing_id: str):
+        """
+        Count one view of a listing.
+
+        Args:
+            listing_id (str): The id of the viewed listing.
+        """
+        with self._mutex:
+            if (
+                listing_id not in self._pending
+                and len(self._pending) >= self.max_pending
+            ):
+                view_counter_dropped.inc()
+                return
+            self._pending[listing_id] += 1
+            view_counter_pending.set(len(self._pending))
+
+    def drain(self) -> dict:
+        """
+        Take the buffered views, leaving the buffer empty.
+
+        Returns:
+            dict: The number of views per listing id since the last drain.
+        """
+        with self._mutex:
+            pending, self._pending = self._pending, Counter()
+            view_counter_pending.set(0)
+        return pending
+
+    def flush(self) -> int:
+        """
+        Add the buffered views to listings.view_count.
+
+        Must be called within an application context. If the statement
+        fails, the views are put back into the buffer (within
+        VIEW_COUNTER_MAX_PENDING listings) and retried by the next flush.
+
+        Returns:
+            int: The number of views written.
+        """
+        pending = self.drain()
+        if not pending:
+            return 0
+
+        started_at = perf_counter()
+        try:
+            db.session.execute(self._update_statement(pending))
+            db.session.commit()
+        except SQLAlchemyError:
+            db.session.rollback()
+            self._restore(pending)
+            raise
+        finally:
+            view_counter_flush_duration.observe(perf_counter() - started_at)
+
+        return self._record_flush(pending)
+
+    async def flush_async(self, session_factory) -> int:
+        """
+        Add the buffered views to listings.view_count through the async engine.
+
+        Used by the ASGI application (see core/asgi), which has no Flask
+        session. Failures are handled as in flush().
+
+        Args:
+            session_factory (async_sessionmaker): The async session factory.
+
+        Returns:
+            int: The number of views written.
+        """
+        pending = self.drain()
+        if not pending:
+            return 0
+
+        started_at = perf_counter()
+        try:
+            async with session_factory() as session:
+                await session.execute(self._update_statement(pending))
+                await session.commit()
+        except (SQLAlchemyError, asyncio.CancelledError):
+            self._restore(pending)
+            raise
+        finally:
+            view_counter_flush_duration.observe(perf_counter() - started_at)
+
+        return self._record_flush(pending)
+
+    @staticmethod
+    def _update_statement(pending):
+        """
+        Build the UPDATE ... FROM (VALUES ...) adding the views of every listing.
+
+        The rows are listed in id order, so that concurrent flushes from
+        several processes lock the listings in the same order and cannot
+        deadlock.
+        """
+        batch = values(
+            column("id", String),
+            column("views", Integer),
+            name="listing_views",
+        ).data(sorted(pending.items()))
+
+        return (
+            update(Listing)
+            .where(Listing.id == batch.c.id)
+            .values(view_count=Listing.view_count + batch.c.views)
+            .execution_options(synchronize_session=False)
+        )
+
+    def _record_flush(self, pending) -> int:
+        """Export the metrics of a successful flush and notify the listeners."""
+        views = sum(pending.values())
+        view_counter_flushes.inc()
+        view_counter_flushed_views.inc(views)
+        for listener in self._flush_listeners:
+            listener(pending)
+        return views
+
+    def _restore(self, pending):
+        """Put the views of a failed flush back into the buffer."""
+        view_counter_flush_failures.inc()
+        with self._mutex:
+            for listing_id, views in pending.items():
+                if (
+                    listing_id not in self._pending
+                    and len(self._pending) >= self.max_pending
+                ):
+                    view_counter_dropped.inc(views)
+                    continue
+                self._pending[listing_id] += views
+            view_counter_pending.set(len(self._pending))
+
+    def _flush_at_exit(self):
+        """Write the remaining views when the process exits normally."""
+        try:
+            with self._app.app_context():
+                self.flush()
+        except Exception:
+            self._app.logger.exception("view counter: final flush failed")
+
+
+view_counter = ViewCounter()
+
+
+# This module counts listing views without updating the listing row on every
+# request.
+
+# Usage (within a request):
+#   view_counter.record(listing.id)
+
+# The buffered views are written by the flush_listing_views job
+# (core/scheduler_jobs.py), which runs every VIEW_COUNTER_FLUSH_INTERVAL
+# seconds in every process (it is not leader-only: each process owns its
+# buffer). The ASGI application runs the same flush from a background task on
+# its event loop (core/asgi/__init__.py).
+
+# Loss bounds: view_count is a best-effort counter.
+# - A process killed without a clean shutdown (SIGKILL, OOM, crash) loses the
+#   views recorded since its last flush, i.e. at most
+#   VIEW_COUNTER_FLUSH_INTERVAL seconds of views per process. A normal exit
+#   (gunicorn worker restart, SIGTERM) flushes them through atexit, or on
+#   shutdown of the ASGI application.
+# - At most VIEW_COUNTER_MAX_PENDING distinct listings are buffered per
+#   process; views of further listings are dropped until the next flush. A
+#   failed flush puts its views back within the same bound.
+# - The drop and failure counts are exported as view_counter_dropped_total
+#   and view_counter_flush_failures_total.
+# view_count lags behind by up to one flush interval.
@@ -0,0 +1,135 @@
+import os
+import statistics
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+import requests
+
+SYNC_URL = os.getenv("SYNC_URL", "http://localhost:5000")
+ASYNC_URL = os.getenv("ASYNC_URL", "http://localhost:8000")
+CONCURRENCY = int(os.getenv("CONCURRENCY", "64"))
+REQUESTS = int(os.getenv("REQUESTS", "2000"))
+CUSTOMER_EMAIL = os.getenv("CUSTOMER_EMAIL")
+CUSTOMER_PASSWORD = os.getenv("CUSTOMER_PASSWORD")
+
+_local = threading.local()
+
+
+def session() -> requests.Session:
+    """Return the HTTP session of the current thread (one keep-alive connection each)."""
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+    return _local.session
+
+
+def login() -> dict:
+    """Log in the benchmark customer and return the authorization headers."""
+    if not CUSTOMER_EMAIL:
+        return {}
+
+    r = requests.post(
+        f"{SYNC_URL}/login",
+        json={"email": CUSTOMER_EMAIL, "password": CUSTOMER_PASSWORD},
+    )
+    r.raise_for_status()
+    return {"Authorization": f"Bearer {r.json()['data']['access_token']}"}
+
+
+def timed_request(method, url, headers, body):
+    """
+    Send one request and measure its latency.
+
+    Returns:
+        tuple: (latency in seconds, whether the response status was 2xx).
+    """
+    started_at = perf_counter()
+    try:
+        r = session().request(method, url, headers=headers, json=body, timeout=30)
+        ok = r.ok
+    except requests.RequestException:
+        ok = False
+    return perf_counter() - started_at, ok
+
+
+def run_scenario(base_url, method, path, headers, body):
+    """
+    Send REQUESTS requests with CONCURRENCY clients and summarize the results.
+
+    Returns:
+        dict: Throughput, latency percentiles and error count.
+    """
+    url = f"{base_url}{path}"
+
+    # Warm up the connections and the server-side pools
+    with ThreadPoolExecutor(CONCURRENCY) as executor:
+        list(
+            executor.map(
+                lambda _: timed_request(method, url, headers, body), range(CONCURRENCY)
+            )
+        )
+
+    started_at = perf_counter()
+    with ThreadPoolExecutor(CONCURRENCY) as executor:
+        results = list(
+            executor.map(
+                lambda _: timed_request(method, url, headers, body), range(REQUESTS)
+            )
+        )
+    elapsed = perf_counter() - started_at
+
+    latencies = sorted(latency for latency, _ in results)
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "rps": REQUESTS / elapsed,
+        "p50": quantiles[49] * 1000,
+        "p99": quantiles[98] * 1000,
+        "errors": sum(1 for _, ok in results if not ok),
+    }
+
+
+def main():
+    headers = login()
+
+    scenarios = [
+        ("GET", "/categories", None),
+        ("POST", "/products", {"limit": 20}),
+    ]
+    if headers:
+        scenarios.append(("GET", "/cart", None))
+    else:
+        print("CUSTOMER_EMAIL not set, skipping the cart scenario")
+
+    print(f"{REQUESTS} requests, {CONCURRENCY} concurrent clients")
+    print(
+        f"{'scenario':<18} {'mode':<6} {'req/s':>9} {'p50 ms':>9} "
+        f"{'p99 ms':>9} {'errors':>7}"
+    )
+    for method, path, body in scenarios:
+        for mode, base_url in (("sync", SYNC_URL), ("async", ASYNC_URL)):
+            r = run_scenario(base_url, method, path, headers, body)
+            print(
+                f"{method + ' ' + path:<18} {mode:<6} {r['rps']:>9.1f} "
+                f"{r['p50']:>9.1f} {r['p99']:>9.1f} {r['errors']:>7}"
+            )
+
+
+if __name__ == "__main__":
+    main()
+
+
+# This script compares the sync (WSGI) and async (ASGI) deployments of the
+# endpoints served by core/asgi, reporting requests/sec, p50 and p99 latency.
+
+# Run both deployments with the same server and worker count, against the same
+# database (hypercorn serves the Flask application through its WSGI adapter):
+#   $ hypercorn -w 4 -b 0.0.0.0:5000 app:app
+#   $ hypercorn -w 4 -b 0.0.0.0:8000 asgi:app
+
+# Then run the benchmark (the cart scenario needs an existing customer):
+#   $ CONCURRENCY=64 REQUESTS=2000 \
+#     CUSTOMER_EMAIL=customer@example.com CUSTOMER_PASSWORD=... \
+#     python tools/bench_asgi.py
+
+# Use the same FLASK_ENV for both deployments: the development configuration
+# logs every query (SQLALCHEMY_ECHO) in both of them.
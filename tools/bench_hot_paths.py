@@ -0,0 +1,330 @@
+import argparse
+import json
+import os
+import platform
+import sys
+from collections import namedtuple
+from decimal import Decimal
+from timeit import Timer
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_json import TO_DICT_ONLY, build_product_page  # noqa: E402
+from flask import Flask  # noqa: E402
+
+from core.blueprints.customer.cart.routes import cart_summary  # noqa: E402
+from core.blueprints.customer.wishlists.routes import wishlist_summary  # noqa: E402
+from core.blueprints.seller.listings.routes import listings_summary  # noqa: E402
+from core.blueprints.utils import success_response  # noqa: E402
+from core.json_provider import OrjsonProvider  # noqa: E402
+from core.models import ProductState  # noqa: E402
+from core.validators.auth.user_auth import RegisterCredentialsSchema  # noqa: E402
+from core.validators.customer.customer_cart import UpsertCartSchema  # noqa: E402
+from core.validators.customer.customer_orders import (
+    OrderSummaryFilterSchema,  # noqa: E402
+)
+from core.validators.public_views.public_products import (  # noqa: E402
+    ListingsFilterSchema,
+    ProductsFilterSchema,
+)
+from core.validators.seller.seller_listing import AddListingSchema  # noqa: E402
+from core.validators.seller.seller_orders import (  # noqa: E402
+    BulkUpdateOrderStatusSchema,
+    OrderFilterSchema,
+)
+
+BASELINE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "bench_hot_paths.json"
+)
+CART_ENTRIES = int(os.getenv("CART_ENTRIES", "50"))
+WISHLIST_ENTRIES = int(os.getenv("WISHLIST_ENTRIES", "100"))
+SELLER_LISTINGS = int(os.getenv("SELLER_LISTINGS", "500"))
+BULK_ORDERS = int(os.getenv("BULK_ORDERS", "500"))
+REPEAT = int(os.getenv("REPEAT", "5"))
+
+CartRow = namedtuple(
+    "CartRow",
+    "product_name product_id product_category product_img product_state "
+    "listing_id price_per_unit quantity company_name",
+)
+SellerListingRow = namedtuple(
+    "SellerListingRow",
+    "listing_id product_name product_category product_description product_img "
+    "quantity price product_state is_available purchase_count view_count "
+    "average_rating review_count",
+)
+
+
+def calibrate():
+    """
+    A fixed pure-Python workload, timed with the benchmarks.
+
+    Every benchmark is stored relative to it, so that the load of the machine
+    (e.g. a shared CI runner) cancels out.
+    """
+    rows = [
+        {"id": f"{i:026d}", "price": i * 1.5, "tags": [i, i + 1]} for i in range(500)
+    ]
+    return sorted(rows, key=lambda row: (row["price"], row["id"]), reverse=True)
+
+
+def cart_rows():
+    return [
+        CartRow(
+            product_name=f"Product {i}",
+            product_id=f"P{i:025d}",
+            product_category="Food",
+            product_img="https://example.com/image.png",
+            product_state=ProductState.NEW,
+            listing_id=f"L{i:025d}",
+            price_per_unit=Decimal("19.99") + i,
+            quantity=i % 5 + 1,
+            company_name="ACME",
+        )
+        for i in range(CART_ENTRIES)
+    ]
+
+
+def wishlist():
+    return SimpleNamespace(
+        id="W" * 26,
+        name="Birthday",
+        wishlist_entries=[
+            SimpleNamespace(
+                product=SimpleNamespace(name=f"Product {i}"),
+                product_category="Garden",
+                product_img="https://example.com/image.png",
+                product_state=ProductState.USED,
+                price_per_unit=Decimal("9.99") + i,
+                company_name="ACME",
+            )
+            for i in range(WISHLIST_ENTRIES)
+        ],
+    )
+
+
+def seller_listing_rows():
+    return [
+        SellerListingRow(
+            listing_id=f"L{i:025d}",
+            product_name=f"Product {i}",
+            product_category="Tech",
+            product_description="d" * 200,
+            product_img="https://example.com/image.png",
+            quantity=10,
+            price=Decimal("99.99") + i,
+            product_state=ProductState.NEW,
+            is_available=True,
+            purchase_count=i,
+            view_count=i * 10,
+            average_rating=4.2,
+            review_count=i % 20,
+        )
+        for i in range(SELLER_LISTINGS)
+    ]
+
+
+def benchmarks(app):
+    """
+    Build the benchmarked calls.
+
+    Returns:
+        dict: The function to time for each benchmark name.
+    """
+    cart = cart_rows()
+    wishes = wishlist()
+    seller_listings = seller_listing_rows()
+    listings = build_product_page().listing
+    seller_page = listings_summary(seller_listings)
+
+    def validate(schema, payload):
+        return lambda: schema.load(payload)
+
+    def respond(data):
+        def call():
+            with app.app_context():
+                return success_response(data=data)
+
+        return call
+
+    return {
+        "cart_summary": lambda: cart_summary(cart),
+        "wishlist_summary": lambda: wishlist_summary(wishes),
+        "listings_summary": lambda: listings_summary(seller_listings),
+        "SerializerMixin.to_dict (product page)": lambda: [
+            listing.to_dict(only=TO_DICT_ONLY) for listing in listings
+        ],
+        "success_response (seller listings)": respond(seller_page),
+        "success_response (empty)": respond(None),
+        "RegisterCredentialsSchema": validate(
+            RegisterCredentialsSchema(),
+            {
+                "email": "customer@example.com",
+                "password": "Password1?",
+                "name": "Mario",
+                "surname": "Rossi",
+            },
+        ),
+        "ProductsFilterSchema": validate(
+            ProductsFilterSchema(), {"limit": 20, "offset": 40}
+        ),
+        "ListingsFilterSchema": validate(
+            ListingsFilterSchema(),
+            {"limit": 20, "price_order_by": "asc", "product_state": "new"},
+        ),
+        "UpsertCartSchema": validate(
+            UpsertCartSchema(), {"listing_id": "L" * 26, "quantity": 2}
+        ),
+        "OrderSummaryFilterSchema": validate(
+            OrderSummaryFilterSchema(), {"limit": 20, "status": "pending"}
+        ),
+        "AddListingSchema": validate(
+            AddListingSchema(),
+            {
+                "product_id": "P" * 26,
+                "quantity": 10,
+                "price": "19.99",
+                "product_state": "new",
+            },
+        ),
+        "OrderFilterSchema (seller)": validate(
+            OrderFilterSchema(), {"status": "pending", "limit": 50}
+        ),
+        f"BulkUpdateOrderStatusSchema ({BULK_ORDERS} ids)": validate(
+            BulkUpdateOrderStatusSchema(),
+            {
+                "order_ids": [f"{i:026d}" for i in range(BULK_ORDERS)],
+                "status": "shipped",
+            },
+        ),
+    }
+
+
+def measure(func) -> tuple[float, float]:
+    """
+    Time func against the calibration workload.
+
+    Each of the REPEAT rounds times func, then the calibration, for at least
+    0.2 seconds each, so that both are measured under the same load.
+
+    Returns:
+        tuple: The best time per call of func, and its ratio to the best
+            time of the calibration.
+    """
+    timer = Timer(func)
+    calibration = Timer(calibrate)
+    number, _ = timer.autorange()
+    calibration_number, _ = calibration.autorange()
+
+    best = best_calibration = float("inf")
+    for _ in range(REPEAT):
+        best = min(best, timer.timeit(number) / number)
+        best_calibration = min(
+            best_calibration,
+            calibration.timeit(calibration_number) / calibration_number,
+        )
+    return best, best / best_calibration
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the hot-path helpers.")
+    parser.add_argument(
+        "--save", action="store_true", help="store the results as the new baseline"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=float(os.getenv("BENCH_THRESHOLD", "0.30")),
+        help="fail when a benchmark is this much slower than its baseline",
+    )
+    parser.add_argument("--baseline", default=BASELINE)
+    args = parser.parse_args()
+
+    # Without a baseline the comparison cannot fail, so it must not pass either
+    if not args.save and not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}, record one with --save")
+        sys.exit(2)
+
+    app = Flask(__name__)
+    app.json = OrjsonProvider(app)
+
+    results = {name: measure(func) for name, func in benchmarks(app).items()}
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            recorded = json.load(f)
+        baseline = recorded["benchmarks"]
+        if recorded.get("node") != platform.node():
+            print(
+                f"warning: baseline recorded on {recorded.get('node')}, "
+                "the results are not comparable across machines"
+            )
+
+    print(f"{'benchmark':<44} {'ms':>9} {'relative':>9} {'baseline':>9} {'change':>8}")
+    regressions = []
+    for name, (seconds, relative) in results.items():
+        line = f"{name:<44} {seconds * 1000:>9.3f} {relative:>9.3f}"
+        if name in baseline:
+            change = relative / baseline[name] - 1
+            line += f" {baseline[name]:>9.3f} {change:>+8.0%}"
+            if change > args.threshold:
+                regressions.append(name)
+                line += "  REGRESSION"
+        print(line)
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(
+                {
+                    "node": platform.node(),
+                    "python": platform.python_version(),
+                    "benchmarks": {
+                        name: round(relative, 4)
+                        for name, (_, relative) in results.items()
+                    },
+                },
+                f,
+                indent=2,
+            )
+            f.write("\n")
+        print(f"baseline saved to {args.baseline}")
+    elif regressions:
+        print(
+            f"{len(regressions)} benchmark(s) more than {args.threshold:.0%} "
+            "slower than the baseline"
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
+
+
+# This script times the helpers run on every request of the hot routes, on
+# in-memory payloads of realistic size: the cart, wishlist and seller listings
+# summaries, SerializerMixin.to_dict on a product page, success_response with
+# the orjson provider, and the marshmallow schemas of core/validators (those
+# that do not query the database or geocode an address).
+
+# Each result is stored relative to a fixed pure-Python workload timed
+# alternately with it, so the drift of a shared CPU cancels out. The ratios
+# still depend on the CPU and the Python build (the helpers spend their time
+# in Decimal, namedtuple and C extensions, the calibration does not), so the
+# baseline (tools/bench_hot_paths.json) is not committed: record it with
+# --save on the machine that gates the deploy, and keep it there for the
+# following runs. The script exits with status 1 when a benchmark is more
+# than --threshold (default 30%, or BENCH_THRESHOLD) slower than its
+# baseline, and with status 2 when there is no baseline, so it can gate a
+# deploy.
+
+# Usage:
+#   $ python tools/bench_hot_paths.py          # compare with the baseline
+#   $ python tools/bench_hot_paths.py --save   # record a new baseline
+# Record a new baseline (on the same machine) after a change that makes a
+# helper intentionally slower, or after an optimization, so that later
+# regressions are measured from it. The payload sizes are set by
+# CART_ENTRIES, WISHLIST_ENTRIES, SELLER_LISTINGS, BULK_ORDERS and, for the
+# product page, LISTINGS and REVIEWS (see tools/bench_json.py); keep them at
+# their defaults when comparing with the baseline.
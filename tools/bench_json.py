@@ -0,0 +1,142 @@
+import os
+import sys
+from datetime import datetime
+from decimal import Decimal
+from timeit import repeat
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from core.json_provider import OrjsonProvider  # noqa: E402
+from core.models import (  # noqa: E402
+    Customer,
+    Listing,
+    ListingReview,
+    Product,
+    ProductState,
+    ReviewRate,
+    Seller,
+)
+from core.serializers import ModelSerializer  # noqa: E402
+
+LISTINGS = int(os.getenv("LISTINGS", "100"))
+REVIEWS = int(os.getenv("REVIEWS", "5"))
+ROUNDS = int(os.getenv("ROUNDS", "50"))
+
+LISTING_FIELDS = (
+    "id",
+    "price",
+    "quantity",
+    "is_available",
+    "product_state",
+    "purchase_count",
+    "view_count",
+)
+REVIEW_FIELDS = ("title", "description", "rating", "created_at")
+
+page_listing_serializer = ModelSerializer(
+    *LISTING_FIELDS,
+    seller=ModelSerializer("id", "name"),
+    review=ModelSerializer(*REVIEW_FIELDS, customer=ModelSerializer("id", "name")),
+)
+
+TO_DICT_ONLY = (
+    *LISTING_FIELDS,
+    "seller.id",
+    "seller.name",
+    *(f"review.{field}" for field in REVIEW_FIELDS),
+    "review.customer.id",
+    "review.customer.name",
+)
+
+
+def build_product_page():
+    """Build a product with LISTINGS listings of REVIEWS reviews each, in memory."""
+    now = datetime(2024, 1, 1, 12, 30)
+    product = Product(id="P" * 26, name="Product", description="d" * 500)
+    customer = Customer(id="C" * 26, name="Customer")
+
+    for i in range(LISTINGS):
+        listing = Listing(
+            id=f"{i:026d}",
+            price=Decimal("19.99") + i,
+            quantity=10,
+            is_available=True,
+            product_state=ProductState.NEW,
+            purchase_count=i,
+            view_count=i * 10,
+            seller=Seller(id=f"S{i:025d}", name=f"Seller {i}"),
+            product=product,
+        )
+        for j in range(REVIEWS):
+            listing.review.append(
+                ListingReview(
+                    title=f"Review {j}",
+                    description="r" * 200,
+                    rating=ReviewRate.FOUR,
+                    created_at=now,
+                    customer=customer,
+                )
+            )
+
+    return product
+
+
+def bench(name, func):
+    """Run func ROUNDS times (best of 5) and print the time per call."""
+    best = min(repeat(func, number=ROUNDS, repeat=5)) / ROUNDS
+    print(f"{name:<44} {best * 1000:>9.3f} ms")
+    return best
+
+
+def main():
+    app = Flask(__name__)
+    default_provider = DefaultJSONProvider(app)
+    orjson_provider = OrjsonProvider(app)
+
+    listings = build_product_page().listing
+
+    def to_dict_page():
+        return [listing.to_dict(only=TO_DICT_ONLY) for listing in listings]
+
+    def serializer_page():
+        return page_listing_serializer.dump_many(listings)
+
+    to_dict_data = to_dict_page()
+    serializer_data = serializer_page()
+
+    print(f"product page: {LISTINGS} listings, {REVIEWS} reviews each")
+    old = bench(
+        "to_dict + DefaultJSONProvider",
+        lambda: default_provider.response(to_dict_page()),
+    )
+    bench("  to_dict", to_dict_page)
+    bench(
+        "  DefaultJSONProvider.response",
+        lambda: default_provider.response(to_dict_data),
+    )
+    new = bench(
+        "ModelSerializer + OrjsonProvider",
+        lambda: orjson_provider.response(serializer_page()),
+    )
+    bench("  ModelSerializer", serializer_page)
+    bench(
+        "  OrjsonProvider.response", lambda: orjson_provider.response(serializer_data)
+    )
+    print(f"speedup: {old / new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
+
+
+# This script compares the cost of building the JSON body of a product page
+# with SerializerMixin.to_dict and the default Flask JSON provider, against the
+# per-model serializers (core/serializers.py) and the orjson provider
+# (core/json_provider.py). It does not need a database: the page is built from
+# in-memory model instances.
+
+# Usage:
+#   $ LISTINGS=100 REVIEWS=5 python tools/bench_json.py
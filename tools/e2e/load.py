@@ -0,0 +1,525 @@
+import argparse
+import json
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from time import monotonic, perf_counter
+
+import requests
+import utils
+from seller import Seller
+from user import User
+from utils import PREFIX
+
+ADDRESS = {
+    "address_street": "Via Genova 2",
+    "address_city": "San Martino di Lupari",
+    "address_state": "Padova",
+    "address_country": "Italy",
+    "address_postal_code": "35018",
+}
+
+
+class Pacer:
+    """
+    Spread the requests of all the virtual users over time.
+
+    The target rate ramps linearly from start_rps to target_rps during the
+    first ramp seconds, then holds. Each request takes the next free slot and
+    waits for it, so the offered load follows the ramp as long as there are
+    enough virtual users to keep up. A rate of 0 disables pacing: every user
+    sends its next request as soon as the previous one completes.
+    """
+
+    def __init__(self, start_rps: float, target_rps: float, ramp: float):
+        self.start_rps = start_rps
+        self.target_rps = target_rps
+        self.ramp = ramp
+        self.started_at = monotonic()
+        self._next_at = self.started_at
+        self._mutex = threading.Lock()
+
+    def rate(self, at: float) -> float:
+        """Return the target requests/sec at a monotonic time."""
+        elapsed = at - self.started_at
+        if self.ramp <= 0 or elapsed >= self.ramp:
+            return self.target_rps
+        return self.start_rps + (self.target_rps - self.start_rps) * elapsed / self.ramp
+
+    def wait(self):
+        """Block until the calling user may send its next request."""
+        if self.target_rps <= 0:
+            return
+
+        with self._mutex:
+            now = monotonic()
+            # Slots missed because every user was busy are not made up for
+            # later in a burst: the server is saturated, not the pacer
+            at = max(self._next_at, now - 1)
+            self._next_at = at + 1 / max(self.rate(at), 0.1)
+
+        delay = at - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class Stats:
+    """Latencies and errors of the requests sent, per endpoint."""
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self._mutex = threading.Lock()
+
+    def record(self, endpoint: str, latency: float, ok: bool):
+        with self._mutex:
+            self.latencies.setdefault(endpoint, []).append(latency)
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def report(self, elapsed: float) -> list:
+        """
+        Summarize the run.
+
+        Args:
+            elapsed (float): The duration of the run in seconds.
+
+        Returns:
+            list: One dict per endpoint, then one for all the endpoints.
+        """
+        with self._mutex:
+            rows = [
+                self._summarize(
+                    endpoint, latencies, self.errors.get(endpoint, 0), elapsed
+                )
+                for endpoint, latencies in sorted(self.latencies.items())
+            ]
+            rows.append(
+                self._summarize(
+                    "total",
+                    [lat for latencies in self.latencies.values() for lat in latencies],
+                    sum(self.errors.values()),
+                    elapsed,
+                )
+            )
+        return rows
+
+    @staticmethod
+    def _summarize(endpoint, latencies, errors, elapsed):
+        latencies = sorted(latencies)
+        if len(latencies) > 1:
+            quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+        else:
+            quantiles = latencies * 99 or [0] * 99
+        return {
+            "endpoint": endpoint,
+            "requests": len(latencies),
+            "errors": errors,
+            "rps": len(latencies) / elapsed if elapsed else 0,
+            "p50": quantiles[49] * 1000,
+            "p90": quantiles[89] * 1000,
+            "p99": quantiles[98] * 1000,
+            "max": (latencies[-1] if latencies else 0) * 1000,
+        }
+
+
+@dataclass
+class Catalog:
+    """The categories, products and listings found before the run."""
+
+    categories: list = field(default_factory=list)
+    products: list = field(default_factory=list)
+    listings: dict = field(default_factory=dict)
+
+    @staticmethod
+    def load(access_token: str) -> "Catalog":
+        """
+        Read the catalog through the public endpoints.
+
+        Args:
+            access_token (str): The token of any logged in user.
+
+        Returns:
+            Catalog: The catalog, with the listings of each product.
+        """
+        headers = {"Authorization": f"Bearer {access_token}"}
+        catalog = Catalog()
+
+        r = requests.get(f"{PREFIX}/categories", headers=headers)
+        catalog.categories = [c["title"] for c in r.json()["data"]]
+
+        r = requests.post(f"{PREFIX}/products", headers=headers, json={"limit": 100})
+        catalog.products = [p["id"] for p in r.json()["data"]]
+
+        for product_id in catalog.products:
+            r = requests.post(
+                f"{PREFIX}/products/{product_id}",
+                headers=headers,
+                json={"limit": 100},
+            )
+            catalog.listings[product_id] = [
+                listing["id"]
+                for listing in r.json()["data"]["listings"]
+                if listing["is_available"] and listing["quantity"] > 0
+            ]
+
+        catalog.products = [p for p in catalog.products if catalog.listings[p]]
+        return catalog
+
+    def random_listing(self) -> tuple[str, str]:
+        """Return a random (product_id, listing_id) pair."""
+        product_id = random.choice(self.products)
+        return product_id, random.choice(self.listings[product_id])
+
+
+class VirtualUser:
+    """
+    A customer or seller sending the requests of the scenarios in a loop.
+
+    Each virtual user has its own HTTP session (one keep-alive connection) and
+    runs in its own thread.
+    """
+
+    def __init__(self, access_token: str, catalog: Catalog, pacer: Pacer, stats: Stats):
+        self.catalog = catalog
+        self.pacer = pacer
+        self.stats = stats
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = f"Bearer {access_token}"
+
+    def request(self, method: str, endpoint: str, path: str, body=None):
+        """
+        Send one paced request and record its latency under endpoint.
+
+        Args:
+            method (str): The HTTP method.
+            endpoint (str): The name of the endpoint in the report, e.g.
+                "GET /products/<product>".
+            path (str): The path of the request.
+            body (dict, optional): The JSON body.
+
+        Returns:
+            any: The "data" of the response, or None if the request failed.
+        """
+        self.pacer.wait()
+
+        started_at = perf_counter()
+        try:
+            r = self.session.request(method, f"{PREFIX}{path}", json=body, timeout=30)
+            ok = r.ok
+        except requests.RequestException:
+            r, ok = None, False
+        self.stats.record(endpoint, perf_counter() - started_at, ok)
+
+        if not ok:
+            return None
+        try:
+            return r.json().get("data")
+        except ValueError:
+            return None
+
+
+def browse(user: VirtualUser):
+    """Open the categories, a category, a product and one of its listings."""
+    product_id, listing_id = user.catalog.random_listing()
+
+    user.request("GET", "GET /categories", "/categories")
+    user.request(
+        "POST",
+        "POST /products",
+        "/products",
+        {"category": random.choice(user.catalog.categories), "limit": 20},
+    )
+    user.request(
+        "POST",
+        "POST /products/<product>",
+        f"/products/{product_id}",
+        {"limit": 10},
+    )
+    user.request(
+        "GET",
+        "GET /products/<product>/<listing>",
+        f"/products/{product_id}/{listing_id}",
+    )
+
+
+def search(user: VirtualUser):
+    """Page through a category, sort the listings of a product, open a ranking."""
+    product_id, _ = user.catalog.random_listing()
+
+    user.request(
+        "POST",
+        "POST /products",
+        "/products",
+        {
+            "category": random.choice(user.catalog.categories),
+            "limit": 20,
+            "offset": random.choice((0, 0, 20, 40)),
+        },
+    )
+    user.request(
+        "POST",
+        "POST /products/<product>",
+        f"/products/{product_id}",
+        {
+            "limit": 10,
+            random.choice(("price_order_by", "review_order_by")): random.choice(
+                ("asc", "desc")
+            ),
+        },
+    )
+    user.request(
+        "POST",
+        "POST /listings/ranking",
+        "/listings/ranking",
+        {"ranking": random.choice(("popular", "trending")), "limit": 10},
+    )
+
+
+def cart(user: VirtualUser):
+    """Add a listing to the cart, look at the cart, remove the listing."""
+    _, listing_id = user.catalog.random_listing()
+
+    entry = user.request(
+        "POST", "POST /cart", "/cart", {"listing_id": listing_id, "quantity": 1}
+    )
+    user.request("GET", "GET /cart", "/cart")
+    if entry:
+        user.request(
+            "DELETE", "DELETE /cart", "/cart", {"cart_item_ids": [entry["id"]]}
+        )
+
+
+def checkout(user: VirtualUser):
+    """Add a listing to the cart, place the order, look at the orders."""
+    _, listing_id = user.catalog.random_listing()
+
+    user.request(
+        "POST", "POST /cart", "/cart", {"listing_id": listing_id, "quantity": 1}
+    )
+    order = user.request("POST", "POST /orders", "/orders", ADDRESS)
+    user.request("GET", "GET /orders/summary", "/orders/summary")
+    if order:
+        user.request("GET", "GET /orders/<order>", f"/orders/{order['id']}")
+
+
+def seller_updates(user: VirtualUser):
+    """Ship a few pending orders, then look at the analytics."""
+    orders = user.request(
+        "GET",
+        "GET /seller/orders",
+        "/seller/orders",
+        {"status": "pending", "limit": 20},
+    )
+    order_ids = sorted({o["order_id"] for o in (orders or {}).get("orders", [])})
+    if order_ids:
+        user.request(
+            "POST",
+            "POST /seller/orders/status",
+            "/seller/orders/status",
+            {"order_ids": order_ids[:5], "status": "shipped"},
+        )
+    user.request("GET", "GET /seller/analytics", "/seller/analytics?days=30")
+
+
+CUSTOMER_SCENARIOS = {
+    "browse": browse,
+    "search": search,
+    "cart": cart,
+    "checkout": checkout,
+}
+SELLER_SCENARIOS = {
+    "seller": seller_updates,
+}
+DEFAULT_MIX = "browse=50,search=25,cart=15,checkout=7,seller=3"
+
+
+def parse_mix(mix: str) -> dict:
+    """
+    Parse a scenario mix such as "browse=50,search=25".
+
+    Returns:
+        dict: The weight of each scenario.
+    """
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in CUSTOMER_SCENARIOS and name not in SELLER_SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario: {name}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def run_user(user: VirtualUser, scenarios: dict, deadline: float):
+    """Run weighted random scenarios until the deadline."""
+    names = list(scenarios)
+    weights = [scenarios[name][1] for name in names]
+    while monotonic() < deadline:
+        name = random.choices(names, weights)[0]
+        scenarios[name][0](user)
+
+
+def create_customers(count: int, concurrency: int) -> list:
+    """
+    Sign up, verify and log in count new customers.
+
+    Returns:
+        list: Their access tokens.
+    """
+    run_id = int(time.time())
+
+    def create(i):
+        return User.create(
+            f"load-{run_id}-{i}@example.com", "Password1?", "Load", f"User{i}"
+        ).access_token
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        return list(executor.map(create, range(count)))
+
+
+def print_report(rows: list, elapsed: float):
+    print(f"\n{elapsed:.1f}s")
+    print(
+        f"{'endpoint':<36} {'requests':>9} {'errors':>7} {'req/s':>8} "
+        f"{'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    )
+    for row in rows:
+        print(
+            f"{row['endpoint']:<36} {row['requests']:>9} {row['errors']:>7} "
+            f"{row['rps']:>8.1f} {row['p50']:>8.1f} {row['p90']:>8.1f} "
+            f"{row['p99']:>8.1f} {row['max']:>8.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the e-commerce API.")
+    parser.add_argument("--users", type=int, default=20, help="virtual users")
+    parser.add_argument(
+        "--duration", type=float, default=60, help="duration of the run (seconds)"
+    )
+    parser.add_argument(
+        "--start-rps", type=float, default=1, help="requests/sec at the start"
+    )
+    parser.add_argument(
+        "--rps",
+        type=float,
+        default=50,
+        help="requests/sec after the ramp (0: as fast as the users can go)",
+    )
+    parser.add_argument(
+        "--ramp", type=float, default=30, help="duration of the ramp (seconds)"
+    )
+    parser.add_argument(
+        "--mix", type=parse_mix, default=DEFAULT_MIX, help="scenario weights"
+    )
+    parser.add_argument("--seller-email", default="sales@amazon.com")
+    parser.add_argument("--seller-password", default="changeme")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    utils.IS_DEBUG = False
+
+    customer_mix = {
+        name: (CUSTOMER_SCENARIOS[name], weight)
+        for name, weight in args.mix.items()
+        if name in CUSTOMER_SCENARIOS and weight > 0
+    }
+    seller_mix = {
+        name: (SELLER_SCENARIOS[name], weight)
+        for name, weight in args.mix.items()
+        if name in SELLER_SCENARIOS and weight > 0
+    }
+
+    # Sellers get their share of the virtual users, customers the rest
+    seller_share = sum(w for _, w in seller_mix.values()) / sum(args.mix.values())
+    sellers = round(args.users * seller_share) if seller_mix else 0
+    if seller_mix and sellers == 0:
+        sellers = 1
+    customers = args.users - sellers if customer_mix else 0
+
+    print(f"creating {customers} customers")
+    tokens = create_customers(customers, min(customers, 8) or 1)
+    seller_token = (
+        Seller.login(args.seller_email, args.seller_password).access_token
+        if sellers
+        else None
+    )
+
+    catalog = Catalog.load(tokens[0] if tokens else seller_token)
+    if customer_mix and not catalog.products:
+        raise SystemExit("no listing available, run populate_db.py first")
+
+    print(
+        f"{customers} customers, {sellers} sellers, {args.duration:.0f}s, "
+        f"{args.start_rps:g} -> {args.rps:g} req/s over {args.ramp:.0f}s"
+    )
+
+    stats = Stats()
+    pacer = Pacer(args.start_rps, args.rps, args.ramp)
+    deadline = monotonic() + args.duration
+    with ThreadPoolExecutor(customers + sellers) as executor:
+        futures = [
+            executor.submit(
+                run_user,
+                VirtualUser(token, catalog, pacer, stats),
+                customer_mix,
+                deadline,
+            )
+            for token in tokens
+        ] + [
+            executor.submit(
+                run_user,
+                VirtualUser(seller_token, catalog, pacer, stats),
+                seller_mix,
+                deadline,
+            )
+            for _ in range(sellers)
+        ]
+        for future in futures:
+            future.result()
+    elapsed = monotonic() - pacer.started_at
+
+    rows = stats.report(elapsed)
+    print_report(rows, elapsed)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"elapsed": elapsed, "endpoints": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
+
+
+# This script load tests the API with concurrent virtual users, each one
+# running a weighted mix of scenarios in its own thread:
+# - browse: categories, products of a category, a product and a listing
+# - search: paging a category, sorting listings, the popular/trending rankings
+# - cart: adding and removing a cart item
+# - checkout: adding a cart item, placing the order, reading the orders
+# - seller: shipping pending orders in bulk, reading the analytics
+# A share of the virtual users proportional to the seller weight log in as
+# the seller, the others are new customers created before the run.
+
+# The requests of all the users are paced to ramp linearly from --start-rps to
+# --rps over --ramp seconds. When the p99 latency grows and the measured req/s
+# stays below the target, the server is saturated (or --users is too low to
+# offer the target load: each user has at most one request in flight).
+
+# The report gives, per endpoint, the number of requests and errors, the
+# throughput and the p50/p90/p99/max latency. --json writes the same report
+# to a file, to compare runs.
+
+# Run against a local Postgres, with the server in the configuration to test:
+#   $ flask run            # or gunicorn -w 4 -b 0.0.0.0:5000 app:app
+#   $ cd tools/e2e
+#   $ python populate_db.py
+#   $ python load.py --users 50 --rps 200 --ramp 60 --duration 180 \
+#       --mix browse=60,search=20,cart=10,checkout=8,seller=2
+# The server must run with FLASK_ENV=development: the customers are verified
+# with the token returned by /signup. Checkouts consume the stock of the
+# listings, so re-run populate_db.py between long runs.
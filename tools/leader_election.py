@@ -0,0 +1,96 @@
+import multiprocessing as mp
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from flask import Flask  # noqa: E402
+
+from core.config import app_config  # noqa: E402
+from core.extensions import db  # noqa: E402
+from core.leader_election import LeaderElection  # noqa: E402
+
+WORKERS = int(os.getenv("WORKERS", "8"))
+
+
+def worker(name, rounds, results):
+    """
+    Simulate a gunicorn worker trying to become the scheduler leader.
+
+    Args:
+        name (str): The worker name reported with each result.
+        rounds (list): One Event per election round; the worker waits for each
+            before trying to acquire the leader lock.
+        results (Queue): Receives (name, is_leader) tuples.
+    """
+    app = Flask(name)
+    app.config.from_object(app_config["development"])
+    app.config["SQLALCHEMY_ECHO"] = False
+    db.init_app(app)
+
+    election = LeaderElection(app)
+
+    with app.app_context():
+        for start in rounds:
+            start.wait()
+            results.put((name, election.try_acquire()))
+
+        # Keep the connection (and leadership) until the parent terminates us
+        mp.Event().wait()
+
+
+def run_round(start, results, expected):
+    """Start an election round and collect the name of the leaders."""
+    start.set()
+    outcomes = [results.get(timeout=30) for _ in range(expected)]
+    return [name for name, is_leader in outcomes if is_leader]
+
+
+def main():
+    ctx = mp.get_context("spawn")
+    rounds = [ctx.Event(), ctx.Event()]
+    results = ctx.Queue()
+
+    processes = {
+        f"worker-{i}": ctx.Process(
+            target=worker, args=(f"worker-{i}", rounds, results), daemon=True
+        )
+        for i in range(WORKERS)
+    }
+    for p in processes.values():
+        p.start()
+
+    try:
+        leaders = run_round(rounds[0], results, WORKERS)
+        print(f"round 1: {WORKERS} workers, leaders={leaders}")
+        assert len(leaders) == 1, "exactly one worker must be the leader"
+
+        # Kill the leader: its connection closes and the lock is released
+        dead_leader = leaders[0]
+        processes.pop(dead_leader).terminate()
+
+        leaders = run_round(rounds[1], results, WORKERS - 1)
+        print(f"round 2: leader {dead_leader} killed, leaders={leaders}")
+        assert len(leaders) == 1, "exactly one worker must take over"
+        assert dead_leader not in leaders
+    finally:
+        for p in processes.values():
+            p.terminate()
+
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
+
+
+# This script checks the scheduler leader election (core/leader_election.py)
+# against the local PostgreSQL instance configured in .env (DB_URI).
+
+# It spawns WORKERS processes that all try to take the advisory lock at the same
+# time and verifies that exactly one of them wins. It then kills the leader and
+# verifies that exactly one of the survivors takes over.
+
+# Usage:
+#   $ docker-compose up -d postgres
+#   $ WORKERS=8 python tools/leader_election.py